@@ -0,0 +1,108 @@
+from statistics import mean
+from typing import Union
+
+import numpy as np
+
+from .nbo_table import NboTable
+from .nbo_data_point import NboDataPoint
+
+
+class AtomNboStatistics:
+
+    """Class for storing per-atom statistics of single-center NBOs (lone pairs or lone vacancies)."""
+
+    def __init__(self, nbo_data: Union[list[NboDataPoint], NboTable], n_atoms: int):
+
+        """Constructor. Groups the NBO data by atom in a single pass and reduces each group. Columnar NBO data is
+           grouped on the columns without creating NBO data points.
+
+        Args:
+            nbo_data (Union[list[NboDataPoint], NboTable]): The single-center NBO data of one type.
+            n_atoms (int): The number of atoms.
+        """
+
+        if isinstance(nbo_data, NboTable):
+            energies, occupations, orbital_occupations = self._group_table_by_atom(nbo_data, n_atoms)
+            row_energies = nbo_data.energies.tolist()
+        else:
+            energies, occupations, orbital_occupations = self._group_list_by_atom(nbo_data, n_atoms)
+            row_energies = [nbo_data_point.energy for nbo_data_point in nbo_data]
+
+        self.counts = [len(x) for x in energies]
+
+        self.min_energies = [min(x) if len(x) > 0 else None for x in energies]
+        self.max_energies = [max(x) if len(x) > 0 else None for x in energies]
+        self.average_energies = [mean(x) if len(x) > 0 else None for x in energies]
+        self.average_occupations = [mean(x) if len(x) > 0 else None for x in occupations]
+        # averaged orbital occupations ordered as [s, p, d, f]
+        self.average_orbital_occupations = [[mean([y[k] for y in x]) for k in range(4)] if len(x) > 0 else None for x in orbital_occupations]
+
+        # first NBO (of the whole list) with a given energy
+        # used to resolve the NBO that belongs to an energy extremum
+        first_row_by_energy = {}
+        for i in range(len(row_energies)):
+            first_row_by_energy.setdefault(row_energies[i], i)
+
+        self.min_energy_nbos = [nbo_data[first_row_by_energy[x]] if x is not None else None for x in self.min_energies]
+        self.max_energy_nbos = [nbo_data[first_row_by_energy[x]] if x is not None else None for x in self.max_energies]
+
+    @staticmethod
+    def _group_list_by_atom(nbo_data: list[NboDataPoint], n_atoms: int) -> tuple[list, list, list]:
+
+        """Helper function to collect energies, occupations and orbital occupations per atom from NBO data points.
+
+        Returns:
+            tuple[list, list, list]: The energies, occupations and orbital occupations of each atom.
+        """
+
+        energies = [[] for _ in range(n_atoms)]
+        occupations = [[] for _ in range(n_atoms)]
+        orbital_occupations = [[] for _ in range(n_atoms)]
+
+        for nbo_data_point in nbo_data:
+
+            atom_index = nbo_data_point.atom_indices[0]
+
+            energies[atom_index].append(nbo_data_point.energy)
+            occupations[atom_index].append(nbo_data_point.occupation)
+            orbital_occupations[atom_index].append(nbo_data_point.orbital_occupations)
+
+        return energies, occupations, orbital_occupations
+
+    @staticmethod
+    def _group_table_by_atom(nbo_table: NboTable, n_atoms: int) -> tuple[list, list, list]:
+
+        """Helper function to collect energies, occupations and orbital occupations per atom from the columns of
+           an NBO table. The original order is kept within each atom.
+
+        Returns:
+            tuple[list, list, list]: The energies, occupations and orbital occupations of each atom.
+        """
+
+        # first atom index of each row
+        row_atom_indices = nbo_table.atom_indices[nbo_table.atom_index_offsets[:-1]]
+
+        order = np.argsort(row_atom_indices, kind='stable')
+        offsets = [0] + np.cumsum(np.bincount(row_atom_indices, minlength=n_atoms)).tolist()
+
+        sorted_energies = nbo_table.energies[order].tolist()
+        sorted_occupations = nbo_table.occupations[order].tolist()
+        sorted_orbital_occupations = nbo_table.orbital_occupations[order].tolist()
+
+        energies = [sorted_energies[offsets[i]:offsets[i + 1]] for i in range(n_atoms)]
+        occupations = [sorted_occupations[offsets[i]:offsets[i + 1]] for i in range(n_atoms)]
+        orbital_occupations = [sorted_orbital_occupations[offsets[i]:offsets[i + 1]] for i in range(n_atoms)]
+
+        return energies, occupations, orbital_occupations
+
+    def get_energy_min_max_difference(self, atom_index: int) -> float:
+
+        """Gets the difference between the highest and lowest NBO energy of an atom.
+
+        Returns:
+            float: The energy difference (0.0 if there are less than two NBOs).
+        """
+
+        if self.counts[atom_index] >= 2:
+            return abs(self.min_energies[atom_index] - self.max_energies[atom_index])
+        return 0.0
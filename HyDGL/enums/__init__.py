@@ -9,3 +9,4 @@ from .orbital_occupation_type import OrbitalOccupationType
 from .qm_target import QmTarget
 from .sopa_edge_feature import SopaEdgeFeature
 from .sopa_resolution_mode import SopaResolutionMode
+from .sopa_prefilter_mode import SopaPrefilterMode
@@ -0,0 +1,10 @@
+from enum import Enum, auto
+
+
+class SopaPrefilterMode(Enum):
+
+    '''Enum class for the different ways of pruning SOPA entries before they are grouped by atoms.'''
+
+    NONE = auto()
+    THRESHOLD = auto()
+    TOP_K = auto()
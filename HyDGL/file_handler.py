@@ -1,12 +1,87 @@
 import os
+import bz2
+import functools
+import gzip
 import json
+import lzma
+import mmap
 import pickle
+import multiprocessing
+from typing import Iterator
+
+import numpy as np
+
+# optional faster JSON backend
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .qm_data import QmData
+from .nbo_table import NboTable
+from .sopa_table import SopaTable
+from .enums.nbo_type import NboType
+
+# optional zstd compression
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# compression formats by file extension and by magic bytes
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma', '.lzma': 'lzma', '.zst': 'zstd'}
+COMPRESSION_MAGIC_BYTES = {b'\x1f\x8b': 'gzip', b'BZh': 'bz2', b'\xfd7zXZ\x00': 'lzma', b'\x28\xb5\x2f\xfd': 'zstd'}
+
+# single-file QM data archive layout: magic, JSON records, JSON index, index offset, magic
+QM_DATA_ARCHIVE_MAGIC = b'HYDGLAR1'
+
+# binary QM data container layout: magic, header length, JSON header, aligned arrays
+QM_DATA_CONTAINER_MAGIC = b'HYDGLQM1'
+QM_DATA_CONTAINER_ALIGNMENT = 64
+
+# QM data fields stored in the container header
+QM_DATA_CONTAINER_HEADER_FIELDS = ['id', 'stoichiometry', 'n_atoms', 'atomic_numbers', 'charge', 'molecular_mass', 'polarisability',
+                                   'svp_dispersion_energy', 'tzvp_dispersion_energy', 'svp_electronic_energy', 'tzvp_electronic_energy',
+                                   'svp_dipole_moment', 'tzvp_dipole_moment', 'heat_capacity', 'entropy', 'zpe_correction',
+                                   'enthalpy_energy', 'gibbs_energy']
+
+# QM data fields stored as typed arrays
+QM_DATA_CONTAINER_ARRAY_FIELDS = ['geometric_data', 'natural_atomic_charges', 'natural_electron_configuration', 'natural_electron_population',
+                                  'svp_occupied_orbital_energies', 'tzvp_occupied_orbital_energies', 'svp_virtual_orbital_energies',
+                                  'tzvp_virtual_orbital_energies', 'frequencies', 'wiberg_bond_order_matrix', 'lmo_bond_order_matrix',
+                                  'nlmo_bond_order_matrix']
+
+# array fields that are set up directly by QmData (converted to lists on load)
+QM_DATA_CONTAINER_LIGHT_ARRAY_FIELDS = ['geometric_data', 'natural_atomic_charges', 'natural_electron_configuration', 'natural_electron_population']
 
 
 class FileHandler:
 
     """Class for handling all IO/file handling tasks."""
 
+    # JSON backend used for parsing and compact writing (see set_json_backend())
+    json_backend = 'json'
+
+    @staticmethod
+    def set_json_backend(json_backend: str):
+
+        """Sets the JSON backend used for parsing and compact writing. orjson is faster but does not accept
+           NaN and Infinity when parsing and writes them as null.
+
+        Args:
+            json_backend (string): The backend ('json' or 'orjson').
+
+        Raises:
+            ValueError: If the backend is not recognised or not installed.
+        """
+
+        if json_backend not in ['json', 'orjson']:
+            raise ValueError('JSON backend ' + str(json_backend) + ' not recognized.')
+        if json_backend == 'orjson' and orjson is None:
+            raise ValueError('JSON backend orjson is not installed.')
+
+        FileHandler.json_backend = json_backend
+
     @staticmethod
     def read_file(file_path):
         """Reads a specified file.
@@ -22,12 +97,7 @@ class FileHandler:
             string: The file content.
         """
 
-        try:
-            f = open(file_path, 'r')
-        except FileNotFoundError:
-            raise FileNotFoundError('The specified file does not exist.')
-        except IsADirectoryError:
-            raise IsADirectoryError('Cannot open directory.')
+        f = FileHandler._open_file(file_path, 'r')
 
         with f:
             data = f.read()
@@ -44,7 +114,7 @@ class FileHandler:
             data (): The file content to write.
         """
 
-        with open(file_path, 'w') as f:
+        with FileHandler._open_file(file_path, 'w') as f:
             f.write(data)
 
     @staticmethod
@@ -62,12 +132,7 @@ class FileHandler:
             binary: The file content.
         """
 
-        try:
-            f = open(file_path, 'rb')
-        except FileNotFoundError:
-            raise FileNotFoundError('The specified file does not exist.')
-        except IsADirectoryError:
-            raise IsADirectoryError('Cannot open directory.')
+        f = FileHandler._open_file(file_path, 'rb')
 
         with f:
             data = pickle.load(f)
@@ -84,7 +149,7 @@ class FileHandler:
             data (): The file content to write.
         """
 
-        with open(file_path, 'wb') as f:
+        with FileHandler._open_file(file_path, 'wb') as f:
             pickle.dump(data, f)
 
     @staticmethod
@@ -102,12 +167,13 @@ class FileHandler:
                 os.remove(os.path.join(directory, file_name))
 
     @staticmethod
-    def read_dict_from_json_file(file_path):
+    def read_dict_from_json_file(file_path, keys: list[str] = None):
 
         """Reads a dict from a specified json file.
 
         Args:
             file_path (string): The path to the input file.
+            keys (list[string]): The keys to keep (e.g. the required QM data fields). Defaults to all keys.
 
         Raises:
             FileNotFoundError: If file not found.
@@ -117,27 +183,620 @@ class FileHandler:
             dict: The JSON dict.
         """
 
+        f = FileHandler._open_file(file_path, 'rb')
+
+        with f:
+            data = FileHandler._json_loads(f.read())
+            f.close()
+
+        # drop unrequested entries right away so that they can be freed
+        if keys is not None:
+            data = {key: data[key] for key in keys if key in data.keys()}
+
+        return data
+
+    @staticmethod
+    def write_dict_to_json_file(file_path: str, data: dict, compact: bool = False):
+
+        """Writes the specified dictionary in a JSON file (overwrites).
+
+        Args:
+            file_path (string): The path to the output file.
+            data (dict): The dict to write.
+            compact (bool): Whether to write without whitespace (using the JSON backend) instead of indented.
+        """
+
+        if compact:
+            with FileHandler._open_file(file_path, 'wb') as f:
+                f.write(FileHandler._json_dumps(data, sort_keys=True))
+            return
+
+        with FileHandler._open_file(file_path, 'w') as f:
+            json.dump(data, f, sort_keys=True, indent=4)
+
+    @staticmethod
+    def write_dicts_to_json_lines_file(file_path: str, data: list[dict]):
+
+        """Writes the specified dictionaries in a JSON lines file with one dict per line (overwrites).
+
+        Args:
+            file_path (string): The path to the output file.
+            data (list[dict]): The dicts to write.
+        """
+
+        with FileHandler._open_file(file_path, 'wb') as f:
+            for item in data:
+                f.write(FileHandler._json_dumps(item) + b'\n')
+
+    @staticmethod
+    def read_qm_data_from_json_lines_file(file_path: str, ids: list[str] = None, fields: list[str] = None,
+                                          nbo_types: list[NboType] = None, use_nbo_table: bool = False,
+                                          lazy: bool = False) -> Iterator[QmData]:
+
+        """Reads QM data from a JSON lines file (one QM data dict per line) one molecule at a time.
+
+        Args:
+            file_path (string): The path to the input file.
+            ids (list[string]): The ids of the molecules to read. Defaults to all molecules.
+            fields (list[string]): The QM data fields to load (see QmData.from_dict()).
+            nbo_types (list[NboType]): The NBO types to load (see QmData.from_dict()).
+            use_nbo_table (bool): Whether to store the NBO and SOPA data in columnar form.
+            lazy (bool): Whether to defer the setup of heavy fields to first access.
+
+        Raises:
+            FileNotFoundError: If file not found.
+            IsADirectoryError: If path points to a directory.
+
+        Yields:
+            QmData: The QM data objects.
+        """
+
+        # quoted ids as they appear in the JSON text (with and without escaped non-ASCII characters)
+        id_tokens = None
+        if ids is not None:
+            id_tokens = [json.dumps(x) for x in ids] + [json.dumps(x, ensure_ascii=False) for x in ids]
+
+        f = FileHandler._open_file(file_path, 'r')
+
+        with f:
+            for line in f:
+
+                if line.strip() == '':
+                    continue
+
+                # cheap check on the raw line to skip parsing of unrequested molecules
+                if id_tokens is not None and not any(id_token in line for id_token in id_tokens):
+                    continue
+
+                data = FileHandler._json_loads(line)
+                if ids is not None and data['id'] not in ids:
+                    continue
+
+                if fields is not None:
+                    data = {key: data[key] for key in fields if key in data.keys()}
+
+                yield QmData.from_dict(data, use_nbo_table=use_nbo_table, lazy=lazy, fields=fields, nbo_types=nbo_types)
+
+    @staticmethod
+    def read_qm_data_from_json_directory(directory: str, ids: list[str] = None, fields: list[str] = None,
+                                         nbo_types: list[NboType] = None, use_nbo_table: bool = False,
+                                         lazy: bool = False) -> Iterator[QmData]:
+
+        """Reads QM data from a directory of (optionally compressed) JSON files (one file per molecule named by its id)
+           one molecule at a time.
+
+        Args:
+            directory (string): The directory.
+            ids (list[string]): The ids of the molecules to read. Defaults to all molecules.
+            fields (list[string]): The QM data fields to load (see QmData.from_dict()).
+            nbo_types (list[NboType]): The NBO types to load (see QmData.from_dict()).
+            use_nbo_table (bool): Whether to store the NBO and SOPA data in columnar form.
+            lazy (bool): Whether to defer the setup of heavy fields to first access.
+
+        Yields:
+            QmData: The QM data objects.
+        """
+
+        for file_path in FileHandler.get_json_file_paths(directory, ids=ids):
+            yield FileHandler._read_qm_data_from_json_file(file_path, fields=fields, nbo_types=nbo_types, use_nbo_table=use_nbo_table, lazy=lazy)
+
+    @staticmethod
+    def get_json_file_paths(directory: str, ids: list[str] = None) -> list[str]:
+
+        """Gets the paths of the (optionally compressed) JSON files in a directory (one file per molecule named by its id).
+
+        Args:
+            directory (string): The directory.
+            ids (list[string]): The ids of the molecules to select. Defaults to all molecules.
+
+        Returns:
+            list[string]: The sorted file paths.
+        """
+
+        file_paths = []
+        for file_name in sorted(os.listdir(directory)):
+
+            # strip compression extensions
+            stem, extension = os.path.splitext(file_name)
+            if extension in COMPRESSION_EXTENSIONS.keys():
+                stem, extension = os.path.splitext(stem)
+
+            if extension != '.json':
+                continue
+
+            # filter by file name to skip opening unrequested molecules
+            if ids is not None and stem not in ids:
+                continue
+
+            file_paths.append(os.path.join(directory, file_name))
+
+        return file_paths
+
+    @staticmethod
+    def read_qm_data_from_json_files(file_paths: list[str], fields: list[str] = None, nbo_types: list[NboType] = None,
+                                     use_nbo_table: bool = False, lazy: bool = False, n_processes: int = None,
+                                     chunk_size: int = 1, ordered: bool = True) -> Iterator[tuple[str, QmData, Exception]]:
+
+        """Reads QM data from JSON files in parallel. Parsing and QmData construction are distributed over a
+           process pool and the results are yielded as they become available.
+
+        Args:
+            file_paths (list[string]): The paths to the input files.
+            fields (list[string]): The QM data fields to load (see QmData.from_dict()).
+            nbo_types (list[NboType]): The NBO types to load (see QmData.from_dict()).
+            use_nbo_table (bool): Whether to store the NBO and SOPA data in columnar form.
+            lazy (bool): Whether to defer the setup of heavy fields to first access.
+            n_processes (int): The number of worker processes. Defaults to the number of CPUs. 1 reads in-process.
+            chunk_size (int): The number of files sent to a worker at once.
+            ordered (bool): Whether to yield results in the order of the file paths or as they finish.
+
+        Yields:
+            tuple[string, QmData, Exception]: The file path and either the QM data or the error raised while reading it.
+        """
+
+        read = functools.partial(FileHandler._try_read_qm_data_from_json_file, fields=fields, nbo_types=nbo_types,
+                                 use_nbo_table=use_nbo_table, lazy=lazy)
+
+        if n_processes == 1:
+            for file_path in file_paths:
+                yield read(file_path)
+            return
+
+        with multiprocessing.Pool(n_processes) as pool:
+            if ordered:
+                results = pool.imap(read, file_paths, chunksize=chunk_size)
+            else:
+                results = pool.imap_unordered(read, file_paths, chunksize=chunk_size)
+            for result in results:
+                yield result
+
+    @staticmethod
+    def _read_qm_data_from_json_file(file_path: str, fields: list[str] = None, nbo_types: list[NboType] = None,
+                                     use_nbo_table: bool = False, lazy: bool = False) -> QmData:
+
+        """Helper function to read QM data from a single JSON file.
+
+        Returns:
+            QmData: The QM data.
+        """
+
+        data = FileHandler.read_dict_from_json_file(file_path, keys=fields)
+        return QmData.from_dict(data, use_nbo_table=use_nbo_table, lazy=lazy, fields=fields, nbo_types=nbo_types)
+
+    @staticmethod
+    def _try_read_qm_data_from_json_file(file_path: str, fields: list[str] = None, nbo_types: list[NboType] = None,
+                                         use_nbo_table: bool = False, lazy: bool = False) -> tuple[str, QmData, Exception]:
+
+        """Helper function to read QM data from a single JSON file that returns errors instead of raising them.
+
+        Returns:
+            tuple[string, QmData, Exception]: The file path and either the QM data or the error.
+        """
+
         try:
-            f = open(file_path, 'r')
+            return file_path, FileHandler._read_qm_data_from_json_file(file_path, fields=fields, nbo_types=nbo_types,
+                                                                       use_nbo_table=use_nbo_table, lazy=lazy), None
+        except Exception as e:
+            return file_path, None, e
+
+    @staticmethod
+    def write_qm_data_container(file_path: str, qm_data: QmData):
+
+        """Writes QM data into a binary container (overwrites). Scalars are stored in a JSON header and
+           matrices, geometry, NBO and SOPA data as aligned typed arrays.
+
+        Args:
+            file_path (string): The path to the output file.
+            qm_data (QmData): The QM data.
+        """
+
+        header = {'fields': {}, 'arrays': {}, 'nbo_type_identifiers': None}
+        arrays = {}
+
+        for name in QM_DATA_CONTAINER_HEADER_FIELDS:
+            header['fields'][name] = getattr(qm_data, name)
+
+        for name in QM_DATA_CONTAINER_ARRAY_FIELDS:
+            if getattr(qm_data, name) is not None:
+                arrays[name] = np.asarray(getattr(qm_data, name), dtype=np.float64)
+
+        # NBO data in columnar form
+        if qm_data.nbo_data is not None:
+
+            nbo_table = qm_data.nbo_data
+            if not isinstance(nbo_table, NboTable):
+                nbo_table = NboTable.from_list([[x.nbo_id, x.nbo_type, x.atom_indices, x.energy, x.contributions, x.occupation, x.orbital_occupations]
+                                                for x in nbo_table])
+
+            header['nbo_type_identifiers'] = nbo_table.type_identifiers
+            arrays['nbo_ids'] = nbo_table.nbo_ids
+            arrays['nbo_type_codes'] = nbo_table.type_codes
+            arrays['nbo_energies'] = nbo_table.energies
+            arrays['nbo_occupations'] = nbo_table.occupations
+            arrays['nbo_orbital_occupations'] = nbo_table.orbital_occupations
+            # views have to be rebased to start at the first atom index
+            arrays['nbo_atom_index_offsets'] = nbo_table.atom_index_offsets - nbo_table.atom_index_offsets[0]
+            arrays['nbo_atom_indices'] = nbo_table.atom_indices[nbo_table.atom_index_offsets[0]:nbo_table.atom_index_offsets[-1]]
+            arrays['nbo_contributions'] = nbo_table.contributions[nbo_table.atom_index_offsets[0]:nbo_table.atom_index_offsets[-1]]
+
+        # SOPA data as NBO ID pairs and energies
+        if qm_data.sopa_data is not None:
+
+            sopa_table = qm_data.sopa_data
+            if not isinstance(sopa_table, SopaTable):
+                sopa_table = SopaTable.from_list(sopa_table)
+
+            arrays['sopa_nbo_ids'] = np.stack([sopa_table.donor_nbo_ids, sopa_table.acceptor_nbo_ids], axis=1).astype(np.int32)
+            arrays['sopa_energies'] = sopa_table.energies
+
+        # array offsets relative to the (aligned) start of the data section
+        offset = 0
+        for name in arrays.keys():
+            arrays[name] = np.ascontiguousarray(arrays[name])
+            header['arrays'][name] = {'dtype': arrays[name].dtype.str, 'shape': list(arrays[name].shape), 'offset': offset}
+            offset = FileHandler._align(offset + arrays[name].nbytes)
+
+        header_bytes = FileHandler._json_dumps(header)
+        data_offset = FileHandler._align(len(QM_DATA_CONTAINER_MAGIC) + 8 + len(header_bytes))
+
+        with open(file_path, 'wb') as f:
+            f.write(QM_DATA_CONTAINER_MAGIC)
+            f.write(len(header_bytes).to_bytes(8, 'little'))
+            f.write(header_bytes)
+            for name in arrays.keys():
+                f.write(b'\0' * (data_offset + header['arrays'][name]['offset'] - f.tell()))
+                f.write(arrays[name].tobytes())
+
+    @staticmethod
+    def read_qm_data_container(file_path: str, use_nbo_table: bool = False, lazy: bool = True) -> QmData:
+
+        """Reads QM data from a binary container. The file is memory mapped so that arrays are only read
+           when they are accessed.
+
+        Args:
+            file_path (string): The path to the input file.
+            use_nbo_table (bool): Whether to store the NBO and SOPA data in columnar form.
+            lazy (bool): Whether to defer the setup of heavy fields to first access.
+
+        Raises:
+            FileNotFoundError: If file not found.
+            IsADirectoryError: If path points to a directory.
+            ValueError: If the file is not a QM data container.
+
+        Returns:
+            QmData: The QM data.
+        """
+
+        try:
+            f = open(file_path, 'rb')
         except FileNotFoundError:
             raise FileNotFoundError('The specified file does not exist.')
         except IsADirectoryError:
             raise IsADirectoryError('Cannot open directory.')
 
         with f:
-            data = json.load(f)
-            f.close()
-            return data
+            if os.fstat(f.fileno()).st_size < len(QM_DATA_CONTAINER_MAGIC) + 8:
+                raise ValueError('The specified file is not a QM data container.')
+            # the mapping stays open as long as arrays refer to it
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if buffer[:len(QM_DATA_CONTAINER_MAGIC)] != QM_DATA_CONTAINER_MAGIC:
+            raise ValueError('The specified file is not a QM data container.')
+
+        header_offset = len(QM_DATA_CONTAINER_MAGIC) + 8
+        header_length = int.from_bytes(buffer[len(QM_DATA_CONTAINER_MAGIC):header_offset], 'little')
+        header = FileHandler._json_loads(buffer[header_offset:header_offset + header_length])
+        data_offset = FileHandler._align(header_offset + header_length)
+
+        def get_array(name: str) -> np.ndarray:
+            info = header['arrays'][name]
+            if int(np.prod(info['shape'])) == 0:
+                return np.empty(info['shape'], dtype=info['dtype'])
+            return np.frombuffer(buffer, dtype=info['dtype'], count=int(np.prod(info['shape'])),
+                                 offset=data_offset + info['offset']).reshape(info['shape'])
+
+        qm_data_dict = dict(header['fields'])
+
+        for name in QM_DATA_CONTAINER_ARRAY_FIELDS:
+            qm_data_dict[name] = None
+            if name in header['arrays'].keys():
+                qm_data_dict[name] = get_array(name)
+                if name in QM_DATA_CONTAINER_LIGHT_ARRAY_FIELDS:
+                    qm_data_dict[name] = qm_data_dict[name].tolist()
+
+        qm_data_dict['nbo_data'] = None
+        if 'nbo_ids' in header['arrays'].keys():
+            qm_data_dict['nbo_data'] = NboTable(nbo_ids=get_array('nbo_ids'),
+                                                type_codes=get_array('nbo_type_codes'),
+                                                energies=get_array('nbo_energies'),
+                                                occupations=get_array('nbo_occupations'),
+                                                orbital_occupations=get_array('nbo_orbital_occupations'),
+                                                atom_index_offsets=get_array('nbo_atom_index_offsets'),
+                                                atom_indices=get_array('nbo_atom_indices'),
+                                                contributions=get_array('nbo_contributions'),
+                                                type_identifiers=header['nbo_type_identifiers'])
+
+        qm_data_dict['sopa_data'] = None
+        if 'sopa_nbo_ids' in header['arrays'].keys():
+            qm_data_dict['sopa_data'] = (get_array('sopa_nbo_ids'), get_array('sopa_energies'))
+
+        return QmData.from_dict(qm_data_dict, use_nbo_table=use_nbo_table, lazy=lazy)
 
     @staticmethod
-    def write_dict_to_json_file(file_path: str, data: dict):
+    def write_qm_data_archive(file_path: str, qm_data_dicts: list[dict]):
 
-        """Writes the specified dictionary in a JSON file (overwrites).
+        """Writes QM data dicts into a single-file archive with an id index (overwrites).
 
         Args:
             file_path (string): The path to the output file.
-            data (dict): The dict to write.
+            qm_data_dicts (list[dict]): The QM data dicts.
         """
 
-        with open(file_path, 'w') as f:
-            json.dump(data, f, sort_keys=True, indent=4)
+        with open(file_path, 'wb') as f:
+            f.write(QM_DATA_ARCHIVE_MAGIC)
+            FileHandler._write_qm_data_archive_records(f, {}, qm_data_dicts)
+
+    @staticmethod
+    def append_to_qm_data_archive(file_path: str, qm_data_dicts: list[dict]):
+
+        """Appends QM data dicts to an existing archive. The new records and the updated index are written
+           behind the existing index, which stays valid until the new trailer is written. Molecules with an id
+           that is already in the archive replace the existing entries in the index.
+
+        Args:
+            file_path (string): The path to the archive.
+            qm_data_dicts (list[dict]): The QM data dicts.
+        """
+
+        index, archive_size = FileHandler._read_qm_data_archive_trailer(file_path)
+
+        with open(file_path, 'r+b') as f:
+            # drop the remains of an interrupted append
+            f.seek(archive_size)
+            f.truncate()
+            FileHandler._write_qm_data_archive_records(f, index, qm_data_dicts)
+
+    @staticmethod
+    def read_qm_data_archive_index(file_path: str) -> dict:
+
+        """Reads the index of an archive.
+
+        Args:
+            file_path (string): The path to the archive.
+
+        Raises:
+            FileNotFoundError: If file not found.
+            IsADirectoryError: If path points to a directory.
+            ValueError: If the file is not a QM data archive.
+
+        Returns:
+            dict: Dict of molecule ids and (offset, length) pairs of the records in stored order.
+        """
+
+        return FileHandler._read_qm_data_archive_trailer(file_path)[0]
+
+    @staticmethod
+    def read_qm_data_from_archive(file_path: str, ids: list[str] = None, fields: list[str] = None,
+                                  nbo_types: list[NboType] = None, use_nbo_table: bool = False,
+                                  lazy: bool = False) -> Iterator[QmData]:
+
+        """Reads QM data from an archive one molecule at a time. Either scans all molecules in stored
+           order or looks up the specified ids in the given order.
+
+        Args:
+            file_path (string): The path to the archive.
+            ids (list[string]): The ids of the molecules to read. Defaults to all molecules.
+            fields (list[string]): The QM data fields to load (see QmData.from_dict()).
+            nbo_types (list[NboType]): The NBO types to load (see QmData.from_dict()).
+            use_nbo_table (bool): Whether to store the NBO and SOPA data in columnar form.
+            lazy (bool): Whether to defer the setup of heavy fields to first access.
+
+        Raises:
+            KeyError: If a requested id is not in the archive.
+
+        Yields:
+            QmData: The QM data objects.
+        """
+
+        index = FileHandler.read_qm_data_archive_index(file_path)
+
+        if ids is None:
+            ids = list(index.keys())
+
+        for id in ids:
+            if id not in index.keys():
+                raise KeyError('Molecule ' + str(id) + ' not found in archive.')
+
+        with open(file_path, 'rb') as f:
+            for id in ids:
+
+                offset, length = index[id]
+                f.seek(offset)
+                data = FileHandler._json_loads(f.read(length))
+
+                if fields is not None:
+                    data = {key: data[key] for key in fields if key in data.keys()}
+
+                yield QmData.from_dict(data, use_nbo_table=use_nbo_table, lazy=lazy, fields=fields, nbo_types=nbo_types)
+
+    @staticmethod
+    def _write_qm_data_archive_records(f, index: dict, qm_data_dicts: list[dict]):
+
+        """Helper function to write archive records from the current file position followed by the index."""
+
+        for qm_data_dict in qm_data_dicts:
+
+            record = FileHandler._json_dumps(qm_data_dict)
+
+            # replaced entries move to the end of the index
+            index.pop(qm_data_dict['id'], None)
+            index[qm_data_dict['id']] = [f.tell(), len(record)]
+            f.write(record)
+
+        index_offset = f.tell()
+        f.write(FileHandler._json_dumps(index))
+
+        # the trailer is written last so that an interrupted write leaves the previous trailer as the last valid one
+        f.flush()
+        os.fsync(f.fileno())
+        f.write(index_offset.to_bytes(8, 'little'))
+        f.write(QM_DATA_ARCHIVE_MAGIC)
+
+    @staticmethod
+    def _read_qm_data_archive_trailer(file_path: str) -> tuple[dict, int]:
+
+        """Helper function to read the index of the last valid trailer of an archive. Incomplete data behind it
+           (e.g. from an interrupted append) is ignored.
+
+        Returns:
+            tuple[dict, int]: The index and the end of the last valid trailer.
+        """
+
+        try:
+            f = open(file_path, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError('The specified file does not exist.')
+        except IsADirectoryError:
+            raise IsADirectoryError('Cannot open directory.')
+
+        with f:
+
+            file_size = os.fstat(f.fileno()).st_size
+            magic_size = len(QM_DATA_ARCHIVE_MAGIC)
+
+            if file_size < 2 * magic_size + 8 or f.read(magic_size) != QM_DATA_ARCHIVE_MAGIC:
+                raise ValueError('The specified file is not a QM data archive.')
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+
+                # search backwards for the last trailer that points to a readable index
+                search_end = file_size
+                while True:
+
+                    magic_offset = buffer.rfind(QM_DATA_ARCHIVE_MAGIC, magic_size + 8, search_end)
+                    if magic_offset < 0:
+                        raise ValueError('The specified file is not a QM data archive.')
+
+                    index_offset = int.from_bytes(buffer[magic_offset - 8:magic_offset], 'little')
+                    if magic_size <= index_offset <= magic_offset - 8:
+                        try:
+                            index = FileHandler._json_loads(buffer[index_offset:magic_offset - 8])
+                        except ValueError:
+                            index = None
+                        if isinstance(index, dict):
+                            return {key: tuple(value) for key, value in index.items()}, magic_offset + magic_size
+
+                    search_end = magic_offset + magic_size - 1
+
+    @staticmethod
+    def _open_file(file_path: str, mode: str):
+
+        """Helper function to open a file that transparently (de)compresses gzip, bz2, lzma and zstd files.
+           Compression is detected from the magic bytes when reading and from the file extension when writing.
+
+        Args:
+            file_path (string): The path to the file.
+            mode (string): The file mode ('r', 'rb', 'w' or 'wb').
+
+        Raises:
+            FileNotFoundError: If file not found.
+            IsADirectoryError: If path points to a directory.
+            ValueError: If zstd is required but not installed.
+
+        Returns:
+            The file object.
+        """
+
+        if mode.startswith('r'):
+
+            try:
+                f = open(file_path, 'rb')
+            except FileNotFoundError:
+                raise FileNotFoundError('The specified file does not exist.')
+            except IsADirectoryError:
+                raise IsADirectoryError('Cannot open directory.')
+
+            with f:
+                header = f.read(max([len(x) for x in COMPRESSION_MAGIC_BYTES.keys()]))
+
+            compression = None
+            for magic_bytes in COMPRESSION_MAGIC_BYTES.keys():
+                if header.startswith(magic_bytes):
+                    compression = COMPRESSION_MAGIC_BYTES[magic_bytes]
+
+        else:
+            compression = COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1])
+
+        # text mode has to be explicit for compressed files
+        if compression is not None and not mode.endswith('b'):
+            mode += 't'
+
+        if compression == 'gzip':
+            return gzip.open(file_path, mode)
+        elif compression == 'bz2':
+            return bz2.open(file_path, mode)
+        elif compression == 'lzma':
+            return lzma.open(file_path, mode)
+        elif compression == 'zstd':
+            if zstandard is None:
+                raise ValueError('Reading and writing zstd compressed files requires the zstandard package.')
+            return zstandard.open(file_path, mode)
+
+        return open(file_path, mode)
+
+    @staticmethod
+    def _json_loads(data):
+
+        """Helper function to parse JSON text (str or bytes) with the selected JSON backend.
+
+        Returns:
+            The parsed data.
+        """
+
+        if FileHandler.json_backend == 'orjson':
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def _json_dumps(data, sort_keys: bool = False) -> bytes:
+
+        """Helper function to serialise data as compact UTF-8 encoded JSON with the selected JSON backend.
+
+        Returns:
+            bytes: The JSON text.
+        """
+
+        if FileHandler.json_backend == 'orjson':
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+        return json.dumps(data, sort_keys=sort_keys, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def _align(offset: int) -> int:
+
+        """Helper function to round an offset up to the container alignment.
+
+        Returns:
+            int: The aligned offset.
+        """
+
+        return -(-offset // QM_DATA_CONTAINER_ALIGNMENT) * QM_DATA_CONTAINER_ALIGNMENT
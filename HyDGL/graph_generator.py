@@ -1,5 +1,12 @@
 import warnings
+import functools
+import threading
+import contextlib
+import multiprocessing
 from statistics import mean
+from typing import Iterable, Iterator, Union
+
+import numpy as np
 
 from .enums.nbo_type import NboType
 from .enums.edge_type import EdgeType
@@ -10,6 +17,7 @@ from .node import Node
 from .edge import Edge
 from .graph import Graph
 from .qm_data import QmData
+from .file_handler import FileHandler
 from .enums.qm_target import QmTarget
 from .enums.edge_feature import EdgeFeature
 from .enums.node_feature import NodeFeature
@@ -18,6 +26,7 @@ from .enums.graph_feature import GraphFeature
 from .enums.bond_order_type import BondOrderType
 from .element_look_up_table import ElementLookUpTable
 from .enums.sopa_resolution_mode import SopaResolutionMode
+from .enums.sopa_prefilter_mode import SopaPrefilterMode
 from .graph_generator_settings import GraphGeneratorSettings
 
 
@@ -25,6 +34,16 @@ class GraphGenerator:
 
     """Class to generate appropriate graphs based on supplied QM data."""
 
+    # graph generator of a worker process (set up once per worker in generate_graphs)
+    _worker_graph_generator = None
+
+    # codes of the nbo_type edge feature in edge feature matrices
+    edge_nbo_type_codes = {
+        'None': 0,
+        'BD': 1,
+        '3C': 2
+    }
+
     def __init__(self, settings: GraphGeneratorSettings):
         """Constructor
 
@@ -34,6 +53,23 @@ class GraphGenerator:
 
         self._settings = settings
 
+        # compile the feature settings into ordered extractor plans and the resulting feature names
+        self._node_feature_plan, self.node_feature_schema, self._node_feature_matrix_plan = self._compile_node_feature_plan()
+        self._edge_feature_plan, self.edge_feature_schema, self._edge_feature_matrix_plan = self._compile_edge_feature_plan()
+        self._sopa_edge_feature_plan, self.sopa_edge_feature_schema = self._compile_sopa_edge_feature_plan()
+
+        # intermediates shared while featurising one molecule, kept per thread (see _generation_context)
+        self._local = threading.local()
+
+    def __getstate__(self):
+        """Excludes the thread-local generation contexts from the pickled state."""
+        return {key: value for key, value in self.__dict__.items() if key != '_local'}
+
+    def __setstate__(self, state: dict):
+        """Restores the pickled state with fresh thread-local generation contexts."""
+        self.__dict__.update(state)
+        self._local = threading.local()
+
     def generate_graph(self, qm_data: QmData) -> Graph:
 
         """Generates a graph according to the specified settings.
@@ -42,10 +78,172 @@ class GraphGenerator:
             Graph: The graph representation of the graph.
         """
 
-        # get edges
-        nodes = self._get_nodes(qm_data)
+        with self._generation_context(qm_data):
+            # get edges
+            nodes = self._get_nodes(qm_data)
+
+            # get edges
+            edges = self._get_all_edges(qm_data)
+
+            # add final node degree as node feature
+            if NodeFeature.NODE_DEGREE in self._settings.node_features:
+
+                node_degrees = self._get_node_degrees(edges, len(nodes))
+
+                for i, node in enumerate(nodes):
+                    node.features['node_degree'] = node_degrees[i]
+
+            # check validity of nodes
+            self._validate_node_list(nodes)
+            # check validity of edges
+            self._validate_edge_list(edges, len(nodes))
+
+            # get graph features
+            graph_features = self._get_graph_features(qm_data)
+
+            # get targets
+            targets = self._get_targets(qm_data)
+
+            # get meta_data
+            meta_data = self._get_meta_data(qm_data)
+
+            return Graph(nodes,
+                         edges,
+                         targets=targets,
+                         graph_features=graph_features,
+                         meta_data=meta_data)
+
+    def get_node_feature_matrix(self, qm_data: QmData) -> tuple[np.ndarray, list[str]]:
+
+        """Gets the node features of all nodes as one matrix instead of per-node dicts. Features that are
+           available for all atoms at once are computed with array operations.
+
+        Returns:
+            tuple[np.ndarray, list[str]]: The N x F node feature matrix and the feature names of its columns.
+        """
+
+        with self._generation_context(qm_data):
+            node_indices = np.array(self._get_nodes_to_extract_indices(qm_data), dtype=int)
+
+            node_feature_matrix = np.empty((len(node_indices), len(self.node_feature_schema)), dtype=np.float64)
+
+            column = 0
+            for n_columns, vector_extractor, extractor in self._node_feature_matrix_plan:
+
+                if vector_extractor is not None:
+                    node_feature_matrix[:, column] = vector_extractor(qm_data, node_indices)
+                # fall back to per-node extraction
+                else:
+                    for i, node_index in enumerate(node_indices.tolist()):
+                        node_features = {}
+                        extractor(qm_data, node_index, node_features)
+                        node_feature_matrix[i, column:column + n_columns] = list(node_features.values())
+
+                column += n_columns
+
+            # node degree is the last column
+            if NodeFeature.NODE_DEGREE in self._settings.node_features:
+                node_feature_matrix[:, column] = self._get_node_degrees(self._get_all_edges(qm_data), len(node_indices))
+
+            return node_feature_matrix, list(self.node_feature_schema)
+
+    def get_edge_feature_matrix(self, qm_data: QmData) -> tuple[np.ndarray, list[str]]:
+
+        """Gets the edge features of all bond edges (bond order and NBO bonding orbital edges) as one matrix
+           instead of per-edge dicts. Rows are in the order of the bond edges of the generated graph and the
+           nbo_type feature is encoded with edge_nbo_type_codes. Features that are available for all edges at
+           once are gathered with array operations, the bond and antibond orbital statistics are extracted per
+           edge. Without bond edge types the matrix has no rows.
+
+        Returns:
+            tuple[np.ndarray, list[str]]: The E x F edge feature matrix and the feature names of its columns.
+        """
+
+        with self._generation_context(qm_data):
+            adjacency_list = []
+            if EdgeType.BOND_ORDER_METAL in self._settings.edge_types or \
+               EdgeType.BOND_ORDER_NON_METAL in self._settings.edge_types or \
+               EdgeType.NBO_BONDING_ORBITALS in self._settings.edge_types:
+                adjacency_list = self._get_adjacency_list(qm_data)
+
+            edge_indices = np.array(adjacency_list, dtype=int).reshape(-1, 2)
+            bond_nbo_data = [self._get_bond_nbo_data(bond_atom_indices, qm_data) for bond_atom_indices in edge_indices.tolist()]
+            bond_nbo_types = [x[0] for x in bond_nbo_data]
+
+            edge_feature_matrix = np.empty((len(edge_indices), len(self.edge_feature_schema)), dtype=np.float64)
+
+            column = 0
+            for n_columns, vector_extractor, extractor in self._edge_feature_matrix_plan:
+
+                if vector_extractor is not None:
+                    edge_feature_matrix[:, column] = vector_extractor(qm_data, edge_indices, bond_nbo_types)
+                # fall back to per-edge extraction
+                else:
+                    for i, bond_atom_indices in enumerate(edge_indices.tolist()):
+                        edge_features = {}
+                        extractor(qm_data, bond_atom_indices, bond_nbo_data[i][0], bond_nbo_data[i][1], edge_features)
+                        edge_feature_matrix[i, column:column + n_columns] = list(edge_features.values())
+
+                column += n_columns
+
+            return edge_feature_matrix, list(self.edge_feature_schema)
+
+    @property
+    def _context(self) -> dict:
+        """Getter for the generation context of the current thread (None outside of generation calls)."""
+        return getattr(self._local, 'context', None)
+
+    @_context.setter
+    def _context(self, context: dict):
+        """Setter for the generation context of the current thread."""
+        self._local.context = context
+
+    @contextlib.contextmanager
+    def _generation_context(self, qm_data: QmData):
+
+        """Sets up the context that memoizes intermediates shared by node, edge and SOPA featurisation of one
+           molecule. The context is discarded when the outermost generation call returns so that nothing is
+           shared between molecules. Each thread has its own context, so one generator can be used from several
+           threads.
+        """
+
+        # nested calls for the same molecule use the existing context
+        if self._context is not None and self._context['qm_data'] is qm_data:
+            yield
+            return
+
+        outer_context = self._context
+        self._context = {'qm_data': qm_data}
+        try:
+            yield
+        finally:
+            self._context = outer_context
+
+    def _get_memoized(self, key: tuple, function, *args):
+
+        """Gets a value from the generation context and computes it with function(*args) if it is not present.
+           Without a generation context the value is always computed.
+
+        Returns:
+            any: The (memoized) value.
+        """
+
+        if self._context is None:
+            return function(*args)
+
+        if key not in self._context:
+            self._context[key] = function(*args)
+
+        return self._context[key]
+
+    def _get_all_edges(self, qm_data: QmData) -> list[Edge]:
+
+        """Gets all edges of the requested edge types with node references matching the extracted nodes.
+
+        Returns:
+            list[Edge]: List of edges.
+        """
 
-        # get edges
         edges = []
         if EdgeType.BOND_ORDER_METAL in self._settings.edge_types or \
            EdgeType.BOND_ORDER_NON_METAL in self._settings.edge_types or \
@@ -58,37 +256,93 @@ class GraphGenerator:
         if self._settings.hydrogen_mode == HydrogenMode.OMIT:
             edges = self._adjust_node_references(edges, qm_data)
 
-        # add final node degree as node feature
-        if NodeFeature.NODE_DEGREE in self._settings.node_features:
+        return edges
+
+    def _get_node_degrees(self, edges: list[Edge], n_nodes: int) -> list[int]:
 
-            node_degrees = [0 for _ in nodes]
+        """Gets the degree of each node.
 
-            for edge in edges:
-                for node_index in edge.node_indices:
-                    node_degrees[node_index] += 1
+        Returns:
+            list[int]: The node degrees.
+        """
 
-            for i, node in enumerate(nodes):
-                node.features['node_degree'] = node_degrees[i]
+        node_degrees = [0 for _ in range(n_nodes)]
 
-        # check validity of nodes
-        self._validate_node_list(nodes)
-        # check validity of edges
-        self._validate_edge_list(edges, len(nodes))
+        for edge in edges:
+            for node_index in edge.node_indices:
+                node_degrees[node_index] += 1
 
-        # get graph features
-        graph_features = self._get_graph_features(qm_data)
+        return node_degrees
 
-        # get targets
-        targets = self._get_targets(qm_data)
+    def generate_graphs(self, items: Iterable[Union[QmData, str]], n_processes: int = None, chunk_size: int = 1,
+                        ordered: bool = True) -> Iterator[tuple[str, Graph, Exception]]:
 
-        # get meta_data
-        meta_data = self._get_meta_data(qm_data)
+        """Generates graphs for multiple molecules in a process pool. The settings are sent to each worker once and
+           results are yielded as they become available. Errors are captured per item.
 
-        return Graph(nodes,
-                     edges,
-                     targets=targets,
-                     graph_features=graph_features,
-                     meta_data=meta_data)
+        Args:
+            items (Iterable[Union[QmData, str]]): The QM data objects or paths to QM data JSON files. Files are read
+                with only the QM data fields required by the settings.
+            n_processes (int): The number of worker processes. Defaults to the number of CPUs. 1 runs in-process.
+            chunk_size (int): The number of items sent to a worker at once.
+            ordered (bool): Whether to yield results in the order of the items or as they finish.
+
+        Yields:
+            tuple[string, Graph, Exception]: The item identifier (QM data id or file path) and either the graph or
+                the error raised while generating it.
+        """
+
+        if n_processes == 1:
+            for item in items:
+                yield self._try_generate_graph(item)
+            return
+
+        with multiprocessing.Pool(n_processes, initializer=GraphGenerator._initialise_worker, initargs=(self._settings,)) as pool:
+            if ordered:
+                results = pool.imap(GraphGenerator._try_generate_graph_in_worker, items, chunksize=chunk_size)
+            else:
+                results = pool.imap_unordered(GraphGenerator._try_generate_graph_in_worker, items, chunksize=chunk_size)
+            for result in results:
+                yield result
+
+    @staticmethod
+    def _initialise_worker(settings: GraphGeneratorSettings):
+
+        """Helper function to set up the graph generator of a worker process."""
+
+        GraphGenerator._worker_graph_generator = GraphGenerator(settings)
+
+    @staticmethod
+    def _try_generate_graph_in_worker(item: Union[QmData, str]) -> tuple[str, Graph, Exception]:
+
+        """Helper function to generate a graph with the graph generator of a worker process.
+
+        Returns:
+            tuple[string, Graph, Exception]: The item identifier and either the graph or the error.
+        """
+
+        return GraphGenerator._worker_graph_generator._try_generate_graph(item)
+
+    def _try_generate_graph(self, item: Union[QmData, str]) -> tuple[str, Graph, Exception]:
+
+        """Helper function to generate a graph from QM data or a QM data file that returns errors instead of raising them.
+
+        Returns:
+            tuple[string, Graph, Exception]: The item identifier and either the graph or the error.
+        """
+
+        # fall back to the representation for invalid items
+        identifier = repr(item)
+
+        try:
+            identifier = item if isinstance(item, str) else item.id
+            if isinstance(item, str):
+                fields = self._settings.get_required_qm_data_fields()
+                item = QmData.from_dict(FileHandler.read_dict_from_json_file(item, keys=fields),
+                                        fields=fields, nbo_types=self._settings.get_required_nbo_types())
+            return identifier, self.generate_graph(item), None
+        except Exception as e:
+            return identifier, None, e
 
     # deprecated
     def _get_node_labels(self, qm_data: QmData) -> list[str]:
@@ -203,10 +457,7 @@ class GraphGenerator:
             list[list[int]]: The bond order adjacency list.
         """
 
-        metal_adjacency_list = self._get_bond_order_metal_adjacency_list(qm_data)
-        non_metal_adjacency_list = self._get_bond_order_non_metal_adjacency_list(qm_data)
-
-        return metal_adjacency_list + non_metal_adjacency_list
+        return self._get_bond_order_edge_indices(qm_data, include_metal=True, include_non_metal=True).tolist()
 
     def _get_bond_order_non_metal_adjacency_list(self, qm_data: QmData) -> list[list[int]]:
 
@@ -216,42 +467,7 @@ class GraphGenerator:
             list[list[int]]: The bond order adjacency list for all non-metal atoms.
         """
 
-        threshold = self._settings.bond_threshold
-
-        adjacency_list = []
-
-        # get appropriate index matrix
-        index_matrix = self._get_index_matrix(qm_data, self._settings.bond_order_mode)
-
-        # iterate over half triangle matrix to determine bonds
-        for i in range(len(index_matrix) - 1):
-
-            # skip if metal atom
-            if qm_data.atomic_numbers[i] in ElementLookUpTable.transition_metal_atomic_numbers:
-                continue
-
-            for j in range(i + 1, len(index_matrix), 1):
-
-                # skip if metal atom
-                if qm_data.atomic_numbers[j] in ElementLookUpTable.transition_metal_atomic_numbers:
-                    continue
-
-                # skip if bond length larger than max allowed
-                if qm_data.bond_distance_matrix[i][j] > self._settings.max_bond_distance:
-                    continue
-
-                # if larger than threshold --> add bond
-                if (index_matrix[i][j]) > threshold:
-
-                    # ignore hydrogens in omit and implicit mode
-                    if self._settings.hydrogen_mode == HydrogenMode.OMIT:
-                        if qm_data.atomic_numbers[i] == 1 or qm_data.atomic_numbers[j] == 1:
-                            continue
-
-                    # append atom pair
-                    adjacency_list.append([i, j])
-
-        return adjacency_list
+        return self._get_bond_order_edge_indices(qm_data, include_metal=False, include_non_metal=True).tolist()
 
     def _get_bond_order_metal_adjacency_list(self, qm_data: QmData) -> list[list[int]]:
 
@@ -261,39 +477,51 @@ class GraphGenerator:
             list[list[int]]: The bond order adjacency list for all metal atoms.
         """
 
-        threshold = self._settings.bond_threshold_metal
+        return self._get_bond_order_edge_indices(qm_data, include_metal=True, include_non_metal=False).tolist()
 
-        adjacency_list = []
+    def _get_bond_order_edge_indices(self, qm_data: QmData, include_metal: bool, include_non_metal: bool) -> np.ndarray:
 
-        # get appropriate index matrix
-        index_matrix = self._get_index_matrix(qm_data, self._settings.bond_order_mode)
+        """Gets the atom pairs with bond orders of the specified type above the threshold in one pass over the
+           upper triangle of the index matrix. Pairs with at least one transition metal atom use the metal bond
+           threshold and all other pairs the non-metal bond threshold.
 
-        # iterate over half triangle matrix to determine bonds
-        for i in range(len(index_matrix) - 1):
-
-            for j in range(i + 1, len(index_matrix), 1):
-
-                # skip if metal atom
-                if qm_data.atomic_numbers[i] not in ElementLookUpTable.transition_metal_atomic_numbers and \
-                   qm_data.atomic_numbers[j] not in ElementLookUpTable.transition_metal_atomic_numbers:
-                    continue
+        Returns:
+            np.ndarray: E x 2 array of atom index pairs (i < j) sorted in ascending order.
+        """
 
-                # skip if bond length larger than max allowed
-                if qm_data.bond_distance_matrix[i][j] > self._settings.max_bond_distance:
-                    continue
+        # get appropriate index matrix
+        index_matrix = np.asarray(self._get_index_matrix(qm_data, self._settings.bond_order_mode), dtype=np.float64)
+
+        # upper triangle pairs in row-major (sorted) order
+        rows, columns = np.triu_indices(len(index_matrix), k=1)
+
+        atomic_numbers = np.asarray(qm_data.atomic_numbers)
+        is_metal = np.isin(atomic_numbers, ElementLookUpTable.transition_metal_atomic_numbers)
+        is_metal_pair = is_metal[rows] | is_metal[columns]
+
+        # select the requested pair classes
+        if include_metal and include_non_metal:
+            mask = np.ones(len(rows), dtype=bool)
+        elif include_metal:
+            mask = is_metal_pair.copy()
+        elif include_non_metal:
+            mask = ~is_metal_pair
+        else:
+            mask = np.zeros(len(rows), dtype=bool)
 
-                # if larger than threshold --> add bond
-                if (index_matrix[i][j]) > threshold:
+        # skip if bond length larger than max allowed
+        mask &= qm_data.bond_distance_array[rows, columns] <= self._settings.max_bond_distance
 
-                    # ignore hydrogens in omit and implicit mode
-                    if self._settings.hydrogen_mode == HydrogenMode.OMIT:
-                        if qm_data.atomic_numbers[i] == 1 or qm_data.atomic_numbers[j] == 1:
-                            continue
+        # if larger than threshold --> add bond
+        thresholds = np.where(is_metal_pair, self._settings.bond_threshold_metal, self._settings.bond_threshold)
+        mask &= index_matrix[rows, columns] > thresholds
 
-                    # append atom pair
-                    adjacency_list.append([i, j])
+        # ignore hydrogens in omit and implicit mode
+        if self._settings.hydrogen_mode == HydrogenMode.OMIT:
+            is_hydrogen = atomic_numbers == 1
+            mask &= ~(is_hydrogen[rows] | is_hydrogen[columns])
 
-        return adjacency_list
+        return np.stack([rows[mask], columns[mask]], axis=1)
 
     def _get_adjacency_list(self, qm_data: QmData) -> list[list[int]]:
 
@@ -308,11 +536,12 @@ class GraphGenerator:
         if EdgeType.NBO_BONDING_ORBITALS in self._settings.edge_types:
             adjacency_list.extend(self._get_nbo_bonding_orbital_adjacency_list(qm_data))
 
-        if EdgeType.BOND_ORDER_METAL in self._settings.edge_types:
-            adjacency_list.extend(self._get_bond_order_metal_adjacency_list(qm_data))
-
-        if EdgeType.BOND_ORDER_NON_METAL in self._settings.edge_types:
-            adjacency_list.extend(self._get_bond_order_non_metal_adjacency_list(qm_data))
+        # metal and non-metal bond order edges are determined in a single pass
+        if EdgeType.BOND_ORDER_METAL in self._settings.edge_types or \
+           EdgeType.BOND_ORDER_NON_METAL in self._settings.edge_types:
+            adjacency_list.extend(self._get_bond_order_edge_indices(qm_data,
+                                                                    include_metal=EdgeType.BOND_ORDER_METAL in self._settings.edge_types,
+                                                                    include_non_metal=EdgeType.BOND_ORDER_NON_METAL in self._settings.edge_types).tolist())
 
         # get hydride bonds and append if not already in list
         hydride_bonds = self._get_hydride_bond_indices(qm_data)
@@ -326,154 +555,555 @@ class GraphGenerator:
 
     def _get_edge_features(self, bond_atom_indices: list[int], qm_data: QmData) -> list[float]:
 
-        """Gets the edge features for given atom indices according to specification.
+        """Gets the edge features for given atom indices according to specification. The features of each atom pair
+           are computed once per molecule and shared between bond and SOPA edges.
 
         Returns:
             list[float]: A list of edge features.
         """
 
-        # pre read data for efficiency
+        # the key keeps the atom order because bond NBOs are looked up by ordered atom indices
+        # return a copy so that the cached features are not modified through the edges
+        return dict(self._get_memoized(('edge_features', tuple(bond_atom_indices)), self._compute_edge_features, bond_atom_indices, qm_data))
+
+    def _compute_edge_features(self, bond_atom_indices: list[int], qm_data: QmData) -> dict:
 
-        # bonds from BD
-        bond_pair_atom_indices = [x.atom_indices for x in qm_data.bond_pair_data]
-        # bonds from 3c
-        # bond_3c_atom_indices = [x.atom_indices for x in qm_data.bond_3c_data]
-        # gets the A-B and B-C bond pairs from 3c data
-        bond_3c_atom_indices = [x.atom_indices[0:2] for x in qm_data.bond_3c_data] + [x.atom_indices[1:3] for x in qm_data.bond_3c_data]
+        """Computes the edge features for given atom indices (see _get_edge_features).
+
+        Returns:
+            dict: The edge features.
+        """
+
+        # pre read data for efficiency
+        bond_nbo_type, bond_nbo_data = self._get_bond_nbo_data(bond_atom_indices, qm_data)
 
         # setup edge_features
         edge_features = {}
 
-        # append requested bond orders
-        if EdgeFeature.WIBERG_BOND_ORDER in self._settings.edge_features:
-            edge_features['wiberg_bond_order'] = qm_data.wiberg_bond_order_matrix[bond_atom_indices[0]][bond_atom_indices[1]]
-        if EdgeFeature.LMO_BOND_ORDER in self._settings.edge_features:
-            edge_features['lmo_bond_order'] = qm_data.lmo_bond_order_matrix[bond_atom_indices[0]][bond_atom_indices[1]]
-        if EdgeFeature.NLMO_BOND_ORDER in self._settings.edge_features:
-            edge_features['nlmo_bond_order'] = qm_data.nlmo_bond_order_matrix[bond_atom_indices[0]][bond_atom_indices[1]]
+        # run requested extractors
+        for extractor in self._edge_feature_plan:
+            extractor(qm_data, bond_atom_indices, bond_nbo_type, bond_nbo_data, edge_features)
 
-        # append requested integer bond orders
-        if EdgeFeature.WIBERG_BOND_ORDER_INT in self._settings.edge_features:
+        return edge_features
 
-            wiberg_index = qm_data.wiberg_bond_order_matrix[bond_atom_indices[0]][bond_atom_indices[1]]
-            bond_order_int = 0
+    def _get_bond_nbo_data(self, bond_atom_indices: list[int], qm_data: QmData) -> tuple[NboType, list[NboDataPoint]]:
 
-            if wiberg_index < 1.43:
-                bond_order_int = 1
-            elif wiberg_index >= 1.43 and wiberg_index < 2.0:
-                bond_order_int = 2
-            elif wiberg_index >= 2.0:
-                bond_order_int = 3
+        """Gets the NBOs that contain the bond (two-atom bonds and A-B or B-C pairs of 3c bonds), 3c bonds take precedence.
 
-            edge_features['wiberg_bond_order_int'] = bond_order_int
+        Returns:
+            tuple[NboType, list[NboDataPoint]]: The NBO type (None if there are no bond NBOs) and the bond NBOs.
+        """
 
-        # add bond distance as feature to edges
-        if EdgeFeature.BOND_DISTANCE in self._settings.edge_features:
-            edge_features['bond_distance'] = qm_data.bond_distance_matrix[bond_atom_indices[0]][bond_atom_indices[1]]
+        bond_nbo_type = NboType.THREE_CENTER_BOND
+        bond_nbo_data = qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.THREE_CENTER_BOND)
+        if len(bond_nbo_data) == 0:
+            bond_nbo_type = NboType.BOND
+            bond_nbo_data = qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.BOND)
+        if len(bond_nbo_data) == 0:
+            bond_nbo_type = None
 
-        if EdgeFeature.NBO_TYPE in self._settings.edge_features:
+        return bond_nbo_type, bond_nbo_data
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                edge_features['nbo_type'] = '3C'
-            elif bond_atom_indices in bond_pair_atom_indices:
-                edge_features['nbo_type'] = 'BD'
-            else:
-                edge_features['nbo_type'] = 'None'
+    def _compile_node_feature_plan(self) -> tuple[list, list[str], list]:
 
-        # add number of bond/antibond orbitals if requested
-        if EdgeFeature.BOND_ORBITAL_MAX in self._settings.edge_features or \
-                EdgeFeature.BOND_ORBITAL_AVERAGE in self._settings.edge_features or \
-                EdgeFeature.BOND_ENERGY_MIN_MAX_DIFFERENCE in self._settings.edge_features:
+        """Compiles the node feature settings into an ordered list of extractors. Each extractor is called as
+           extractor(qm_data, atom_index, node_features) and adds its features to the node feature dict.
+           Extractors of single features that can be computed for all atoms at once also get a vector
+           extractor called as vector_extractor(qm_data, atom_indices) that returns the feature column.
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                edge_features['n_bn'] = len([x.energy for x in qm_data.bond_3c_data if x.contains_atom_indices(bond_atom_indices)])
-            elif bond_atom_indices in bond_pair_atom_indices:
-                edge_features['n_bn'] = len([x.energy for x in qm_data.bond_pair_data if x.atom_indices == bond_atom_indices])
-            else:
-                edge_features['n_bn'] = 0
-
-        # add number of bond/antibond orbitals if requested
-        if EdgeFeature.ANTIBOND_ORBITAL_MIN in self._settings.edge_features or \
-                EdgeFeature.ANTIBOND_ORBITAL_AVERAGE in self._settings.edge_features or \
-                EdgeFeature.ANTIBOND_ENERGY_MIN_MAX_DIFFERENCE in self._settings.edge_features:
-
-            if bond_atom_indices in bond_3c_atom_indices:
-                edge_features['n_nbn'] = len([x.energy for x in qm_data.antibond_3c_data if x.contains_atom_indices(bond_atom_indices)]) + \
-                                        len([x.energy for x in qm_data.nonbond_3c_data if x.contains_atom_indices(bond_atom_indices)])
-            elif bond_atom_indices in bond_pair_atom_indices:
-                edge_features['n_nbn'] = len([x.energy for x in qm_data.antibond_pair_data if x.atom_indices == bond_atom_indices])
-            else:
-                edge_features['n_nbn'] = 0
+        Returns:
+            tuple[list, list[str], list]: The extractors, the names of the resulting features in order and
+                (number of features, vector extractor or None, extractor) of each extractor.
+        """
 
-        if EdgeFeature.BOND_ENERGY_MIN_MAX_DIFFERENCE in self._settings.edge_features:
+        node_features = self._settings.node_features
+        plan = []
+        schema = []
+        matrix_plan = []
+
+        def add(names: list[str], extractor, *args, vector_extractor=None):
+            plan.append(functools.partial(extractor, *args))
+            schema.extend(names)
+            if vector_extractor is not None:
+                vector_extractor = functools.partial(vector_extractor, *args)
+            matrix_plan.append((len(names), vector_extractor, plan[-1]))
+
+        # basic features
+        if NodeFeature.ATOMIC_NUMBER in node_features:
+            add(['atomic_number'], self._extract_atom_value, 'atomic_numbers', 'atomic_number', vector_extractor=self._extract_atom_value_vector)
+        if NodeFeature.COVALENT_RADIUS in node_features:
+            add(['covalent_radius'], self._extract_element_property, 'covalent_radius', vector_extractor=self._extract_element_property_vector)
+        if NodeFeature.ELECTRONEGATIVITY in node_features:
+            add(['electronegativity'], self._extract_element_property, 'electronegativity', vector_extractor=self._extract_element_property_vector)
+
+        # natural atomic charge
+        if NodeFeature.NATURAL_ATOMIC_CHARGE in node_features:
+            add(['natural_atomic_charge'], self._extract_atom_value, 'natural_atomic_charges', 'natural_atomic_charge',
+                vector_extractor=self._extract_atom_value_vector)
+
+        # natural electron populations
+        for k, (node_feature, name) in enumerate([(NodeFeature.NATURAL_ELECTRON_POPULATION_CORE, 'natural_electron_population_core'),
+                                                  (NodeFeature.NATURAL_ELECTRON_POPULATION_VALENCE, 'natural_electron_population_valence'),
+                                                  (NodeFeature.NATURAL_ELECTRON_POPULATION_RYDBERG, 'natural_electron_population_rydberg')]):
+            if node_feature in node_features:
+                add([name], self._extract_atom_component, 'natural_electron_population', k, name,
+                    vector_extractor=self._extract_atom_component_vector)
+        if NodeFeature.NATURAL_ELECTRON_POPULATION_TOTAL in node_features:
+            add(['natural_electron_population_total'], self._extract_natural_electron_population_total,
+                vector_extractor=self._extract_natural_electron_population_total_vector)
+
+        # natural electron configuration (requested orbital occupancies)
+        for k in self._settings.natural_orbital_configuration_indices:
+            name = 'natural_electron_configuration_' + ['s', 'p','d', 'f'][k] + '_occupation'
+            add([name], self._extract_atom_component, 'natural_electron_configuration', k, name,
+                vector_extractor=self._extract_atom_component_vector)
+
+        # bond order totals
+        for node_feature, name in [(NodeFeature.WIBERG_BOND_ORDER_TOTAL, 'wiberg_bond_order_total'),
+                                   (NodeFeature.LMO_BOND_ORDER_TOTAL, 'lmo_bond_order_total'),
+                                   (NodeFeature.NLMO_BOND_ORDER_TOTAL, 'nlmo_bond_order_total')]:
+            if node_feature in node_features:
+                add([name], self._extract_atom_value, name + 's', name, vector_extractor=self._extract_atom_value_vector)
+
+        # lone pairs and lone vacancies
+        for nbo_type, count_name, difference_feature, extremum_feature, extremum_name, average_feature in [
+                (NboType.LONE_PAIR, 'n_lone_pairs', NodeFeature.LONE_PAIR_ENERGY_MIN_MAX_DIFFERENCE,
+                 NodeFeature.LONE_PAIR_MAX, 'max', NodeFeature.LONE_PAIR_AVERAGE),
+                (NboType.LONE_VACANCY, 'n_lone_vacancies', NodeFeature.LONE_VACANCY_ENERGY_MIN_MAX_DIFFERENCE,
+                 NodeFeature.LONE_VACANCY_MIN, 'min', NodeFeature.LONE_VACANCY_AVERAGE)]:
+
+            base_name = str(nbo_type).split('.')[1].lower()
+
+            if difference_feature in node_features or extremum_feature in node_features or average_feature in node_features:
+                add([count_name], self._extract_atom_nbo_count, nbo_type, count_name, vector_extractor=self._extract_atom_nbo_count_vector)
+            if difference_feature in node_features:
+                name = base_name + '_energy_min_max_difference'
+                add([name], self._extract_atom_nbo_energy_min_max_difference, nbo_type, name)
+            if extremum_feature in node_features:
+                add(self._get_nbo_feature_names(nbo_type, extremum_name), self._extract_atom_nbo_statistics_features, nbo_type, extremum_name)
+            if average_feature in node_features:
+                add(self._get_nbo_feature_names(nbo_type, 'average'), self._extract_atom_nbo_statistics_features, nbo_type, 'average')
+
+        # implicit hydrogens
+        if NodeFeature.BOUND_HYDROGEN_COUNT in node_features:
+            add(['hydrogen_count'], self._extract_hydrogen_count)
+
+        # node degree is added once all edges are known
+        if NodeFeature.NODE_DEGREE in node_features:
+            schema.append('node_degree')
+
+        return plan, schema, matrix_plan
+
+    def _compile_edge_feature_plan(self) -> tuple[list, list[str], list]:
+
+        """Compiles the edge feature settings into an ordered list of extractors. Each extractor is called as
+           extractor(qm_data, bond_atom_indices, bond_nbo_type, bond_nbo_data, edge_features) and adds its
+           features to the edge feature dict. Extractors of single features that can be computed for all edges
+           at once also get a vector extractor called as vector_extractor(qm_data, edge_indices, bond_nbo_types)
+           that returns the feature column.
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                energies = [x.energy for x in qm_data.bond_3c_data if x.contains_atom_indices(bond_atom_indices)]
-            elif bond_atom_indices in bond_pair_atom_indices:
-                energies = [x.energy for x in qm_data.bond_pair_data if x.atom_indices == bond_atom_indices]
-            else:
-                energies = []
+        Returns:
+            tuple[list, list[str], list]: The extractors, the names of the resulting features in order and
+                (number of features, vector extractor or None, extractor) of each extractor.
+        """
 
-            # append difference if there are 2 entries or more
-            if len(energies) >= 2:
-                edge_features['bond_energy_min_max_difference'] = abs(min(energies) - max(energies))
-            # append 0 otherwise
-            else:
-                edge_features['bond_energy_min_max_difference'] = 0.0
+        edge_features = self._settings.edge_features
+        plan = []
+        schema = []
+        matrix_plan = []
+
+        def add(names: list[str], extractor, *args, vector_extractor=None):
+            plan.append(functools.partial(extractor, *args))
+            schema.extend(names)
+            if vector_extractor is not None:
+                vector_extractor = functools.partial(vector_extractor, *args)
+            matrix_plan.append((len(names), vector_extractor, plan[-1]))
+
+        # bond orders
+        for edge_feature, field, name in [(EdgeFeature.WIBERG_BOND_ORDER, 'wiberg_bond_order_matrix', 'wiberg_bond_order'),
+                                          (EdgeFeature.LMO_BOND_ORDER, 'lmo_bond_order_matrix', 'lmo_bond_order'),
+                                          (EdgeFeature.NLMO_BOND_ORDER, 'nlmo_bond_order_matrix', 'nlmo_bond_order')]:
+            if edge_feature in edge_features:
+                add([name], self._extract_bond_value, field, name, vector_extractor=self._extract_bond_value_vector)
+
+        # integer bond orders
+        if EdgeFeature.WIBERG_BOND_ORDER_INT in edge_features:
+            add(['wiberg_bond_order_int'], self._extract_wiberg_bond_order_int, vector_extractor=self._extract_wiberg_bond_order_int_vector)
+
+        # bond distance
+        if EdgeFeature.BOND_DISTANCE in edge_features:
+            add(['bond_distance'], self._extract_bond_value, 'bond_distance_matrix', 'bond_distance',
+                vector_extractor=self._extract_bond_value_vector)
+
+        if EdgeFeature.NBO_TYPE in edge_features:
+            add(['nbo_type'], self._extract_bond_nbo_type, vector_extractor=self._extract_bond_nbo_type_vector)
+
+        # number of bond/antibond orbitals
+        if EdgeFeature.BOND_ORBITAL_MAX in edge_features or \
+                EdgeFeature.BOND_ORBITAL_AVERAGE in edge_features or \
+                EdgeFeature.BOND_ENERGY_MIN_MAX_DIFFERENCE in edge_features:
+            add(['n_bn'], self._extract_bond_nbo_count, vector_extractor=self._extract_bond_nbo_count_vector)
+        if EdgeFeature.ANTIBOND_ORBITAL_MIN in edge_features or \
+                EdgeFeature.ANTIBOND_ORBITAL_AVERAGE in edge_features or \
+                EdgeFeature.ANTIBOND_ENERGY_MIN_MAX_DIFFERENCE in edge_features:
+            add(['n_nbn'], self._extract_antibond_nbo_count, vector_extractor=self._extract_antibond_nbo_count_vector)
+
+        # bond orbitals
+        if EdgeFeature.BOND_ENERGY_MIN_MAX_DIFFERENCE in edge_features:
+            add(['bond_energy_min_max_difference'], self._extract_bond_energy_min_max_difference)
+        if EdgeFeature.BOND_ORBITAL_MAX in edge_features:
+            add(self._get_nbo_feature_names(NboType.BOND, 'max'), self._extract_bond_nbo_features, 'max')
+        if EdgeFeature.BOND_ORBITAL_AVERAGE in edge_features:
+            add(self._get_nbo_feature_names(NboType.BOND, 'average'), self._extract_bond_nbo_features, 'average')
+
+        # antibond orbitals
+        if EdgeFeature.ANTIBOND_ENERGY_MIN_MAX_DIFFERENCE in edge_features:
+            add(['antibond_energy_min_max_difference'], self._extract_antibond_energy_min_max_difference)
+        if EdgeFeature.ANTIBOND_ORBITAL_MIN in edge_features:
+            add(self._get_nbo_feature_names(NboType.ANTIBOND, 'min'), self._extract_antibond_nbo_features, 'min')
+        if EdgeFeature.ANTIBOND_ORBITAL_AVERAGE in edge_features:
+            add(self._get_nbo_feature_names(NboType.ANTIBOND, 'average'), self._extract_antibond_nbo_features, 'average')
+
+        return plan, schema, matrix_plan
+
+    def _compile_sopa_edge_feature_plan(self) -> tuple[list, list[str]]:
+
+        """Compiles the SOPA edge feature settings into an ordered list of extractors. Each extractor is called as
+           extractor(qm_data, stabilisation_energies, same_type_nbo_ids, sopa_nbos, edge_features) where sopa_nbos
+           are the donor and acceptor NBOs and adds its features to the edge feature dict.
 
-        if EdgeFeature.BOND_ORBITAL_MAX in self._settings.edge_features and len(self._settings.bond_orbital_indices) >= 0:
+        Returns:
+            tuple[list, list[str]]: The extractors and the names of the resulting features in order.
+        """
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                edge_features = edge_features | self._get_maximum_energy_nbo(qm_data, bond_atom_indices, NboType.THREE_CENTER_BOND)
-            elif bond_atom_indices in bond_pair_atom_indices:
-                edge_features = edge_features | self._get_maximum_energy_nbo(qm_data, bond_atom_indices, NboType.BOND)
-            else:
-                edge_features = edge_features | self._get_default_nbo(qm_data, NboType.BOND, feature_name='max')
+        sopa_edge_features = self._settings.sopa_edge_features
+        plan = []
+        schema = []
 
-        if EdgeFeature.BOND_ORBITAL_AVERAGE in self._settings.edge_features and len(self._settings.bond_orbital_indices) >= 0:
+        def add(names: list[str], extractor, *args):
+            plan.append(functools.partial(extractor, *args))
+            schema.extend(names)
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                edge_features = edge_features | self._get_average_nbo(qm_data, bond_atom_indices, NboType.THREE_CENTER_BOND)
-            elif bond_atom_indices in bond_pair_atom_indices:
-                edge_features = edge_features | self._get_average_nbo(qm_data, bond_atom_indices, NboType.BOND)
-            else:
-                edge_features = edge_features | self._get_default_nbo(qm_data, NboType.BOND, feature_name='average')
+        # stabilisation energy features
+        if SopaEdgeFeature.STABILISATION_ENERGY_MAX in sopa_edge_features:
+            add(['stabilisation_energy_max'], self._extract_stabilisation_energy, max, 'stabilisation_energy_max')
+        if SopaEdgeFeature.STABILISATION_ENERGY_AVERAGE in sopa_edge_features:
+            add(['stabilisation_energy_average'], self._extract_stabilisation_energy, mean, 'stabilisation_energy_average')
+
+        # donor (0) and acceptor (1) features
+        for k, role, orbital_indices, type_feature, energy_feature, gap_feature, occupation_feature in [
+                (0, 'donor', self._settings.donor_orbital_indices, SopaEdgeFeature.DONOR_NBO_TYPE, SopaEdgeFeature.DONOR_NBO_ENERGY,
+                 SopaEdgeFeature.DONOR_NBO_MIN_MAX_ENERGY_GAP, SopaEdgeFeature.DONOR_NBO_OCCUPATION),
+                (1, 'acceptor', self._settings.acceptor_orbital_indices, SopaEdgeFeature.ACCEPTOR_NBO_TYPE, SopaEdgeFeature.ACCEPTOR_NBO_ENERGY,
+                 SopaEdgeFeature.ACCEPTOR_NBO_MIN_MAX_ENERGY_GAP, SopaEdgeFeature.ACCEPTOR_NBO_OCCUPATION)]:
+
+            if type_feature in sopa_edge_features:
+                add([role + '_nbo_type'], self._extract_sopa_nbo_attribute, k, 'nbo_type', role + '_nbo_type')
+            if energy_feature in sopa_edge_features:
+                add([role + '_nbo_energy'], self._extract_sopa_nbo_attribute, k, 'energy', role + '_nbo_energy')
+            if gap_feature in sopa_edge_features:
+                add([role + '_nbo_min_max_energy_gap'], self._extract_sopa_nbo_min_max_energy_gap, k, role + '_nbo_min_max_energy_gap')
+            if occupation_feature in sopa_edge_features:
+                add([role + '_nbo_occupation'], self._extract_sopa_nbo_attribute, k, 'occupation', role + '_nbo_occupation')
+            for orbital_index in orbital_indices:
+                name = role + '_nbo_' + ['s', 'p','d', 'f'][orbital_index] + '_occupation'
+                add([name], self._extract_sopa_nbo_orbital_occupation, k, orbital_index, name)
+
+        return plan, schema
+
+    def _get_nbo_feature_names(self, nbo_type: NboType, feature_name: str) -> list[str]:
+
+        """Gets the names of the features of an NBO entry (see _get_extremum_energy_nbo(), _get_average_nbo() and
+           _get_default_nbo()).
 
-        if EdgeFeature.ANTIBOND_ENERGY_MIN_MAX_DIFFERENCE in self._settings.edge_features:
+        Returns:
+            list[str]: The feature names.
+        """
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                energies = [x.energy for x in qm_data.antibond_3c_data if x.contains_atom_indices(bond_atom_indices)]
-            elif bond_atom_indices in bond_pair_atom_indices:
-                energies = [x.energy for x in qm_data.antibond_pair_data if x.atom_indices == bond_atom_indices]
-            else:
-                energies = []
+        base_name = str(nbo_type).split('.')[1].lower().replace('three_center_', '') + '_' + feature_name
+        return [base_name + '_energy', base_name + '_occupation'] + \
+            [base_name + '_' + ['s', 'p','d', 'f'][k] + '_occupation' for k in self._settings.get_nbo_orbital_indices_by_type(nbo_type)]
 
-            # append difference if there are 2 entries or more
-            if len(energies) >= 2:
-                edge_features['antibond_energy_min_max_difference'] = abs(min(energies) - max(energies))
-            # append 0 otherwise
-            else:
-                edge_features['antibond_energy_min_max_difference'] = 0.0
+    def _extract_atom_value(self, field: str, feature_name: str, qm_data: QmData, atom_index: int, node_features: dict):
 
-        if EdgeFeature.ANTIBOND_ORBITAL_MIN in self._settings.edge_features and len(self._settings.antibond_orbital_indices) >= 0:
+        """Extracts a per-atom value of a QM data field."""
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                edge_features = edge_features | self._get_minimum_energy_nbo(qm_data, bond_atom_indices, NboType.THREE_CENTER_ANTIBOND)
-            elif bond_atom_indices in bond_pair_atom_indices:
-                edge_features = edge_features | self._get_minimum_energy_nbo(qm_data, bond_atom_indices, NboType.ANTIBOND)
-            else:
-                edge_features = edge_features | self._get_default_nbo(qm_data, NboType.ANTIBOND, feature_name='min')
+        node_features[feature_name] = getattr(qm_data, field)[atom_index]
 
-        if EdgeFeature.ANTIBOND_ORBITAL_AVERAGE in self._settings.edge_features and len(self._settings.antibond_orbital_indices) >= 0:
+    def _extract_atom_component(self, field: str, k: int, feature_name: str, qm_data: QmData, atom_index: int, node_features: dict):
 
-            if bond_atom_indices in bond_3c_atom_indices:
-                edge_features = edge_features | self._get_average_nbo(qm_data, bond_atom_indices, NboType.THREE_CENTER_ANTIBOND)
-            elif bond_atom_indices in bond_pair_atom_indices:
-                edge_features = edge_features | self._get_average_nbo(qm_data, bond_atom_indices, NboType.ANTIBOND)
-            else:
-                edge_features = edge_features | self._get_default_nbo(qm_data, NboType.ANTIBOND, feature_name='average')
+        """Extracts a component of a per-atom vector of a QM data field."""
 
-        return edge_features
+        node_features[feature_name] = getattr(qm_data, field)[atom_index][k]
+
+    def _extract_element_property(self, property_name: str, qm_data: QmData, atom_index: int, node_features: dict):
+
+        """Extracts a tabulated property of the element of an atom."""
+
+        node_features[property_name] = ElementLookUpTable.atom_property_dict[ElementLookUpTable.get_element_identifier(qm_data.atomic_numbers[atom_index])][property_name]
+
+    def _extract_natural_electron_population_total(self, qm_data: QmData, atom_index: int, node_features: dict):
+
+        """Extracts the total natural electron population of an atom."""
+
+        node_features['natural_electron_population_total'] = sum(qm_data.natural_electron_population[atom_index])
+
+    def _extract_atom_nbo_count(self, nbo_type: NboType, feature_name: str, qm_data: QmData, atom_index: int, node_features: dict):
+
+        """Extracts the number of single-center NBOs of an atom."""
+
+        node_features[feature_name] = qm_data.get_atom_nbo_statistics_by_type(nbo_type).counts[atom_index]
+
+    def _extract_atom_nbo_energy_min_max_difference(self, nbo_type: NboType, feature_name: str, qm_data: QmData, atom_index: int, node_features: dict):
+
+        """Extracts the energy difference of the single-center NBOs of an atom."""
+
+        node_features[feature_name] = qm_data.get_atom_nbo_statistics_by_type(nbo_type).get_energy_min_max_difference(atom_index)
+
+    def _extract_atom_nbo_statistics_features(self, nbo_type: NboType, feature_name: str, qm_data: QmData, atom_index: int, node_features: dict):
+
+        """Extracts the max, min or average single-center NBO features of an atom."""
+
+        node_features.update(self._get_atom_nbo_statistics_features(qm_data, atom_index, nbo_type, feature_name=feature_name))
+
+    def _extract_hydrogen_count(self, qm_data: QmData, atom_index: int, node_features: dict):
+
+        """Extracts the number of bound hydrogens of an atom."""
+
+        # set hydrogen count of hydrogens to 0
+        if qm_data.atomic_numbers[atom_index] == 1:
+            hydrogen_count = 0
+        # set hydrogen count to 0 if transition metal (will be modelled explicitly)
+        elif qm_data.atomic_numbers[atom_index] in ElementLookUpTable.transition_metal_atomic_numbers:
+            hydrogen_count = 0
+        # otherwise determine hydrogen count normally
+        else:
+            hydrogen_count = self._determine_hydrogen_count(atom_index, qm_data)
+
+        node_features['hydrogen_count'] = hydrogen_count
+
+    def _extract_atom_value_vector(self, field: str, feature_name: str, qm_data: QmData, atom_indices: np.ndarray) -> np.ndarray:
+
+        """Extracts the per-atom values of a QM data field for multiple atoms."""
+
+        return np.asarray(getattr(qm_data, field), dtype=np.float64)[atom_indices]
+
+    def _extract_atom_component_vector(self, field: str, k: int, feature_name: str, qm_data: QmData, atom_indices: np.ndarray) -> np.ndarray:
+
+        """Extracts a component of the per-atom vectors of a QM data field for multiple atoms."""
+
+        return np.asarray(getattr(qm_data, field), dtype=np.float64)[atom_indices, k]
+
+    def _extract_element_property_vector(self, property_name: str, qm_data: QmData, atom_indices: np.ndarray) -> np.ndarray:
+
+        """Extracts a tabulated property of the elements of multiple atoms."""
+
+        # look up each element once
+        atomic_numbers, inverse = np.unique(np.asarray(qm_data.atomic_numbers)[atom_indices], return_inverse=True)
+        values = [ElementLookUpTable.atom_property_dict[ElementLookUpTable.get_element_identifier(x)][property_name] for x in atomic_numbers.tolist()]
+
+        return np.array(values, dtype=np.float64)[inverse]
+
+    def _extract_natural_electron_population_total_vector(self, qm_data: QmData, atom_indices: np.ndarray) -> np.ndarray:
+
+        """Extracts the total natural electron populations of multiple atoms."""
+
+        return np.sum(np.asarray(qm_data.natural_electron_population, dtype=np.float64)[atom_indices], axis=1)
+
+    def _extract_atom_nbo_count_vector(self, nbo_type: NboType, feature_name: str, qm_data: QmData, atom_indices: np.ndarray) -> np.ndarray:
+
+        """Extracts the number of single-center NBOs of multiple atoms."""
+
+        return np.asarray(qm_data.get_atom_nbo_statistics_by_type(nbo_type).counts, dtype=np.float64)[atom_indices]
+
+    def _extract_bond_value_vector(self, field: str, feature_name: str, qm_data: QmData, edge_indices: np.ndarray, bond_nbo_types: list[NboType]) -> np.ndarray:
+
+        """Extracts the values of a per-atom-pair QM data matrix for multiple atom pairs."""
+
+        return np.asarray(getattr(qm_data, field), dtype=np.float64)[edge_indices[:, 0], edge_indices[:, 1]]
+
+    def _extract_wiberg_bond_order_int_vector(self, qm_data: QmData, edge_indices: np.ndarray, bond_nbo_types: list[NboType]) -> np.ndarray:
+
+        """Extracts the integer bond orders derived from the Wiberg bond orders of multiple atom pairs."""
+
+        wiberg_indices = np.asarray(qm_data.wiberg_bond_order_matrix, dtype=np.float64)[edge_indices[:, 0], edge_indices[:, 1]]
+
+        return np.select([wiberg_indices < 1.43, wiberg_indices < 2.0, wiberg_indices >= 2.0], [1.0, 2.0, 3.0], default=0.0)
+
+    def _extract_bond_nbo_type_vector(self, qm_data: QmData, edge_indices: np.ndarray, bond_nbo_types: list[NboType]) -> np.ndarray:
+
+        """Extracts the type codes (see edge_nbo_type_codes) of the bond NBOs of multiple atom pairs."""
+
+        type_codes = {
+            None: GraphGenerator.edge_nbo_type_codes['None'],
+            NboType.BOND: GraphGenerator.edge_nbo_type_codes['BD'],
+            NboType.THREE_CENTER_BOND: GraphGenerator.edge_nbo_type_codes['3C']
+        }
+
+        return np.array([type_codes[x] for x in bond_nbo_types], dtype=np.float64)
+
+    def _extract_bond_nbo_count_vector(self, qm_data: QmData, edge_indices: np.ndarray, bond_nbo_types: list[NboType]) -> np.ndarray:
+
+        """Extracts the number of bond NBOs of multiple atom pairs."""
+
+        return np.array([len(qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, bond_nbo_type)) if bond_nbo_type is not None else 0
+                         for bond_atom_indices, bond_nbo_type in zip(edge_indices.tolist(), bond_nbo_types)], dtype=np.float64)
+
+    def _extract_antibond_nbo_count_vector(self, qm_data: QmData, edge_indices: np.ndarray, bond_nbo_types: list[NboType]) -> np.ndarray:
+
+        """Extracts the number of antibond NBOs of multiple atom pairs."""
+
+        antibond_nbo_types = {
+            None: [],
+            NboType.BOND: [NboType.ANTIBOND],
+            NboType.THREE_CENTER_BOND: [NboType.THREE_CENTER_ANTIBOND, NboType.THREE_CENTER_NONBOND]
+        }
+
+        return np.array([sum([len(qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, x)) for x in antibond_nbo_types[bond_nbo_type]])
+                         for bond_atom_indices, bond_nbo_type in zip(edge_indices.tolist(), bond_nbo_types)], dtype=np.float64)
+
+    def _extract_bond_value(self, field: str, feature_name: str, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                            bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts a value of a per-atom-pair QM data matrix."""
+
+        edge_features[feature_name] = getattr(qm_data, field)[bond_atom_indices[0]][bond_atom_indices[1]]
+
+    def _extract_wiberg_bond_order_int(self, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                                       bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the integer bond order derived from the Wiberg bond order."""
+
+        wiberg_index = qm_data.wiberg_bond_order_matrix[bond_atom_indices[0]][bond_atom_indices[1]]
+        bond_order_int = 0
+
+        if wiberg_index < 1.43:
+            bond_order_int = 1
+        elif wiberg_index >= 1.43 and wiberg_index < 2.0:
+            bond_order_int = 2
+        elif wiberg_index >= 2.0:
+            bond_order_int = 3
+
+        edge_features['wiberg_bond_order_int'] = bond_order_int
+
+    def _extract_bond_nbo_type(self, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                               bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the type of the bond NBOs."""
+
+        if bond_nbo_type == NboType.THREE_CENTER_BOND:
+            edge_features['nbo_type'] = '3C'
+        elif bond_nbo_type == NboType.BOND:
+            edge_features['nbo_type'] = 'BD'
+        else:
+            edge_features['nbo_type'] = 'None'
+
+    def _extract_bond_nbo_count(self, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                                bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the number of bond NBOs."""
+
+        edge_features['n_bn'] = len(bond_nbo_data)
+
+    def _extract_antibond_nbo_count(self, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                                    bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the number of antibond NBOs."""
+
+        if bond_nbo_type == NboType.THREE_CENTER_BOND:
+            edge_features['n_nbn'] = len(qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.THREE_CENTER_ANTIBOND)) + \
+                                     len(qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.THREE_CENTER_NONBOND))
+        elif bond_nbo_type == NboType.BOND:
+            edge_features['n_nbn'] = len(qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.ANTIBOND))
+        else:
+            edge_features['n_nbn'] = 0
+
+    def _extract_bond_energy_min_max_difference(self, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                                                bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the energy difference of the bond NBOs."""
+
+        energies = [x.energy for x in bond_nbo_data]
+
+        # append difference if there are 2 entries or more, 0 otherwise
+        if len(energies) >= 2:
+            edge_features['bond_energy_min_max_difference'] = abs(min(energies) - max(energies))
+        else:
+            edge_features['bond_energy_min_max_difference'] = 0.0
+
+    def _extract_bond_nbo_features(self, feature_name: str, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                                   bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the max or average bond NBO features."""
+
+        if bond_nbo_type is None:
+            edge_features.update(self._get_default_nbo(qm_data, NboType.BOND, feature_name=feature_name))
+        elif feature_name == 'max':
+            edge_features.update(self._get_maximum_energy_nbo(qm_data, bond_atom_indices, bond_nbo_type))
+        else:
+            edge_features.update(self._get_average_nbo(qm_data, bond_atom_indices, bond_nbo_type))
+
+    def _extract_antibond_energy_min_max_difference(self, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                                                    bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the energy difference of the antibond NBOs."""
+
+        if bond_nbo_type == NboType.THREE_CENTER_BOND:
+            energies = [x.energy for x in qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.THREE_CENTER_ANTIBOND)]
+        elif bond_nbo_type == NboType.BOND:
+            energies = [x.energy for x in qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.ANTIBOND)]
+        else:
+            energies = []
+
+        # append difference if there are 2 entries or more, 0 otherwise
+        if len(energies) >= 2:
+            edge_features['antibond_energy_min_max_difference'] = abs(min(energies) - max(energies))
+        else:
+            edge_features['antibond_energy_min_max_difference'] = 0.0
+
+    def _extract_antibond_nbo_features(self, feature_name: str, qm_data: QmData, bond_atom_indices: list[int], bond_nbo_type: NboType,
+                                       bond_nbo_data: list[NboDataPoint], edge_features: dict):
+
+        """Extracts the min or average antibond NBO features."""
+
+        if bond_nbo_type is None:
+            edge_features.update(self._get_default_nbo(qm_data, NboType.ANTIBOND, feature_name=feature_name))
+            return
+
+        antibond_nbo_type = NboType.THREE_CENTER_ANTIBOND if bond_nbo_type == NboType.THREE_CENTER_BOND else NboType.ANTIBOND
+        if feature_name == 'min':
+            edge_features.update(self._get_minimum_energy_nbo(qm_data, bond_atom_indices, antibond_nbo_type))
+        else:
+            edge_features.update(self._get_average_nbo(qm_data, bond_atom_indices, antibond_nbo_type))
+
+    def _extract_stabilisation_energy(self, operator, feature_name: str, qm_data: QmData, stabilisation_energies: list[float],
+                                      same_type_nbo_ids: list[list[int]], sopa_nbos: tuple, edge_features: dict):
+
+        """Extracts the max or average stabilisation energy of a SOPA interaction."""
+
+        edge_features[feature_name] = operator(stabilisation_energies)
+
+    def _extract_sopa_nbo_attribute(self, k: int, attribute: str, feature_name: str, qm_data: QmData, stabilisation_energies: list[float],
+                                    same_type_nbo_ids: list[list[int]], sopa_nbos: tuple, edge_features: dict):
+
+        """Extracts an attribute of the donor or acceptor NBO of a SOPA interaction."""
+
+        edge_features[feature_name] = getattr(sopa_nbos[k], attribute)
+
+    def _extract_sopa_nbo_min_max_energy_gap(self, k: int, feature_name: str, qm_data: QmData, stabilisation_energies: list[float],
+                                             same_type_nbo_ids: list[list[int]], sopa_nbos: tuple, edge_features: dict):
+
+        """Extracts the energy gap of the donor or acceptor NBOs of a SOPA interaction."""
+
+        energies = [self._get_nbo_from_nbo_id(qm_data, same_type_nbo_id[k]).energy for same_type_nbo_id in same_type_nbo_ids]
+        edge_features[feature_name] = max(energies) - min(energies)
+
+    def _extract_sopa_nbo_orbital_occupation(self, k: int, orbital_index: int, feature_name: str, qm_data: QmData, stabilisation_energies: list[float],
+                                             same_type_nbo_ids: list[list[int]], sopa_nbos: tuple, edge_features: dict):
+
+        """Extracts an orbital occupation of the donor or acceptor NBO of a SOPA interaction."""
+
+        edge_features[feature_name] = sopa_nbos[k].orbital_occupations[orbital_index]
 
     def _get_minimum_energy_nbo(self, qm_data: QmData, atom_indices: list, nbo_type: NboType) -> dict:
 
@@ -504,9 +1134,8 @@ class GraphGenerator:
         """
 
         # resolve nbo type
-        nbo_data = qm_data.get_nbo_data_by_type(nbo_type)
+        nbo_data = qm_data.get_nbo_data_by_atom_indices(atom_indices, nbo_type)
         nbo_orbital_indices = self._settings.get_nbo_orbital_indices_by_type(nbo_type)
-        nbo_energies = [x.energy for x in nbo_data]
 
         # return variable
         nbo_features = {}
@@ -514,18 +1143,18 @@ class GraphGenerator:
         base_name = str(nbo_type).split('.')[1].lower().replace('three_center_', '') + '_' + extremum_operator.__name__
 
         # energies
-        energies = [x.energy for x in nbo_data if x.contains_atom_indices(atom_indices)]
+        energies = [x.energy for x in nbo_data]
 
-        # select index of the extremum energy
-        selected_index = nbo_energies.index(extremum_operator(energies))
+        # select the (first) NBO of this type with the extremum energy
+        selected_nbo = qm_data.get_first_nbo_by_energy(extremum_operator(energies), nbo_type)
 
         # append data (total length = 2 + number of orbital occupancies)
-        nbo_features[base_name + '_energy'] = nbo_data[selected_index].energy
-        nbo_features[base_name + '_occupation'] = nbo_data[selected_index].occupation
+        nbo_features[base_name + '_energy'] = selected_nbo.energy
+        nbo_features[base_name + '_occupation'] = selected_nbo.occupation
 
         # get values for orbital symmetries of energy extremum
         for k in nbo_orbital_indices:
-            nbo_features[base_name + '_' + ['s', 'p','d', 'f'][k] + '_occupation'] = nbo_data[selected_index].orbital_occupations[k]
+            nbo_features[base_name + '_' + ['s', 'p','d', 'f'][k] + '_occupation'] = selected_nbo.orbital_occupations[k]
 
         return nbo_features
 
@@ -538,7 +1167,7 @@ class GraphGenerator:
         """
 
         # resolve nbo type
-        nbo_data = qm_data.get_nbo_data_by_type(nbo_type)
+        nbo_data = qm_data.get_nbo_data_by_atom_indices(atom_indices, nbo_type)
         nbo_orbital_indices = self._settings.get_nbo_orbital_indices_by_type(nbo_type)
 
         # return variable
@@ -547,11 +1176,11 @@ class GraphGenerator:
         base_name = str(nbo_type).split('.')[1].lower().replace('three_center_', '') + '_average'
 
         # get list of all energies of this NBO
-        energies = [x.energy for x in nbo_data if x.contains_atom_indices(atom_indices)]
+        energies = [x.energy for x in nbo_data]
         # get list of all occupation values for this NBO
-        occupations = [x.occupation for x in nbo_data if x.contains_atom_indices(atom_indices)]
+        occupations = [x.occupation for x in nbo_data]
         # get list of symmetry values of different lone pairs for this NBO
-        symmetries = [x.orbital_occupations for x in nbo_data if x.contains_atom_indices(atom_indices)]
+        symmetries = [x.orbital_occupations for x in nbo_data]
 
         # append data (total length = 2 + number of orbital occupancies)
         nbo_features[base_name + '_energy'] = mean(energies)
@@ -563,6 +1192,53 @@ class GraphGenerator:
 
         return nbo_features
 
+    def _get_atom_nbo_statistics_features(self, qm_data: QmData, atom_index: int, nbo_type: NboType, feature_name: str) -> dict:
+
+        """Gets a dict of the max, min or average NBO entry of an atom from the per-atom NBO statistics.
+
+        Returns:
+            dict: The NBO data dict.
+        """
+
+        statistics = qm_data.get_atom_nbo_statistics_by_type(nbo_type)
+
+        # use default values if there are no NBOs of this type on the atom
+        if statistics.counts[atom_index] == 0:
+            return self._get_default_nbo(qm_data, nbo_type, feature_name=feature_name)
+
+        nbo_orbital_indices = self._settings.get_nbo_orbital_indices_by_type(nbo_type)
+
+        # return variable
+        nbo_features = {}
+        # base name to setup dict
+        base_name = str(nbo_type).split('.')[1].lower().replace('three_center_', '') + '_' + feature_name
+
+        if feature_name == 'average':
+            energy = statistics.average_energies[atom_index]
+            occupation = statistics.average_occupations[atom_index]
+            orbital_occupations = statistics.average_orbital_occupations[atom_index]
+        else:
+            if feature_name == 'max':
+                nbo_data_point = statistics.max_energy_nbos[atom_index]
+            elif feature_name == 'min':
+                nbo_data_point = statistics.min_energy_nbos[atom_index]
+            else:
+                raise ValueError('Feature name ' + feature_name + ' not recognized.')
+
+            energy = nbo_data_point.energy
+            occupation = nbo_data_point.occupation
+            orbital_occupations = nbo_data_point.orbital_occupations
+
+        # append data (total length = 2 + number of orbital occupancies)
+        nbo_features[base_name + '_energy'] = energy
+        nbo_features[base_name + '_occupation'] = occupation
+
+        # get values for orbital symmetries
+        for k in nbo_orbital_indices:
+            nbo_features[base_name + '_' + ['s', 'p','d', 'f'][k] + '_occupation'] = orbital_occupations[k]
+
+        return nbo_features
+
     def _get_default_nbo(self, qm_data: QmData, nbo_type: NboType, feature_name: str = 'default') -> dict:
 
         """Gets a dict of the default NBO entry.
@@ -599,6 +1275,16 @@ class GraphGenerator:
             list[float]: The default orbital occupations.
         """
 
+        return self._get_memoized(('default_orbital_occupations', nbo_type), self._compute_default_orbital_occupations, qm_data, nbo_type)
+
+    def _compute_default_orbital_occupations(self, qm_data: QmData, nbo_type: NboType):
+
+        """Computes the default orbital occupations (see _get_default_orbital_occupations).
+
+        Returns:
+            list[float]: The default orbital occupations.
+        """
+
         if nbo_type == NboType.BOND or nbo_type == NboType.THREE_CENTER_BOND:
             average_occupations = self._get_average_orbital_occupations(qm_data.bond_pair_data)
             return [average_occupations[i] for i in self._settings.bond_orbital_indices]
@@ -634,8 +1320,8 @@ class GraphGenerator:
         edge_features = self._get_edge_features(bond_atom_indices, qm_data)
 
         # check if NBO edge or not and assign label/id
-        if bond_atom_indices in [x.atom_indices for x in qm_data.bond_pair_data] or \
-            bond_atom_indices in [x.atom_indices[0:2] for x in qm_data.bond_3c_data] + [x.atom_indices[1:3] for x in qm_data.bond_3c_data]:
+        if len(qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.BOND)) > 0 or \
+           len(qm_data.get_nbo_data_by_atom_indices(bond_atom_indices, NboType.THREE_CENTER_BOND)) > 0:
             edge_label = 'NBO'
             edge_id = 'nbo-'
         else: 
@@ -701,130 +1387,12 @@ class GraphGenerator:
         # for brevity
         i = atom_index
 
-        # pre read data for efficiency
-
-        # atom indices that have LP or LV
-        lone_pair_atom_indices = [x.atom_indices[0] for x in qm_data.lone_pair_data]
-        lone_vacancy_atom_indices = [x.atom_indices[0] for x in qm_data.lone_vacancy_data]
-
         # set up features for node
         node_features = {}
 
-        # add basic features
-        if NodeFeature.ATOMIC_NUMBER in self._settings.node_features:
-            node_features['atomic_number'] = qm_data.atomic_numbers[i]
-        if NodeFeature.COVALENT_RADIUS in self._settings.node_features:
-            node_features['covalent_radius'] = ElementLookUpTable.atom_property_dict[ElementLookUpTable.get_element_identifier(qm_data.atomic_numbers[i])]['covalent_radius']
-        if NodeFeature.ELECTRONEGATIVITY in self._settings.node_features:
-            node_features['electronegativity'] = ElementLookUpTable.atom_property_dict[ElementLookUpTable.get_element_identifier(qm_data.atomic_numbers[i])]['electronegativity']
-
-        # add natural atomic charge
-        if NodeFeature.NATURAL_ATOMIC_CHARGE in self._settings.node_features:
-            node_features['natural_atomic_charge'] = qm_data.natural_atomic_charges[i]
-
-        # add natural electron populations
-        if NodeFeature.NATURAL_ELECTRON_POPULATION_CORE in self._settings.node_features:
-            node_features['natural_electron_population_core'] = qm_data.natural_electron_population[i][0]
-
-        if NodeFeature.NATURAL_ELECTRON_POPULATION_VALENCE in self._settings.node_features:
-            node_features['natural_electron_population_valence'] = qm_data.natural_electron_population[i][1]
-
-        if NodeFeature.NATURAL_ELECTRON_POPULATION_RYDBERG in self._settings.node_features:
-            node_features['natural_electron_population_rydberg'] = qm_data.natural_electron_population[i][2]
-
-        if NodeFeature.NATURAL_ELECTRON_POPULATION_TOTAL in self._settings.node_features:
-            node_features['natural_electron_population_total'] = sum(qm_data.natural_electron_population[i])
-
-        # add natural electron configuration (requested orbital occupancies)
-        for k in self._settings.natural_orbital_configuration_indices:
-            node_features['natural_electron_configuration_' + ['s', 'p','d', 'f'][k] + '_occupation'] = qm_data.natural_electron_configuration[i][k]
-
-        # add bond order totals
-
-        # Wiberg mode
-        if NodeFeature.WIBERG_BOND_ORDER_TOTAL in self._settings.node_features:
-            node_features['wiberg_bond_order_total'] = qm_data.wiberg_bond_order_totals[i]
-        # LMO mode
-        if NodeFeature.LMO_BOND_ORDER_TOTAL in self._settings.node_features:
-            node_features['lmo_bond_order_total'] = qm_data.lmo_bond_order_totals[i]
-        # NLMO mode
-        if NodeFeature.NLMO_BOND_ORDER_TOTAL in self._settings.node_features:
-            node_features['nlmo_bond_order_total'] = qm_data.nlmo_bond_order_totals[i]
-
-        # add number of lone pairs if requested
-        if NodeFeature.LONE_PAIR_MAX in self._settings.node_features or \
-                NodeFeature.LONE_PAIR_AVERAGE in self._settings.node_features or \
-                NodeFeature.LONE_PAIR_ENERGY_MIN_MAX_DIFFERENCE in self._settings.node_features:
-
-            node_features['n_lone_pairs'] = len([x.energy for x in qm_data.lone_pair_data if x.atom_indices[0] == i])
-
-        if NodeFeature.LONE_PAIR_ENERGY_MIN_MAX_DIFFERENCE in self._settings.node_features:
-            energies = [x.energy for x in qm_data.lone_pair_data if x.atom_indices[0] == i]
-
-            # append difference if there are 2 entries or more
-            if len(energies) >= 2:
-                node_features['lone_pair_energy_min_max_difference'] = abs(min(energies) - max(energies))
-            # append 0 otherwise
-            else:
-                node_features['lone_pair_energy_min_max_difference'] = 0.0
-
-        if NodeFeature.LONE_PAIR_MAX in self._settings.node_features and len(self._settings.lone_pair_orbital_indices) >= 0:
-            if i in lone_pair_atom_indices:
-                node_features = node_features | self._get_maximum_energy_nbo(qm_data, [i], NboType.LONE_PAIR)
-            else:
-                node_features = node_features | self._get_default_nbo(qm_data, NboType.LONE_PAIR, feature_name='max')
-
-        if NodeFeature.LONE_PAIR_AVERAGE in self._settings.node_features and len(self._settings.lone_pair_orbital_indices) >= 0:
-            if i in lone_pair_atom_indices:
-                node_features = node_features | self._get_average_nbo(qm_data, [i], NboType.LONE_PAIR)
-            else:
-                node_features = node_features | self._get_default_nbo(qm_data, NboType.LONE_PAIR, feature_name='average')
-
-        # add number of lone vacancies if requested
-        if NodeFeature.LONE_VACANCY_MIN in self._settings.node_features or \
-                NodeFeature.LONE_VACANCY_AVERAGE in self._settings.node_features or \
-                NodeFeature.LONE_VACANCY_ENERGY_MIN_MAX_DIFFERENCE in self._settings.node_features:
-
-            node_features['n_lone_vacancies'] = len([x.energy for x in qm_data.lone_vacancy_data if x.atom_indices[0] == i])
-
-        if NodeFeature.LONE_VACANCY_ENERGY_MIN_MAX_DIFFERENCE in self._settings.node_features:
-            energies = [x.energy for x in qm_data.lone_vacancy_data if x.atom_indices[0] == i]
-
-            # append difference if there are 2 entries or more
-            if len(energies) >= 2:
-                node_features['lone_vacancy_energy_min_max_difference'] = abs(min(energies) - max(energies))
-            # append 0 otherwise
-            else:
-                node_features['lone_vacancy_energy_min_max_difference'] = 0.0
-
-        if NodeFeature.LONE_VACANCY_MIN in self._settings.node_features and len(self._settings.lone_vacancy_orbital_indices) >= 0:
-            if i in lone_vacancy_atom_indices:
-                node_features = node_features | self._get_minimum_energy_nbo(qm_data, [i], NboType.LONE_VACANCY)
-            else:
-                node_features = node_features | self._get_default_nbo(qm_data, NboType.LONE_VACANCY, feature_name='min')
-
-        if NodeFeature.LONE_VACANCY_AVERAGE in self._settings.node_features and len(self._settings.lone_vacancy_orbital_indices) >= 0:
-            if i in lone_vacancy_atom_indices:
-                node_features = node_features | self._get_average_nbo(qm_data, [i], NboType.LONE_VACANCY)
-            else:
-                node_features = node_features | self._get_default_nbo(qm_data, NboType.LONE_VACANCY, feature_name='average')
-
-        # add implicit hydrogens
-        if NodeFeature.BOUND_HYDROGEN_COUNT in self._settings.node_features:
-            # get hydrogen count for heavy atoms in implicit mode
-            hydrogen_count = None
-
-            # set hydrogen count of hydrogens to 0
-            if qm_data.atomic_numbers[i] == 1:
-                hydrogen_count = 0
-            # set hydrogen count to 0 if transition metal (will be modelled explicitly)
-            elif qm_data.atomic_numbers[i] in ElementLookUpTable.transition_metal_atomic_numbers:
-                hydrogen_count = 0
-            # otherwise determine hydrogen count normally
-            else:
-                hydrogen_count = self._determine_hydrogen_count(i, qm_data)
-
-            node_features['hydrogen_count'] = hydrogen_count
+        # run requested extractors
+        for extractor in self._node_feature_plan:
+            extractor(qm_data, i, node_features)
 
         if include_misc_data:
 
@@ -862,20 +1430,32 @@ class GraphGenerator:
             int: The number of hydrogens in front of the atom.
         """
 
+        return self._get_memoized(('hydrogen_position_offsets',), self._get_hydrogen_position_offsets, qm_data)[atom_index]
+
+    def _get_hydrogen_position_offsets(self, qm_data: QmData) -> list[int]:
+
+        """Counts for all atoms how many hydrogen atoms are in front of (index-wise) the atom.
+
+        Returns:
+            list[int]: The number of hydrogens in front of each atom.
+        """
+
         # get list of hydride hydrogen indices
-        hydride_hydrogen_indices = self._get_hydride_hydrogen_indices(qm_data)
+        hydride_hydrogen_indices = set(self._get_hydride_hydrogen_indices(qm_data))
 
+        hydrogen_offsets = []
         hydrogen_offset_count = 0
 
-        # iterate through atomic numbers up to atom index
-        for i in range(0, atom_index, 1):
+        # iterate through atomic numbers
+        for i in range(qm_data.n_atoms):
+            hydrogen_offsets.append(hydrogen_offset_count)
             if qm_data.atomic_numbers[i] == 1:
                 # check if hydrogen is a hydrite hydrogen
                 # only increment if hydrogen is not a hydride hydrogen
                 if i not in hydride_hydrogen_indices:
                     hydrogen_offset_count += 1
 
-        return hydrogen_offset_count
+        return hydrogen_offsets
 
     def _get_hydride_hydrogen_indices(self, qm_data: QmData) -> list[int]:
 
@@ -885,21 +1465,21 @@ class GraphGenerator:
             list[int]: List of hydride hydrogen indices
         """
 
-        # return variable
-        hydride_hydrogen_indices = []
+        return [hydride_bond[0] for hydride_bond in self._get_hydride_bond_indices(qm_data)]
 
-        for i in range(len(qm_data.atomic_numbers)):
+    def _get_hydride_bond_indices(self, qm_data: QmData) -> list[list[int]]:
 
-            # look for transition metals
-            if qm_data.atomic_numbers[i] in ElementLookUpTable.transition_metal_atomic_numbers:
-                # get bound h atom indices and append to return variable
-                hydride_hydrogen_indices.extend(self._get_bound_h_atom_indices(i, qm_data, threshold=self._settings.hydrogen_count_threshold))
+        """Returns a list of hydride bonds.
 
-        return hydride_hydrogen_indices
+        Returns:
+            list[list[int]]: List of hydride bonds. [index of H, index of M]
+        """
 
-    def _get_hydride_bond_indices(self, qm_data: QmData) -> list[list[int]]:
+        return [list(x) for x in self._get_memoized(('hydride_bond_indices',), self._find_hydride_bond_indices, qm_data)]
 
-        """Returns a list of hydride bonds.
+    def _find_hydride_bond_indices(self, qm_data: QmData) -> list[list[int]]:
+
+        """Finds the hydride bonds (see _get_hydride_bond_indices).
 
         Returns:
             list[list[int]]: List of hydride bonds. [index of H, index of M]
@@ -998,6 +1578,16 @@ class GraphGenerator:
             list[list[float]]: The selected index matrix.
         """
 
+        return self._get_memoized(('index_matrix', bond_order_type), self._select_index_matrix, qm_data, bond_order_type)
+
+    def _select_index_matrix(self, qm_data: QmData, bond_order_type: BondOrderType) -> list[list[float]]:
+
+        """Selects the index matrix of the given bond order type (see _get_index_matrix).
+
+        Returns:
+            list[list[float]]: The selected index matrix.
+        """
+
         # decide which index matrix to return
 
         # Wiberg mode
@@ -1235,8 +1825,7 @@ class GraphGenerator:
             list[int]: A list of atom indices.
         """
 
-        nbo_list_index = next((i for i, item in enumerate(qm_data.nbo_data) if item.nbo_id == nbo_id), -1)
-        return qm_data.nbo_data[nbo_list_index].atom_indices
+        return qm_data.get_nbo_by_id(nbo_id).atom_indices
 
     def _contribution_select_atom_indices_from_nbo_id(self, qm_data: QmData, nbo_id: int) -> list[int]:
 
@@ -1246,11 +1835,20 @@ class GraphGenerator:
             list[int]: A list of selected atom indices.
         """
 
-        nbo_list_index = next((i for i, item in enumerate(qm_data.nbo_data) if item.nbo_id == nbo_id), -1)
+        return self._contribution_select_atom_indices(qm_data.get_nbo_by_id(nbo_id))
+
+    def _contribution_select_atom_indices(self, nbo_data_point: NboDataPoint) -> list[int]:
+
+        """Selects the atom indices of a NBO based on their respective contributions.
+
+        Returns:
+            list[int]: A list of selected atom indices.
+        """
+
         selected_atom_indices = []
-        for i in range(len(qm_data.nbo_data[nbo_list_index].atom_indices)):
-            if qm_data.nbo_data[nbo_list_index].contributions[i] >= self._settings.sopa_contribution_threshold:
-                selected_atom_indices.append(qm_data.nbo_data[nbo_list_index].atom_indices[i])
+        for i in range(len(nbo_data_point.atom_indices)):
+            if nbo_data_point.contributions[i] >= self._settings.sopa_contribution_threshold:
+                selected_atom_indices.append(nbo_data_point.atom_indices[i])
         return selected_atom_indices
 
     def _get_nbo_type_from_nbo_id(self, qm_data: QmData, nbo_id: int) -> str:
@@ -1261,10 +1859,10 @@ class GraphGenerator:
             str: A string indicating the NBO type.
         """
 
-        nbo_list_index = next((i for i, item in enumerate(qm_data.nbo_data) if item.nbo_id == nbo_id), -1)
-        if nbo_list_index == -1:
+        nbo_data_point = qm_data.get_nbo_by_id(nbo_id)
+        if nbo_data_point is None:
             raise ValueError()
-        return qm_data.nbo_data[nbo_list_index].nbo_type
+        return nbo_data_point.nbo_type
 
     def _get_nbo_from_nbo_id(self, qm_data: QmData, nbo_id: int) -> NboDataPoint:
 
@@ -1274,11 +1872,7 @@ class GraphGenerator:
             NboDataPoint: The NBO data.
         """
 
-        for nbo_data_point in qm_data.nbo_data:
-            if nbo_data_point.nbo_id == nbo_id:
-                return nbo_data_point
-
-        return None
+        return qm_data.get_nbo_by_id(nbo_id)
 
     def _get_sopa_adjacency_list(self, qm_data: QmData) -> list[list[int]]:
 
@@ -1291,23 +1885,45 @@ class GraphGenerator:
         """
 
         # get list of hydride hydrogen indices
-        hydride_hydrogen_indices = self._get_hydride_hydrogen_indices(qm_data)
+        hydride_hydrogen_indices = set(self._get_hydride_hydrogen_indices(qm_data))
+
+        # SOPA data as columns with resolved donor and acceptor NBO positions
+        sopa_table = qm_data.sopa_table
+
+        # skip if nbo type is not one of: LP, LV, BD, BD*
+        is_valid = (sopa_table.donor_nbo_indices >= 0) & (sopa_table.acceptor_nbo_indices >= 0)
+
+        # number of SOPA entries removed by the prefilter
+        n_pruned = 0
+
+        # drop entries below the interaction threshold before they are grouped
+        if self._settings.sopa_prefilter_mode == SopaPrefilterMode.THRESHOLD and self._settings.sopa_interaction_threshold is not None:
+            is_above_threshold = sopa_table.stabilisation_energies >= self._settings.sopa_interaction_threshold
+            n_pruned += int(np.count_nonzero(is_valid & ~is_above_threshold))
+            is_valid &= is_above_threshold
+
+        valid_rows = np.flatnonzero(is_valid)
+
+        donor_nbo_ids = sopa_table.donor_nbo_ids[valid_rows].tolist()
+        acceptor_nbo_ids = sopa_table.acceptor_nbo_ids[valid_rows].tolist()
+        donor_nbo_indices = sopa_table.donor_nbo_indices[valid_rows].tolist()
+        acceptor_nbo_indices = sopa_table.acceptor_nbo_indices[valid_rows].tolist()
+        sopa_stabilisation_energies = sopa_table.stabilisation_energies[valid_rows].tolist()
 
         adjacency_list = []
         stabilisation_energies = []
         nbo_types = []
         nbo_ids = []
-        for i in range(len(qm_data.sopa_data)):
+        # entry index of each (donor atom, acceptor atom, donor type, acceptor type) interaction
+        entry_indices = {}
+        for i in range(len(valid_rows)):
 
-            # skip if nbo type is not one of: LP, LV, BD, BD*
-            if next((j for j, item in enumerate(qm_data.nbo_data) if item.nbo_id == qm_data.sopa_data[i][0][0]), -1) == -1:
-                continue
-            if next((j for j, item in enumerate(qm_data.nbo_data) if item.nbo_id == qm_data.sopa_data[i][0][1]), -1) == -1:
-                continue
+            donor_nbo = qm_data.nbo_data[donor_nbo_indices[i]]
+            acceptor_nbo = qm_data.nbo_data[acceptor_nbo_indices[i]]
 
             # get all atom indices involved in the two nbo entries
-            donor_atom_indices = self._get_atom_indices_from_nbo_id(qm_data, qm_data.sopa_data[i][0][0])
-            acceptor_atom_indices = self._get_atom_indices_from_nbo_id(qm_data, qm_data.sopa_data[i][0][1])
+            donor_atom_indices = donor_nbo.atom_indices
+            acceptor_atom_indices = acceptor_nbo.atom_indices
 
             # in OMIT mode skip if it is a hydrogen interaction unless a metal is involved
             # this will skip any SOPA interaction that contains an hydrogen atom
@@ -1325,48 +1941,46 @@ class GraphGenerator:
                 if skip_sopa_entry:
                     continue
 
-            donor_nbo_type = self._get_nbo_type_from_nbo_id(qm_data, qm_data.sopa_data[i][0][0])
-            acceptor_nbo_type = self._get_nbo_type_from_nbo_id(qm_data, qm_data.sopa_data[i][0][1])
+            donor_nbo_type = donor_nbo.nbo_type
+            acceptor_nbo_type = acceptor_nbo.nbo_type
 
             # get selected atom indices involved in two nbo entries
-            donor_selected_atom_indices = self._contribution_select_atom_indices_from_nbo_id(qm_data, qm_data.sopa_data[i][0][0])
-            acceptor_selected_atom_indices = self._contribution_select_atom_indices_from_nbo_id(qm_data, qm_data.sopa_data[i][0][1])
+            donor_selected_atom_indices = self._contribution_select_atom_indices(donor_nbo)
+            acceptor_selected_atom_indices = self._contribution_select_atom_indices(acceptor_nbo)
 
             # add bond indices for each combination of indeces
             for index_a in donor_selected_atom_indices:
                 for index_b in acceptor_selected_atom_indices:
 
-                    selected_atom_indices = [index_a, index_b]
+                    # look up the entry of the same type of donor-acceptor interaction between these atoms
+                    entry_key = (index_a, index_b, donor_nbo_type, acceptor_nbo_type)
+                    entry_index = entry_indices.get(entry_key)
 
-                    # add selected atom indices if not already in list
-                    if selected_atom_indices not in adjacency_list:
-                        adjacency_list.append(selected_atom_indices)
-                        stabilisation_energies.append([qm_data.sopa_data[i][1][0]])
+                    # if there does not exist an interaction between these kinds of NBOs make a new entry
+                    if entry_index is None:
+                        entry_indices[entry_key] = len(adjacency_list)
+                        adjacency_list.append([index_a, index_b])
+                        stabilisation_energies.append([sopa_stabilisation_energies[i]])
                         nbo_types.append([donor_nbo_type, acceptor_nbo_type])
-                        nbo_ids.append([[qm_data.sopa_data[i][0][0], qm_data.sopa_data[i][0][1]]])
+                        nbo_ids.append([[donor_nbo_ids[i], acceptor_nbo_ids[i]]])
+                    # otherwise append to the existing entry
                     else:
-                        # find all occurrences of atom_indices pairs
-                        list_indices = [i for i, x in enumerate(adjacency_list) if x == selected_atom_indices]
-
-                        # iterate through all entries with the same atom indices pairs
-                        correct_list_index = None
-                        for list_index in list_indices:
-                            # if there is an entry that corresponds to the same type of donor-acceptor interaction
-                            # set correct index to append to.
-                            if nbo_types[list_index] == [donor_nbo_type, acceptor_nbo_type]:
-                                correct_list_index = list_index
-                                break
-
-                        # if there does not exist an interaction between these kinds of NBOs make a new entry
-                        if correct_list_index is None:
-                            adjacency_list.append(selected_atom_indices)
-                            stabilisation_energies.append([qm_data.sopa_data[i][1][0]])
-                            nbo_types.append([donor_nbo_type, acceptor_nbo_type])
-                            nbo_ids.append([[qm_data.sopa_data[i][0][0], qm_data.sopa_data[i][0][1]]])
-                        # otherwise append to the existing entry
-                        else:
-                            stabilisation_energies[correct_list_index].append(qm_data.sopa_data[i][1][0])
-                            nbo_ids[correct_list_index].append([qm_data.sopa_data[i][0][0], qm_data.sopa_data[i][0][1]])
+                        stabilisation_energies[entry_index].append(sopa_stabilisation_energies[i])
+                        nbo_ids[entry_index].append([donor_nbo_ids[i], acceptor_nbo_ids[i]])
+
+        # keep only the entries with the highest stabilisation energies of each atom pair
+        if self._settings.sopa_prefilter_mode == SopaPrefilterMode.TOP_K:
+            for i in range(len(adjacency_list)):
+                if len(stabilisation_energies[i]) > self._settings.sopa_prefilter_top_k:
+                    n_pruned += len(stabilisation_energies[i]) - self._settings.sopa_prefilter_top_k
+                    # ties are resolved in favour of the first entries, the original order is kept
+                    kept_indices = sorted(sorted(range(len(stabilisation_energies[i])), key=lambda j: -stabilisation_energies[i][j])[:self._settings.sopa_prefilter_top_k])
+                    stabilisation_energies[i] = [stabilisation_energies[i][j] for j in kept_indices]
+                    nbo_ids[i] = [nbo_ids[i][j] for j in kept_indices]
+
+        # report the number of pruned entries in the meta data
+        if self._context is not None:
+            self._context['n_pruned_sopa_entries'] = n_pruned
 
         # make sure that lists have the same length
         assert len(adjacency_list) == len(stabilisation_energies)
@@ -1386,8 +2000,7 @@ class GraphGenerator:
         # obtain SOPA adjacency list and associated stabilisation energies and NBO types
         adjacency_list, stabilisation_energies, nbo_ids = self._get_sopa_adjacency_list(qm_data)
         # format nbo_ids and stabilisation energies according to specification
-        resolved_nbo_ids = self._resolve_nbo_ids(stabilisation_energies, nbo_ids, self._settings.sopa_resolution_mode)
-        resolved_stabilisation_energies = self._resolve_stabilisation_energies(stabilisation_energies, self._settings.sopa_resolution_mode)
+        resolved_stabilisation_energies, resolved_nbo_ids = self._resolve_sopa_interactions(stabilisation_energies, nbo_ids, self._settings.sopa_resolution_mode)
 
         edges = []
         for i in range(len(adjacency_list)):
@@ -1399,7 +2012,7 @@ class GraphGenerator:
 
                 # set up feature list with stabilisation energy and NBO types
                 features = self._get_sopa_edge_features(qm_data, stabilisation_energies[i], nbo_ids[i], resolved_nbo_ids[i][j])
-                # add additional features
+                # add additional features (computed once per atom pair, see _get_edge_features)
                 features = features | self._get_edge_features(adjacency_list[i], qm_data)
 
                 # set edge id and label
@@ -1422,141 +2035,120 @@ class GraphGenerator:
         # adjacency_list, stabilisation_energies, nbo_types = self._get_sopa_adjacency_list(qm_data)
 
         # get donor and acceptor NBO data points
-        donor_nbo = self._get_nbo_from_nbo_id(qm_data, nbo_ids[0])
-        acceptor_nbo = self._get_nbo_from_nbo_id(qm_data, nbo_ids[1])
+        sopa_nbos = (self._get_nbo_from_nbo_id(qm_data, nbo_ids[0]), self._get_nbo_from_nbo_id(qm_data, nbo_ids[1]))
 
         # setup edge_features
         edge_features = {}
 
-        # stabilisation energy features
-        if SopaEdgeFeature.STABILISATION_ENERGY_MAX in self._settings.sopa_edge_features:
-            edge_features['stabilisation_energy_max'] = max(stabilisation_energies)
+        # run requested extractors
+        for extractor in self._sopa_edge_feature_plan:
+            extractor(qm_data, stabilisation_energies, same_type_nbo_ids, sopa_nbos, edge_features)
 
-        if SopaEdgeFeature.STABILISATION_ENERGY_AVERAGE in self._settings.sopa_edge_features:
-            edge_features['stabilisation_energy_average'] = mean(stabilisation_energies)
-
-        # donor features
-        if SopaEdgeFeature.DONOR_NBO_TYPE in self._settings.sopa_edge_features:
-            edge_features['donor_nbo_type'] = donor_nbo.nbo_type
+        return edge_features
 
-        if SopaEdgeFeature.DONOR_NBO_ENERGY in self._settings.sopa_edge_features:
-            edge_features['donor_nbo_energy'] = donor_nbo.energy
+    def _resolve_nbo_ids(self, stabilisation_energies: list[list[float]], nbo_ids: list[list[int]], mode: SopaResolutionMode) -> list[list[int]]:
 
-        if SopaEdgeFeature.DONOR_NBO_MIN_MAX_ENERGY_GAP in self._settings.sopa_edge_features:
-            same_type_donor_nbo_energies = [self._get_nbo_from_nbo_id(qm_data, same_type_nbo_id[0]).energy for same_type_nbo_id in same_type_nbo_ids]
-            edge_features['donor_nbo_min_max_energy_gap'] = max(same_type_donor_nbo_energies) - min(same_type_donor_nbo_energies)
+        """Helper function to resolve a list of NBO ids based on the stabilisation energies and according to the SOPA mode specification.
 
-        if SopaEdgeFeature.DONOR_NBO_OCCUPATION in self._settings.sopa_edge_features:
-            edge_features['donor_nbo_occupation'] = donor_nbo.occupation
+        Raises:
+            ValueError: If the NBO IDs are average-resolved.
 
-        for k in self._settings.donor_orbital_indices:
-            edge_features['donor_nbo_' + ['s', 'p','d', 'f'][k] + '_occupation'] = donor_nbo.orbital_occupations[k]
+        Returns:
+            list[list[int]]: List of lists containing the NBO ID pairs.
+        """
 
-        # acceptor features
-        if SopaEdgeFeature.ACCEPTOR_NBO_TYPE in self._settings.sopa_edge_features:
-            edge_features['acceptor_nbo_type'] = acceptor_nbo.nbo_type
+        return self._resolve_sopa_interactions(stabilisation_energies, nbo_ids, mode)[1]
 
-        if SopaEdgeFeature.ACCEPTOR_NBO_ENERGY in self._settings.sopa_edge_features:
-            edge_features['acceptor_nbo_energy'] = acceptor_nbo.energy
+    def _resolve_stabilisation_energies(self, stabilisation_energies: list[list[float]], mode: SopaResolutionMode) -> list[list[float]]:
 
-        if SopaEdgeFeature.ACCEPTOR_NBO_MIN_MAX_ENERGY_GAP in self._settings.sopa_edge_features:
-            same_type_acceptor_nbo_energies = [self._get_nbo_from_nbo_id(qm_data, same_type_nbo_id[1]).energy for same_type_nbo_id in same_type_nbo_ids]
-            edge_features['acceptor_nbo_min_max_energy_gap'] = max(same_type_acceptor_nbo_energies) - min(same_type_acceptor_nbo_energies)
+        """Helper function to resolve a list of stabilisation energies according to the SOPA mode specification.
 
-        if SopaEdgeFeature.ACCEPTOR_NBO_OCCUPATION in self._settings.sopa_edge_features:
-            edge_features['acceptor_nbo_occupation'] = acceptor_nbo.occupation
+        Returns:
+            list[list[float]]: List of lists containing the stabilisation energies.
+        """
 
-        for k in self._settings.acceptor_orbital_indices:
-            edge_features['acceptor_nbo_' + ['s', 'p','d', 'f'][k] + '_occupation'] = acceptor_nbo.orbital_occupations[k]
+        return self._resolve_sopa_interactions(stabilisation_energies, None, mode)[0]
 
-        return edge_features
+    def _resolve_sopa_interactions(self, stabilisation_energies: list[list[float]], nbo_ids: list[list[int]], mode: SopaResolutionMode) -> tuple[list[list[float]], list[list[int]]]:
 
-    def _resolve_nbo_ids(self, stabilisation_energies: list[list[float]], nbo_ids: list[list[int]], mode: SopaResolutionMode) -> list[list[int]]:
+        """Resolves the stabilisation energies and NBO ids of all atom pairs according to the SOPA mode specification in
+           one pass. The minimum and maximum stabilisation energies of all atom pairs are determined with segmented
+           reductions over the flattened energies.
 
-        """Helper function to resolve a list of NBO ids based on the stabilisation energies and according to the SOPA mode specification.
+        Raises:
+            ValueError: If the NBO IDs are average-resolved.
 
         Returns:
-            list[list[float]]: List of lists containing the stabilisation energies.
+            tuple[list[list[float]], list[list[int]]]: The resolved stabilisation energies and NBO ID pairs (None if no NBO
+                IDs are given).
         """
 
-        resolved_nbo_ids = []
-
         # keeps all individual stabilisation energies
         if mode == SopaResolutionMode.FULL:
-            return nbo_ids
+            return stabilisation_energies, nbo_ids
         # averages over stabilisation energies belonging to the same atom pair
         elif mode == SopaResolutionMode.AVERAGE:
-            raise ValueError('Cannot average-resolve NBO IDs.')
+            if nbo_ids is not None:
+                raise ValueError('Cannot average-resolve NBO IDs.')
+            return [[mean(x)] for x in stabilisation_energies], None
+        elif mode not in [SopaResolutionMode.MIN_MAX, SopaResolutionMode.MAX, SopaResolutionMode.MIN] or len(stabilisation_energies) == 0:
+            return [], [] if nbo_ids is not None else None
+
+        # flatten groups of stabilisation energies with group offsets
+        group_sizes = np.array([len(x) for x in stabilisation_energies], dtype=int)
+        offsets = np.zeros(len(group_sizes) + 1, dtype=int)
+        offsets[1:] = np.cumsum(group_sizes)
+
+        flat_stabilisation_energies = [x for group in stabilisation_energies for x in group]
+        energies = np.array(flat_stabilisation_energies, dtype=np.float64)
+        group_indices = np.repeat(np.arange(len(group_sizes)), group_sizes)
+
+        # segmented minima and maxima (reduceat over the start offsets of non-empty groups)
+        is_min = np.zeros(len(energies), dtype=bool)
+        is_max = np.zeros(len(energies), dtype=bool)
+        non_empty = group_sizes > 0
+        if np.any(non_empty):
+            group_min = np.zeros(len(group_sizes), dtype=np.float64)
+            group_max = np.zeros(len(group_sizes), dtype=np.float64)
+            group_min[non_empty] = np.minimum.reduceat(energies, offsets[:-1][non_empty])
+            group_max[non_empty] = np.maximum.reduceat(energies, offsets[:-1][non_empty])
+            # all entries equal to the extremum in case the min or max value are degenerate
+            is_min = energies == group_min[group_indices]
+            is_max = energies == group_max[group_indices]
+
         # uses the minimum and maximum values of stabilisation energies belonging to the same atom pair
-        elif mode == SopaResolutionMode.MIN_MAX:
-            for i in range(len(stabilisation_energies)):
-                if len(stabilisation_energies[i]) == 1:
-                    resolved_nbo_ids.append(nbo_ids[i])
-                else:
-                    # get lists of indices in case the max or min value are degenerate
-                    min_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == min(stabilisation_energies[i])]
-                    max_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == max(stabilisation_energies[i])]
-                    unique_indices = list(set(min_indices + max_indices))
-                    min_max_energy_nbo_ids = [nbo_ids[i][idx] for idx in unique_indices]
-                    resolved_nbo_ids.append(min_max_energy_nbo_ids)
-        # gets the NBO IDs corresponding to maximum value of stabilisation energies belonging to the same atom pair
-        elif mode == SopaResolutionMode.MAX:
-            for i in range(len(stabilisation_energies)):
-                max_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == max(stabilisation_energies[i])]
-                max_energy_nbo_ids = [nbo_ids[i][idx] for idx in max_indices]
-                resolved_nbo_ids.append(max_energy_nbo_ids)
-        # gets the NBO IDs corresponding to the minimum value of stabilisation energies belonging to the same atom pair
-        elif mode == SopaResolutionMode.MIN:
-            for i in range(len(stabilisation_energies)):
-                min_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == min(stabilisation_energies[i])]
-                min_energy_nbo_ids = [nbo_ids[i][idx] for idx in min_indices]
-                resolved_nbo_ids.append(min_energy_nbo_ids)
-
-        return resolved_nbo_ids
+        if mode == SopaResolutionMode.MIN_MAX:
+            mask = is_min | is_max
+        # uses the maximum or minimum value of stabilisation energies belonging to the same atom pair
+        else:
+            mask = is_max if mode == SopaResolutionMode.MAX else is_min
 
-    def _resolve_stabilisation_energies(self, stabilisation_energies: list[list[float]], mode: SopaResolutionMode) -> list[list[float]]:
+        # selected entries in ascending order with the group boundaries in the selection
+        selected_indices = np.flatnonzero(mask).tolist()
+        selection_offsets = [0] + np.cumsum(np.bincount(group_indices[mask], minlength=len(group_sizes))).tolist()
+        group_slices = [slice(selection_offsets[i], selection_offsets[i + 1]) for i in range(len(group_sizes))]
 
-        """Helper function to resolve a list of stabilisation energies according to the SOPA mode specification.
+        # min-max selections are ordered like a set of the min and max indices within the group, which is
+        # ascending as long as all indices are below the minimum set size of 8
+        if mode == SopaResolutionMode.MIN_MAX:
+            local_indices = np.arange(len(energies)) - offsets[group_indices]
+            for i in np.unique(group_indices[mask & (local_indices >= 8)]).tolist():
+                group_local_indices = local_indices[offsets[i]:offsets[i + 1]]
+                min_local_indices = group_local_indices[is_min[offsets[i]:offsets[i + 1]]].tolist()
+                max_local_indices = group_local_indices[is_max[offsets[i]:offsets[i + 1]]].tolist()
+                selected_indices[group_slices[i]] = [int(offsets[i]) + idx for idx in set(min_local_indices + max_local_indices)]
 
-        Returns:
-            list[list[float]]: List of lists containing the stabilisation energies.
-        """
+        selected_stabilisation_energies = [flat_stabilisation_energies[k] for k in selected_indices]
+        resolved_stabilisation_energies = [selected_stabilisation_energies[x] for x in group_slices]
 
-        resolved_stabilisation_energies = []
+        if nbo_ids is None:
+            return resolved_stabilisation_energies, None
 
-        # keeps all individual stabilisation energies
-        if mode == SopaResolutionMode.FULL:
-            return stabilisation_energies
-        # averages over stabilisation energies belonging to the same atom pair
-        elif mode == SopaResolutionMode.AVERAGE:
-            for i in range(len(stabilisation_energies)):
-                resolved_stabilisation_energies.append([mean(stabilisation_energies[i])])
-        # uses the minimum and maximum values of stabilisation energies belonging to the same atom pair
-        elif mode == SopaResolutionMode.MIN_MAX:
-            for i in range(len(stabilisation_energies)):
-                if len(stabilisation_energies[i]) == 1:
-                    resolved_stabilisation_energies.append(stabilisation_energies[i])
-                else:
-                    # get lists of indices in case the max or min value are degenerate
-                    min_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == min(stabilisation_energies[i])]
-                    max_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == max(stabilisation_energies[i])]
-                    unique_indices = list(set(min_indices + max_indices))
-                    min_max_energies = [stabilisation_energies[i][idx] for idx in unique_indices]
-                    resolved_stabilisation_energies.append(min_max_energies)
-        # uses the maximum value of stabilisation energies belonging to the same atom pair
-        elif mode == SopaResolutionMode.MAX:
-            for i in range(len(stabilisation_energies)):
-                max_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == max(stabilisation_energies[i])]
-                max_energies = [stabilisation_energies[i][idx] for idx in max_indices]
-                resolved_stabilisation_energies.append(max_energies)
-        # uses the minimum value of stabilisation energies belonging to the same atom pair
-        elif mode == SopaResolutionMode.MIN:
-            for i in range(len(stabilisation_energies)):
-                min_indices = [j for j, x in enumerate(stabilisation_energies[i]) if x == min(stabilisation_energies[i])]
-                min_energies = [stabilisation_energies[i][idx] for idx in min_indices]
-                resolved_stabilisation_energies.append(min_energies)
-
-        return resolved_stabilisation_energies
+        flat_nbo_ids = [x for group in nbo_ids for x in group]
+        selected_nbo_ids = [flat_nbo_ids[k] for k in selected_indices]
+        resolved_nbo_ids = [selected_nbo_ids[x] for x in group_slices]
+
+        return resolved_stabilisation_energies, resolved_nbo_ids
 
     def _get_meta_data(self, qm_data: QmData):
 
@@ -1586,4 +2178,9 @@ class GraphGenerator:
             'element_counts': element_counts
         }
 
+        # number of SOPA entries removed by the prefilter
+        if self._settings.sopa_prefilter_mode not in [None, SopaPrefilterMode.NONE] and self._context is not None and \
+           'n_pruned_sopa_entries' in self._context.keys():
+            meta_data['n_pruned_sopa_entries'] = self._context['n_pruned_sopa_entries']
+
         return meta_data
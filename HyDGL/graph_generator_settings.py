@@ -5,6 +5,7 @@ from .enums.edge_feature import EdgeFeature
 from .enums.graph_feature import GraphFeature
 from .enums.hydrogen_mode import HydrogenMode
 from .enums.sopa_resolution_mode import SopaResolutionMode
+from .enums.sopa_prefilter_mode import SopaPrefilterMode
 from .enums.sopa_edge_feature import SopaEdgeFeature
 from .enums.bond_order_type import BondOrderType
 from .enums.edge_type import EdgeType
@@ -18,8 +19,45 @@ DEFAULT_HYDROGEN_COUNT_THRESHOLD = 0.5
 DEFAULT_SOPA_RESOLUTION_MODE = SopaResolutionMode.AVERAGE
 DEFAULT_SOPA_INTERACTION_THRESHOLD = 0
 DEFAULT_SOPA_CONTRIBUTION_THRESHOLD = 0.5
+DEFAULT_SOPA_PREFILTER_MODE = SopaPrefilterMode.NONE
+DEFAULT_SOPA_PREFILTER_TOP_K = 3
 DEFAULT_MAX_BOND_DISTANCE = 3.0
 
+# QM data fields that are always required to generate graphs
+BASE_QM_DATA_FIELDS = ['id', 'stoichiometry', 'n_atoms', 'atomic_numbers', 'geometric_data', 'charge']
+
+# QM data fields required for the individual targets
+QM_TARGET_FIELDS = {
+    QmTarget.POLARISABILITY: ['polarisability'],
+    QmTarget.NORMALISED_POLARISABILITY: ['polarisability'],
+    QmTarget.SVP_DISPERSION_ENERGY: ['svp_dispersion_energy'],
+    QmTarget.TZVP_DISPERSION_ENERGY: ['tzvp_dispersion_energy'],
+    QmTarget.SVP_ELECTRONIC_ENERGY: ['svp_electronic_energy'],
+    QmTarget.TZVP_ELECTRONIC_ENERGY: ['tzvp_electronic_energy'],
+    QmTarget.SVP_DIPOLE_MOMENT: ['svp_dipole_moment'],
+    QmTarget.TZVP_DIPOLE_MOMENT: ['tzvp_dipole_moment'],
+    QmTarget.SVP_HOMO_ENERGY: ['svp_occupied_orbital_energies'],
+    QmTarget.SVP_LUMO_ENERGY: ['svp_virtual_orbital_energies'],
+    QmTarget.TZVP_HOMO_ENERGY: ['tzvp_occupied_orbital_energies'],
+    QmTarget.TZVP_LUMO_ENERGY: ['tzvp_virtual_orbital_energies'],
+    QmTarget.SVP_HOMO_LUMO_GAP: ['svp_occupied_orbital_energies', 'svp_virtual_orbital_energies'],
+    QmTarget.TZVP_HOMO_LUMO_GAP: ['tzvp_occupied_orbital_energies', 'tzvp_virtual_orbital_energies'],
+    QmTarget.LOWEST_VIBRATIONAL_FREQUENCY: ['frequencies'],
+    QmTarget.HIGHEST_VIBRATIONAL_FREQUENCY: ['frequencies'],
+    QmTarget.HEAT_CAPACITY: ['heat_capacity'],
+    QmTarget.ENTROPY: ['entropy'],
+    QmTarget.ZPE_CORRECTION: ['zpe_correction'],
+    QmTarget.ENTHALPY_ENERGY: ['enthalpy_energy'],
+    QmTarget.GIBBS_ENERGY: ['gibbs_energy'],
+    QmTarget.ENTHALPY_ENERGY_CORRECTION: ['enthalpy_energy', 'svp_electronic_energy'],
+    QmTarget.GIBBS_ENERGY_CORRECTION: ['gibbs_energy', 'svp_electronic_energy'],
+    QmTarget.DISPERSION_ENERGY_DELTA: ['svp_dispersion_energy', 'tzvp_dispersion_energy'],
+    QmTarget.ELECTRONIC_ENERGY_DELTA: ['svp_electronic_energy', 'tzvp_electronic_energy'],
+    QmTarget.DIPOLE_MOMENT_DELTA: ['svp_dipole_moment', 'tzvp_dipole_moment'],
+    QmTarget.HOMO_LUMO_GAP_DELTA: ['svp_occupied_orbital_energies', 'svp_virtual_orbital_energies',
+                                   'tzvp_occupied_orbital_energies', 'tzvp_virtual_orbital_energies']
+}
+
 
 class GraphGeneratorSettings:
 
@@ -40,7 +78,9 @@ class GraphGeneratorSettings:
                  sopa_contribution_threshold: float,
                  bond_threshold: float,
                  bond_threshold_metal: float,
-                 max_bond_distance: float):
+                 max_bond_distance: float,
+                 sopa_prefilter_mode: SopaPrefilterMode = DEFAULT_SOPA_PREFILTER_MODE,
+                 sopa_prefilter_top_k: int = DEFAULT_SOPA_PREFILTER_TOP_K):
 
         """Constructor
 
@@ -60,6 +100,8 @@ class GraphGeneratorSettings:
             bond_threshold (float): Threshold value defining the lower bound for considering bonds.
             bond_threshold_metal (float): Threshold value defining the lower bound for considering metal bonds.
             max_bond_distance (float): The maximum bond distance allowed for considering any bonds.
+            sopa_prefilter_mode (SopaPrefilterMode): Mode that specifies how to prune SOPA entries before they are grouped by atoms.
+            sopa_prefilter_top_k (int): The number of SOPA entries with the highest stabilisation energies to keep per atom pair (TOP_K prefilter mode).
 
         """
 
@@ -92,6 +134,8 @@ class GraphGeneratorSettings:
         self.sopa_resolution_mode = sopa_resolution_mode
         self.sopa_interaction_threshold = sopa_interaction_threshold
         self.sopa_contribution_threshold = sopa_contribution_threshold
+        self.sopa_prefilter_mode = sopa_prefilter_mode
+        self.sopa_prefilter_top_k = sopa_prefilter_top_k
 
         # get orbital lists specifying which orbitals to consider
         # 0 -> s, 1 -> p, 2 -> d, 3 -> f
@@ -125,6 +169,8 @@ class GraphGeneratorSettings:
             self.sopa_resolution_mode == other.sopa_resolution_mode and \
             self.sopa_contribution_threshold == other.sopa_contribution_threshold and \
             self.sopa_edge_features == other.sopa_edge_features and \
+            self.sopa_prefilter_mode == other.sopa_prefilter_mode and \
+            self.sopa_prefilter_top_k == other.sopa_prefilter_top_k and \
             self.max_bond_distance == other.max_bond_distance
 
     @classmethod
@@ -143,7 +189,9 @@ class GraphGeneratorSettings:
                 sopa_resolution_mode: SopaResolutionMode = DEFAULT_SOPA_RESOLUTION_MODE,
                 sopa_interaction_threshold: float = DEFAULT_SOPA_INTERACTION_THRESHOLD,
                 sopa_contribution_threshold: float = DEFAULT_SOPA_CONTRIBUTION_THRESHOLD,
-                max_bond_distance: float = DEFAULT_MAX_BOND_DISTANCE):
+                max_bond_distance: float = DEFAULT_MAX_BOND_DISTANCE,
+                sopa_prefilter_mode: SopaPrefilterMode = DEFAULT_SOPA_PREFILTER_MODE,
+                sopa_prefilter_top_k: int = DEFAULT_SOPA_PREFILTER_TOP_K):
 
         return cls(node_features=node_features,
                    edge_features=edge_features,
@@ -159,7 +207,9 @@ class GraphGeneratorSettings:
                    sopa_resolution_mode=sopa_resolution_mode,
                    sopa_interaction_threshold=sopa_interaction_threshold,
                    sopa_contribution_threshold=sopa_contribution_threshold,
-                   max_bond_distance=max_bond_distance)
+                   max_bond_distance=max_bond_distance,
+                   sopa_prefilter_mode=sopa_prefilter_mode,
+                   sopa_prefilter_top_k=sopa_prefilter_top_k)
 
     @classmethod
     def baseline(cls, targets):
@@ -360,6 +410,124 @@ class GraphGeneratorSettings:
 
         return orbital_indices
 
+    def get_required_qm_data_fields(self) -> list[str]:
+
+        """Determines which QM data fields are needed to generate graphs with these settings.
+
+        Returns:
+            list[str]: List of QM data field names (keys of the QM data dict).
+        """
+
+        fields = list(BASE_QM_DATA_FIELDS)
+
+        # bond orders of the selected mode are used to determine bound hydrogens
+        fields.append(self._get_bond_order_matrix_field(self.bond_order_mode))
+
+        # node features
+        if NodeFeature.NATURAL_ATOMIC_CHARGE in self.node_features:
+            fields.append('natural_atomic_charges')
+        if NodeFeature.NATURAL_ELECTRON_POPULATION_CORE in self.node_features or \
+                NodeFeature.NATURAL_ELECTRON_POPULATION_VALENCE in self.node_features or \
+                NodeFeature.NATURAL_ELECTRON_POPULATION_RYDBERG in self.node_features or \
+                NodeFeature.NATURAL_ELECTRON_POPULATION_TOTAL in self.node_features:
+            fields.append('natural_electron_population')
+        if len(self.natural_orbital_configuration_indices) > 0:
+            fields.append('natural_electron_configuration')
+        if NodeFeature.WIBERG_BOND_ORDER_TOTAL in self.node_features:
+            fields.append('wiberg_bond_order_matrix')
+        if NodeFeature.LMO_BOND_ORDER_TOTAL in self.node_features:
+            fields.append('lmo_bond_order_matrix')
+        if NodeFeature.NLMO_BOND_ORDER_TOTAL in self.node_features:
+            fields.append('nlmo_bond_order_matrix')
+
+        # edge features
+        if EdgeFeature.WIBERG_BOND_ORDER in self.edge_features or \
+                EdgeFeature.WIBERG_BOND_ORDER_INT in self.edge_features:
+            fields.append('wiberg_bond_order_matrix')
+        if EdgeFeature.LMO_BOND_ORDER in self.edge_features:
+            fields.append('lmo_bond_order_matrix')
+        if EdgeFeature.NLMO_BOND_ORDER in self.edge_features:
+            fields.append('nlmo_bond_order_matrix')
+
+        # NBO data
+        if len(self.get_required_nbo_types()) > 0:
+            fields.append('nbo_data')
+
+        # SOPA data
+        if EdgeType.SOPA in self.edge_types:
+            fields.append('sopa_data')
+
+        # graph features
+        if GraphFeature.MOLECULAR_MASS in self.graph_features:
+            fields.append('molecular_mass')
+
+        # targets
+        for target in self.targets:
+            fields.extend(QM_TARGET_FIELDS.get(target, []))
+
+        # remove duplicates keeping the order
+        return list(dict.fromkeys(fields))
+
+    def get_required_nbo_types(self) -> list[NboType]:
+
+        """Determines which NBO types are needed to generate graphs with these settings.
+
+        Returns:
+            list[NboType]: List of NBO types.
+        """
+
+        # SOPA interactions can refer to NBOs of any type
+        if EdgeType.SOPA in self.edge_types:
+            return list(NboType)
+
+        nbo_types = []
+
+        # bond and 3c bond NBOs determine NBO edges and edge labels
+        if EdgeType.NBO_BONDING_ORBITALS in self.edge_types or \
+                EdgeType.BOND_ORDER_METAL in self.edge_types or \
+                EdgeType.BOND_ORDER_NON_METAL in self.edge_types:
+            nbo_types.extend([NboType.BOND, NboType.THREE_CENTER_BOND])
+
+        # edge features
+        if EdgeFeature.NBO_TYPE in self.edge_features or \
+                EdgeFeature.BOND_ORBITAL_MAX in self.edge_features or \
+                EdgeFeature.BOND_ORBITAL_AVERAGE in self.edge_features or \
+                EdgeFeature.BOND_ENERGY_MIN_MAX_DIFFERENCE in self.edge_features:
+            nbo_types.extend([NboType.BOND, NboType.THREE_CENTER_BOND])
+        if EdgeFeature.ANTIBOND_ORBITAL_MIN in self.edge_features or \
+                EdgeFeature.ANTIBOND_ORBITAL_AVERAGE in self.edge_features or \
+                EdgeFeature.ANTIBOND_ENERGY_MIN_MAX_DIFFERENCE in self.edge_features:
+            nbo_types.extend([NboType.BOND, NboType.THREE_CENTER_BOND, NboType.ANTIBOND,
+                              NboType.THREE_CENTER_ANTIBOND, NboType.THREE_CENTER_NONBOND])
+
+        # node features
+        if NodeFeature.LONE_PAIR_MAX in self.node_features or \
+                NodeFeature.LONE_PAIR_AVERAGE in self.node_features or \
+                NodeFeature.LONE_PAIR_ENERGY_MIN_MAX_DIFFERENCE in self.node_features:
+            nbo_types.append(NboType.LONE_PAIR)
+        if NodeFeature.LONE_VACANCY_MIN in self.node_features or \
+                NodeFeature.LONE_VACANCY_AVERAGE in self.node_features or \
+                NodeFeature.LONE_VACANCY_ENERGY_MIN_MAX_DIFFERENCE in self.node_features:
+            nbo_types.append(NboType.LONE_VACANCY)
+
+        # remove duplicates keeping the order
+        return list(dict.fromkeys(nbo_types))
+
+    def _get_bond_order_matrix_field(self, bond_order_type: BondOrderType) -> str:
+
+        """Helper function to get the QM data field name of the bond order matrix of the specified type.
+
+        Returns:
+            str: The field name.
+        """
+
+        if bond_order_type == BondOrderType.LMO:
+            return 'lmo_bond_order_matrix'
+        elif bond_order_type == BondOrderType.NLMO:
+            return 'nlmo_bond_order_matrix'
+        # Wiberg is also used as default by the graph generator
+        return 'wiberg_bond_order_matrix'
+
     def get_nbo_orbital_indices_by_type(self, nbo_type: NboType):
 
         if nbo_type == NboType.LONE_PAIR:
@@ -85,3 +85,20 @@ class NboDataPoint:
             if self.atom_indices[i:i + 2] == indices:
                 return True
         return False
+
+    def get_contained_atom_indices(self) -> list[tuple[int]]:
+
+        """Helper function to get all atom index combinations for which contains_atom_indices() is true.
+
+        Returns:
+            list[tuple[int]]: The contained atom index combinations.
+        """
+
+        contained_atom_indices = [tuple(self.atom_indices)]
+
+        # consecutive atom pairs for 3c
+        for i in range(len(self.atom_indices) - 1):
+            if tuple(self.atom_indices[i:i + 2]) not in contained_atom_indices:
+                contained_atom_indices.append(tuple(self.atom_indices[i:i + 2]))
+
+        return contained_atom_indices
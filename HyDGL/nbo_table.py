@@ -0,0 +1,259 @@
+from typing import Union
+
+import numpy as np
+
+from .nbo_data_point import NboDataPoint
+from .enums.nbo_type import NboType
+
+
+class _NboRowCache:
+
+    """Helper class that holds the NBO data points created from the rows of a table and its views. The data
+       points are not pickled."""
+
+    def __init__(self, n_rows: int):
+        self.rows = [None] * n_rows
+
+    def __getstate__(self):
+        return {'rows': [None] * len(self.rows)}
+
+
+class NboTable:
+
+    """Class for storing NBO data in columnar form. Rows keep the order of the input. Type-filtered tables
+       are views on the same underlying arrays if the rows of the type are contiguous."""
+
+    # NBO type identifiers in the order of their type codes
+    nbo_type_identifiers = ['LP', 'LV', 'BD', 'BD*', '3C', '3C*', '3Cn']
+
+    nbo_type_codes = {
+        NboType.LONE_PAIR: 0,
+        NboType.LONE_VACANCY: 1,
+        NboType.BOND: 2,
+        NboType.ANTIBOND: 3,
+        NboType.THREE_CENTER_BOND: 4,
+        NboType.THREE_CENTER_ANTIBOND: 5,
+        NboType.THREE_CENTER_NONBOND: 6
+    }
+
+    def __init__(self,
+                 nbo_ids: np.ndarray,
+                 type_codes: np.ndarray,
+                 energies: np.ndarray,
+                 occupations: np.ndarray,
+                 orbital_occupations: np.ndarray,
+                 atom_index_offsets: np.ndarray,
+                 atom_indices: np.ndarray,
+                 contributions: np.ndarray,
+                 type_identifiers: list[str] = None,
+                 row_cache: _NboRowCache = None,
+                 row_positions: Union[range, list[int]] = None):
+
+        """Constructor
+
+        Args:
+            nbo_ids (np.ndarray): The NBO IDs.
+            type_codes (np.ndarray): The NBO type codes (indices into type_identifiers).
+            energies (np.ndarray): The NBO energies.
+            occupations (np.ndarray): The NBO occupations.
+            orbital_occupations (np.ndarray): N x 4 matrix of s, p, d, f orbital occupations.
+            atom_index_offsets (np.ndarray): N + 1 offsets into atom_indices and contributions (CSR layout).
+            atom_indices (np.ndarray): Concatenated atom indices of all NBOs.
+            contributions (np.ndarray): Concatenated atom contributions of all NBOs.
+            type_identifiers (list[str]): Identifiers of the type codes. Defaults to the known NBO types.
+            row_cache (_NboRowCache): Cache of created NBO data points shared with the table this is a view of.
+            row_positions (Union[range, list[int]]): The positions of the rows in the row cache.
+        """
+
+        # check for consistent row counts
+        assert len(nbo_ids) == len(type_codes) == len(energies) == len(occupations) == len(orbital_occupations)
+        assert len(atom_index_offsets) == len(nbo_ids) + 1
+
+        self._nbo_ids = nbo_ids
+        self._type_codes = type_codes
+        self._energies = energies
+        self._occupations = occupations
+        self._orbital_occupations = orbital_occupations
+        self._atom_index_offsets = atom_index_offsets
+        self._atom_indices = atom_indices
+        self._contributions = contributions
+
+        if type_identifiers is None:
+            type_identifiers = list(NboTable.nbo_type_identifiers)
+        self._type_identifiers = type_identifiers
+
+        # NBO data points are created once per row on first access
+        if row_cache is None:
+            row_cache = _NboRowCache(len(nbo_ids))
+            row_positions = range(len(nbo_ids))
+        self._row_cache = row_cache
+        self._row_positions = row_positions
+
+    @classmethod
+    def from_list(cls, nbo_data: list[list]):
+
+        """Overloaded constructor to initialise from a list of ordered NBO lists (see NboDataPoint.from_list)."""
+
+        type_identifiers = list(cls.nbo_type_identifiers)
+
+        # get type codes and append unknown NBO types
+        type_codes = []
+        for nbo_data_point in nbo_data:
+            if nbo_data_point[1] not in type_identifiers:
+                type_identifiers.append(nbo_data_point[1])
+            type_codes.append(type_identifiers.index(nbo_data_point[1]))
+
+        atom_index_offsets = np.zeros(len(nbo_data) + 1, dtype=np.int32)
+        atom_index_offsets[1:] = np.cumsum([len(x[2]) for x in nbo_data])
+
+        return cls(nbo_ids=np.array([x[0] for x in nbo_data], dtype=np.int32),
+                   type_codes=np.array(type_codes, dtype=np.int8),
+                   energies=np.array([x[3] for x in nbo_data], dtype=np.float64),
+                   occupations=np.array([x[5] for x in nbo_data], dtype=np.float64),
+                   orbital_occupations=np.array([x[6] for x in nbo_data], dtype=np.float64).reshape(len(nbo_data), 4),
+                   atom_index_offsets=atom_index_offsets,
+                   atom_indices=np.array([index for x in nbo_data for index in x[2]], dtype=np.int32),
+                   contributions=np.array([contribution for x in nbo_data for contribution in x[4]], dtype=np.float64),
+                   type_identifiers=type_identifiers)
+
+    def __len__(self):
+        return len(self._nbo_ids)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> NboDataPoint:
+
+        """Gets a single row as NboDataPoint.
+
+        Returns:
+            NboDataPoint: The NBO data point.
+        """
+
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('NboTable index out of range.')
+
+        row_position = self._row_positions[i]
+        nbo_data_point = self._row_cache.rows[row_position]
+        if nbo_data_point is not None:
+            return nbo_data_point
+
+        start = self._atom_index_offsets[i]
+        end = self._atom_index_offsets[i + 1]
+
+        nbo_data_point = NboDataPoint(nbo_id=int(self._nbo_ids[i]),
+                                      nbo_type=self._type_identifiers[self._type_codes[i]],
+                                      atom_indices=self._atom_indices[start:end].tolist(),
+                                      energy=float(self._energies[i]),
+                                      occupation=float(self._occupations[i]),
+                                      orbital_occupations=self._orbital_occupations[i].tolist(),
+                                      contributions=self._contributions[start:end].tolist())
+        self._row_cache.rows[row_position] = nbo_data_point
+
+        return nbo_data_point
+
+    @property
+    def nbo_ids(self):
+        """Getter for nbo_ids"""
+        return self._nbo_ids
+
+    @property
+    def type_codes(self):
+        """Getter for type_codes"""
+        return self._type_codes
+
+    @property
+    def nbo_types(self):
+        """Getter for the NBO type identifiers of all rows"""
+        return [self._type_identifiers[code] for code in self._type_codes]
+
+    @property
+    def type_identifiers(self):
+        """Getter for type_identifiers"""
+        return self._type_identifiers
+
+    @property
+    def energies(self):
+        """Getter for energies"""
+        return self._energies
+
+    @property
+    def occupations(self):
+        """Getter for occupations"""
+        return self._occupations
+
+    @property
+    def orbital_occupations(self):
+        """Getter for orbital_occupations"""
+        return self._orbital_occupations
+
+    @property
+    def atom_index_offsets(self):
+        """Getter for atom_index_offsets"""
+        return self._atom_index_offsets
+
+    @property
+    def atom_indices(self):
+        """Getter for atom_indices"""
+        return self._atom_indices
+
+    @property
+    def contributions(self):
+        """Getter for contributions"""
+        return self._contributions
+
+    def get_view(self, nbo_type: NboType):
+
+        """Gets the rows of the specified NBO type as a table. The table shares the underlying arrays (no copy)
+           if the rows of the type are contiguous and holds copies of the rows otherwise.
+
+        Raises:
+            ValueError: If the NBO type is not recognised.
+
+        Returns:
+            NboTable: The type-filtered table.
+        """
+
+        if nbo_type not in NboTable.nbo_type_codes.keys():
+            raise ValueError('NboType ' + str(nbo_type) + ' not recognized.')
+
+        rows = np.flatnonzero(self._type_codes == NboTable.nbo_type_codes[nbo_type])
+
+        # contiguous rows (e.g. NBO data grouped by type) --> view
+        if len(rows) == 0 or rows[-1] - rows[0] + 1 == len(rows):
+
+            start = int(rows[0]) if len(rows) > 0 else 0
+            end = start + len(rows)
+
+            return NboTable(nbo_ids=self._nbo_ids[start:end],
+                            type_codes=self._type_codes[start:end],
+                            energies=self._energies[start:end],
+                            occupations=self._occupations[start:end],
+                            orbital_occupations=self._orbital_occupations[start:end],
+                            atom_index_offsets=self._atom_index_offsets[start:end + 1],
+                            atom_indices=self._atom_indices,
+                            contributions=self._contributions,
+                            type_identifiers=self._type_identifiers,
+                            row_cache=self._row_cache,
+                            row_positions=self._row_positions[start:end])
+
+        # gather the atom indices and contributions of the selected rows
+        lengths = self._atom_index_offsets[rows + 1] - self._atom_index_offsets[rows]
+        atom_index_offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+        atom_index_offsets[1:] = np.cumsum(lengths)
+        positions = np.repeat(self._atom_index_offsets[rows] - atom_index_offsets[:-1], lengths) + np.arange(atom_index_offsets[-1])
+
+        return NboTable(nbo_ids=self._nbo_ids[rows],
+                        type_codes=self._type_codes[rows],
+                        energies=self._energies[rows],
+                        occupations=self._occupations[rows],
+                        orbital_occupations=self._orbital_occupations[rows],
+                        atom_index_offsets=atom_index_offsets,
+                        atom_indices=self._atom_indices[positions],
+                        contributions=self._contributions[positions],
+                        type_identifiers=self._type_identifiers,
+                        row_cache=self._row_cache,
+                        row_positions=[self._row_positions[i] for i in rows.tolist()])
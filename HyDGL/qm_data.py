@@ -1,7 +1,18 @@
+from functools import cached_property
+
+import numpy as np
+
+from .nbo_table import NboTable
+from .sopa_table import SopaTable
 from .nbo_data_point import NboDataPoint
+from .atom_nbo_statistics import AtomNboStatistics
 from .tools import Tools
 from .enums.nbo_type import NboType
 
+# members that are generated from the NBO data
+NBO_DERIVED_FIELDS = ['lone_pair_data', 'lone_vacancy_data', 'bond_pair_data', 'antibond_pair_data',
+                      'bond_3c_data', 'antibond_3c_data', 'nonbond_3c_data', 'nbo_index']
+
 
 class QmData():
 
@@ -39,7 +50,9 @@ class QmData():
                  lmo_bond_order_matrix: list[list[float]],
                  nlmo_bond_order_matrix: list[list[float]],
                  nbo_data: list[list],
-                 sopa_data) -> None:
+                 sopa_data,
+                 use_nbo_table: bool = False,
+                 lazy: bool = False) -> None:
 
         # misc
         self.id = id
@@ -54,8 +67,6 @@ class QmData():
         self.molecular_mass = molecular_mass
         self.polarisability = polarisability
 
-        self.bond_distance_matrix = Tools.calculate_distance_matrix(geometric_data)
-
         # energies
         self.svp_dispersion_energy = svp_dispersion_energy
         self.tzvp_dispersion_energy = tzvp_dispersion_energy
@@ -66,15 +77,6 @@ class QmData():
         self.svp_dipole_moment = svp_dipole_moment
         self.tzvp_dipole_moment = tzvp_dipole_moment
 
-        # orbital data
-        self.svp_occupied_orbital_energies = svp_occupied_orbital_energies
-        self.tzvp_occupied_orbital_energies = tzvp_occupied_orbital_energies
-        self.svp_virtual_orbital_energies = svp_virtual_orbital_energies
-        self.tzvp_virtual_orbital_energies = tzvp_virtual_orbital_energies
-
-        # vibrational frequencies
-        self.frequencies = frequencies
-
         # thermo chemistry
         self.heat_capacity = heat_capacity
         self.entropy = entropy
@@ -82,66 +84,236 @@ class QmData():
         self.zpe_correction = zpe_correction
         self.enthalpy_energy = enthalpy_energy
         self.gibbs_energy = gibbs_energy
-        # calculate ZPE, thermal, and internal energy corrections
-        self.enthalpy_energy_correction = self.enthalpy_energy - self.svp_electronic_energy
-        # calculate ZPE, thermal, internal, and entropy energy corrections
-        self.gibbs_energy_correction = self.gibbs_energy - self.svp_electronic_energy
 
         # electronic data
         self.natural_atomic_charges = natural_atomic_charges
         self.natural_electron_configuration = natural_electron_configuration
         self.natural_electron_population = natural_electron_population
 
-        # bond data
-        self.wiberg_bond_order_matrix = wiberg_bond_order_matrix
-        # lmo bond data
-        self.lmo_bond_order_matrix = lmo_bond_order_matrix
-        # nbo bond data
-        self.nlmo_bond_order_matrix = nlmo_bond_order_matrix
+        # heavy data (orbital data, vibrational frequencies, bond data, NBO and SOPA data)
+        heavy_data = {
+            'svp_occupied_orbital_energies': svp_occupied_orbital_energies,
+            'tzvp_occupied_orbital_energies': tzvp_occupied_orbital_energies,
+            'svp_virtual_orbital_energies': svp_virtual_orbital_energies,
+            'tzvp_virtual_orbital_energies': tzvp_virtual_orbital_energies,
+            'frequencies': frequencies,
+            'wiberg_bond_order_matrix': wiberg_bond_order_matrix,
+            'lmo_bond_order_matrix': lmo_bond_order_matrix,
+            'nlmo_bond_order_matrix': nlmo_bond_order_matrix,
+            'nbo_data': nbo_data,
+            'sopa_data': sopa_data
+        }
+
+        # NBO and SOPA data are stored either as lists or in columnar form
+        self._use_nbo_table = use_nbo_table
+
+        # in lazy mode heavy data is kept as given and only set up on first access
+        self._deferred_data = {}
+        if lazy:
+            self._deferred_data = heavy_data
+        else:
+            for name in heavy_data.keys():
+                self._set_heavy_field(name, heavy_data[name])
 
-        # NBO data
-        self.nbo_data = [NboDataPoint.from_list(nbo_data_point) for nbo_data_point in nbo_data]
-        # data for NBO SOPA
-        self.sopa_data = sopa_data
+    @classmethod
+    def from_dict(cls, qm_data_dict: dict, use_nbo_table: bool = False, lazy: bool = False,
+                  fields: list[str] = None, nbo_types: list[NboType] = None):
+
+        """Overloaded constructor to initialise from a QM data dict. Fields that are not requested are set to None
+           (see GraphGeneratorSettings.get_required_qm_data_fields() and get_required_nbo_types()).
+
+        Args:
+            qm_data_dict (dict): The QM data dict.
+            use_nbo_table (bool): Whether to store the NBO and SOPA data in columnar form.
+            lazy (bool): Whether to defer the setup of heavy fields to first access.
+            fields (list[str]): The fields to load. Defaults to all fields.
+            nbo_types (list[NboType]): The NBO types to load. Defaults to all NBO types.
+        """
+
+        def get_field(key: str):
+            # skip fields that were not requested
+            if fields is not None and key not in fields:
+                return None
+            return qm_data_dict[key]
+
+        nbo_data = get_field('nbo_data')
+        if nbo_data is not None and nbo_types is not None:
+            nbo_type_identifiers = [NboTable.nbo_type_identifiers[NboTable.nbo_type_codes[x]] for x in nbo_types]
+            nbo_data = [x for x in nbo_data if x[1] in nbo_type_identifiers]
+
+        return cls(id=get_field('id'),
+                   stoichiometry=get_field('stoichiometry'),
+                   n_atoms=get_field('n_atoms'),
+                   atomic_numbers=get_field('atomic_numbers'),
+                   geometric_data=get_field('geometric_data'),
+                   charge=get_field('charge'),
+                   molecular_mass=get_field('molecular_mass'),
+                   polarisability=get_field('polarisability'),
+                   svp_dispersion_energy=get_field('svp_dispersion_energy'),
+                   tzvp_dispersion_energy=get_field('tzvp_dispersion_energy'),
+                   svp_electronic_energy=get_field('svp_electronic_energy'),
+                   tzvp_electronic_energy=get_field('tzvp_electronic_energy'),
+                   svp_dipole_moment=get_field('svp_dipole_moment'),
+                   tzvp_dipole_moment=get_field('tzvp_dipole_moment'),
+                   svp_occupied_orbital_energies=get_field('svp_occupied_orbital_energies'),
+                   tzvp_occupied_orbital_energies=get_field('tzvp_occupied_orbital_energies'),
+                   svp_virtual_orbital_energies=get_field('svp_virtual_orbital_energies'),
+                   tzvp_virtual_orbital_energies=get_field('tzvp_virtual_orbital_energies'),
+                   frequencies=get_field('frequencies'),
+                   heat_capacity=get_field('heat_capacity'),
+                   entropy=get_field('entropy'),
+                   zpe_correction=get_field('zpe_correction'),
+                   enthalpy_energy=get_field('enthalpy_energy'),
+                   gibbs_energy=get_field('gibbs_energy'),
+                   natural_atomic_charges=get_field('natural_atomic_charges'),
+                   natural_electron_configuration=get_field('natural_electron_configuration'),
+                   natural_electron_population=get_field('natural_electron_population'),
+                   wiberg_bond_order_matrix=get_field('wiberg_bond_order_matrix'),
+                   lmo_bond_order_matrix=get_field('lmo_bond_order_matrix'),
+                   nlmo_bond_order_matrix=get_field('nlmo_bond_order_matrix'),
+                   nbo_data=nbo_data,
+                   sopa_data=get_field('sopa_data'),
+                   use_nbo_table=use_nbo_table,
+                   lazy=lazy)
+
+    def __getattr__(self, name: str):
+
+        """Sets up deferred heavy fields on first access (lazy mode). Only called if regular attribute lookup fails."""
+
+        deferred_data = self.__dict__.get('_deferred_data')
+
+        if deferred_data:
+
+            if name in deferred_data.keys():
+                self._set_heavy_field(name, deferred_data.pop(name))
+                return self.__dict__[name]
+
+            # members derived from the NBO data
+            if name in NBO_DERIVED_FIELDS and 'nbo_data' in deferred_data.keys():
+                self._set_heavy_field('nbo_data', deferred_data.pop('nbo_data'))
+                return self.__dict__[name]
+
+        # objects pickled before the NBO index was added --> generate it from the NBO data
+        if name == 'nbo_index' and self.__dict__.get('nbo_data') is not None:
+            self._set_nbo_index()
+            return self.__dict__[name]
+
+        raise AttributeError('\'' + type(self).__name__ + '\' object has no attribute \'' + name + '\'')
+
+    def __getstate__(self):
+
+        """Excludes members that are calculated on first access (cached properties and the NBO index) from the
+           pickled state."""
+
+        return {key: value for key, value in self.__dict__.items()
+                if key != 'nbo_index' and not isinstance(getattr(type(self), key, None), cached_property)}
+
+    def _set_heavy_field(self, name: str, value):
+
+        """Sets a heavy field as member. NBO data is converted and the derived NBO members are generated.
+           Fields may also be given as numpy arrays (e.g. memory-mapped from a binary container), SOPA data
+           as tuple of NBO ID pairs and energies or SopaTable and NBO data as NboTable."""
+
+        if name == 'nbo_data' and value is not None:
+
+            # NBO data (either as list of data points or in columnar form)
+            if isinstance(value, NboTable):
+                self.nbo_data = value if self._use_nbo_table else list(value)
+            elif self._use_nbo_table:
+                self.nbo_data = NboTable.from_list(value)
+            else:
+                self.nbo_data = [NboDataPoint.from_list(nbo_data_point) for nbo_data_point in value]
+
+            # get individual lists for LP, LV, BD, BD*
+            self._set_nbo_individual_lists()
+            # get lookup from NBO ID to NBO data
+            self._set_nbo_index()
+
+        elif name == 'sopa_data' and value is not None:
+
+            # SOPA data (either as list of entries or in columnar form)
+            if isinstance(value, tuple):
+                value = SopaTable.from_arrays(*value)
+
+            if isinstance(value, SopaTable):
+                self.sopa_data = value if self._use_nbo_table else list(value)
+            elif self._use_nbo_table:
+                self.sopa_data = SopaTable.from_list(value)
+            else:
+                self.sopa_data = value
+
+            # resolve the positions of donor and acceptor NBOs if the NBO data is already set up
+            if isinstance(self.sopa_data, SopaTable) and 'nbo_index' in self.__dict__:
+                self.sopa_data = self.sopa_data.resolve_nbo_indices(self.nbo_index)
+
+        elif isinstance(value, np.ndarray):
+            setattr(self, name, value.tolist())
 
-        # get individual lists for LP, LV, BD, BD*
-        self._set_nbo_individual_lists()
+        else:
+            setattr(self, name, value)
 
-    @classmethod
-    def from_dict(cls, qm_data_dict: dict):
-
-        return cls(id=qm_data_dict['id'],
-                   stoichiometry=qm_data_dict['stoichiometry'],
-                   n_atoms=qm_data_dict['n_atoms'],
-                   atomic_numbers=qm_data_dict['atomic_numbers'],
-                   geometric_data=qm_data_dict['geometric_data'],
-                   charge=qm_data_dict['charge'],
-                   molecular_mass=qm_data_dict['molecular_mass'],
-                   polarisability=qm_data_dict['polarisability'],
-                   svp_dispersion_energy=qm_data_dict['svp_dispersion_energy'],
-                   tzvp_dispersion_energy=qm_data_dict['tzvp_dispersion_energy'],
-                   svp_electronic_energy=qm_data_dict['svp_electronic_energy'],
-                   tzvp_electronic_energy=qm_data_dict['tzvp_electronic_energy'],
-                   svp_dipole_moment=qm_data_dict['svp_dipole_moment'],
-                   tzvp_dipole_moment=qm_data_dict['tzvp_dipole_moment'],
-                   svp_occupied_orbital_energies=qm_data_dict['svp_occupied_orbital_energies'],
-                   tzvp_occupied_orbital_energies=qm_data_dict['tzvp_occupied_orbital_energies'],
-                   svp_virtual_orbital_energies=qm_data_dict['svp_virtual_orbital_energies'],
-                   tzvp_virtual_orbital_energies=qm_data_dict['tzvp_virtual_orbital_energies'],
-                   frequencies=qm_data_dict['frequencies'],
-                   heat_capacity=qm_data_dict['heat_capacity'],
-                   entropy=qm_data_dict['entropy'],
-                   zpe_correction=qm_data_dict['zpe_correction'],
-                   enthalpy_energy=qm_data_dict['enthalpy_energy'],
-                   gibbs_energy=qm_data_dict['gibbs_energy'],
-                   natural_atomic_charges=qm_data_dict['natural_atomic_charges'],
-                   natural_electron_configuration=qm_data_dict['natural_electron_configuration'],
-                   natural_electron_population=qm_data_dict['natural_electron_population'],
-                   wiberg_bond_order_matrix=qm_data_dict['wiberg_bond_order_matrix'],
-                   lmo_bond_order_matrix=qm_data_dict['lmo_bond_order_matrix'],
-                   nlmo_bond_order_matrix=qm_data_dict['nlmo_bond_order_matrix'],
-                   nbo_data=qm_data_dict['nbo_data'],
-                   sopa_data=qm_data_dict['sopa_data'])
+    @cached_property
+    def bond_distance_array(self):
+        """Getter for the bond distance matrix as numpy array (calculated on first access)."""
+        return Tools.calculate_distance_array(self.geometric_data)
+
+    @cached_property
+    def bond_distance_matrix(self):
+        """Getter for the bond distance matrix (calculated on first access)."""
+        return self.bond_distance_array.tolist()
+
+    @property
+    def sopa_table(self):
+        """Getter for the SOPA data in columnar form with resolved donor and acceptor NBO positions. In table mode the
+           resolved table replaces the SOPA data, in list mode it is set up on each access and not kept."""
+
+        if isinstance(self.sopa_data, SopaTable):
+            if not self.sopa_data.has_nbo_indices:
+                self.sopa_data = self.sopa_data.resolve_nbo_indices(self.nbo_index)
+            return self.sopa_data
+
+        return SopaTable.from_list(self.sopa_data).resolve_nbo_indices(self.nbo_index)
+
+    @cached_property
+    def lone_pair_statistics(self):
+        """Getter for the per-atom lone pair statistics (calculated on first access)."""
+        return AtomNboStatistics(self.lone_pair_data, self.n_atoms)
+
+    @cached_property
+    def lone_vacancy_statistics(self):
+        """Getter for the per-atom lone vacancy statistics (calculated on first access)."""
+        return AtomNboStatistics(self.lone_vacancy_data, self.n_atoms)
+
+    @cached_property
+    def nbo_atom_indices_lookup(self):
+        """Getter for the dict that maps NBO types and contained atom indices to NBO data (calculated on first access)."""
+
+        nbo_atom_indices_lookup = {}
+        for nbo_type in NboType:
+
+            type_lookup = {}
+            for nbo_data_point in self.get_nbo_data_by_type(nbo_type):
+                for atom_indices in nbo_data_point.get_contained_atom_indices():
+                    type_lookup.setdefault(atom_indices, []).append(nbo_data_point)
+
+            nbo_atom_indices_lookup[nbo_type] = type_lookup
+
+        return nbo_atom_indices_lookup
+
+    @cached_property
+    def nbo_energy_lookup(self):
+        """Getter for the dict that maps NBO types and energies to the first NBO with that energy (calculated on first access)."""
+
+        nbo_energy_lookup = {}
+        for nbo_type in NboType:
+
+            type_lookup = {}
+            for nbo_data_point in self.get_nbo_data_by_type(nbo_type):
+                type_lookup.setdefault(nbo_data_point.energy, nbo_data_point)
+
+            nbo_energy_lookup[nbo_type] = type_lookup
+
+        return nbo_energy_lookup
 
     @property
     def lowest_vibrational_frequency(self):
@@ -173,55 +345,76 @@ class QmData():
         """Getter for the TZVP LUMO energy."""
         return self.tzvp_virtual_orbital_energies[0]
 
-    @property
+    @cached_property
     def svp_homo_lumo_gap(self):
         """Getter for the SVP HOMO-LUMO gap."""
         return self.svp_lumo_energy - self.svp_homo_energy
 
-    @property
+    @cached_property
     def tzvp_homo_lumo_gap(self):
         """Getter for the TZVP HOMO-LUMO gap."""
         return self.tzvp_lumo_energy - self.tzvp_homo_energy
 
-    @property
+    @cached_property
     def wiberg_bond_order_totals(self):
         """Getter for the Wiberg bond order totals."""
-        return [sum(bond_orders) for bond_orders in self.wiberg_bond_order_matrix]
+        return np.sum(np.asarray(self.wiberg_bond_order_matrix, dtype=float), axis=1).tolist()
 
-    @property
+    @cached_property
     def lmo_bond_order_totals(self):
         """Getter for the LMO bond order totals."""
-        return [sum(bond_orders) for bond_orders in self.lmo_bond_order_matrix]
+        return np.sum(np.asarray(self.lmo_bond_order_matrix, dtype=float), axis=1).tolist()
 
-    @property
+    @cached_property
     def nlmo_bond_order_totals(self):
         """Getter for the NLMO bond order totals."""
-        return [sum(bond_orders) for bond_orders in self.nlmo_bond_order_matrix]
+        return np.sum(np.asarray(self.nlmo_bond_order_matrix, dtype=float), axis=1).tolist()
 
-    @property
+    @cached_property
     def dispersion_energy_delta(self):
         """Getter for the dispersion energy SVP-TZVP delta."""
         return self.tzvp_dispersion_energy - self.svp_dispersion_energy
 
-    @property
+    @cached_property
     def electronic_energy_delta(self):
         """Getter for the electronic energy SVP-TZVP delta."""
         return self.tzvp_electronic_energy - self.svp_electronic_energy
 
-    @property
+    @cached_property
     def dipole_moment_delta(self):
         """Getter for the dipole moment SVP-TZVP delta."""
         return self.tzvp_dipole_moment - self.svp_dipole_moment
 
-    @property
+    @cached_property
     def homo_lumo_gap_delta(self):
         """Getter for the HOMO-LUMO SVP-TZVP delta."""
         return self.tzvp_homo_lumo_gap - self.svp_homo_lumo_gap
 
+    @cached_property
+    def enthalpy_energy_correction(self):
+        """Getter for the enthalpy energy correction (ZPE, thermal, and internal energy corrections)."""
+        return self.enthalpy_energy - self.svp_electronic_energy
+
+    @cached_property
+    def gibbs_energy_correction(self):
+        """Getter for the Gibbs energy correction (ZPE, thermal, internal, and entropy energy corrections)."""
+        return self.gibbs_energy - self.svp_electronic_energy
+
     def _set_nbo_individual_lists(self):
 
         """Generates individual lists for all the different NBO types and adds them as members."""
 
+        # columnar NBO data is already grouped by type
+        if isinstance(self.nbo_data, NboTable):
+            self.lone_pair_data = self.nbo_data.get_view(NboType.LONE_PAIR)
+            self.lone_vacancy_data = self.nbo_data.get_view(NboType.LONE_VACANCY)
+            self.bond_pair_data = self.nbo_data.get_view(NboType.BOND)
+            self.antibond_pair_data = self.nbo_data.get_view(NboType.ANTIBOND)
+            self.bond_3c_data = self.nbo_data.get_view(NboType.THREE_CENTER_BOND)
+            self.antibond_3c_data = self.nbo_data.get_view(NboType.THREE_CENTER_ANTIBOND)
+            self.nonbond_3c_data = self.nbo_data.get_view(NboType.THREE_CENTER_NONBOND)
+            return
+
         lone_pair_data = []
         lone_vacancy_data = []
         bond_pair_data = []
@@ -262,8 +455,46 @@ class QmData():
         self.antibond_3c_data = antibond_3c_data
         self.nonbond_3c_data = nonbond_3c_data
 
+    def _set_nbo_index(self):
+
+        """Generates a dict that maps NBO IDs to their position in the NBO data list and adds it as member."""
+
+        if isinstance(self.nbo_data, NboTable):
+            nbo_ids = self.nbo_data.nbo_ids.tolist()
+        else:
+            nbo_ids = [nbo_data_point.nbo_id for nbo_data_point in self.nbo_data]
+
+        nbo_index = {}
+        for i in range(len(nbo_ids)):
+            # keep first occurrence in case of duplicate IDs
+            nbo_index.setdefault(nbo_ids[i], i)
+
+        self.nbo_index = nbo_index
+
+    def get_nbo_by_id(self, nbo_id: int) -> NboDataPoint:
+
+        """Gets the NBO data point with the specified ID.
+
+        Returns:
+            NboDataPoint: The NBO data point or None if the ID is not present.
+        """
+
+        nbo_list_index = self.nbo_index.get(nbo_id)
+        if nbo_list_index is None:
+            return None
+        return self.nbo_data[nbo_list_index]
+
     def get_nbo_data_by_type(self, nbo_type: NboType):
 
+        """Gets the NBO data of the specified type (zero-copy NboTable views in columnar mode).
+
+        Raises:
+            ValueError: If the NBO type is not recognised.
+
+        Returns:
+            list[NboDataPoint] | NboTable: The NBO data of the specified type.
+        """
+
         if nbo_type == NboType.LONE_PAIR:
             return self.lone_pair_data
         elif nbo_type == NboType.LONE_VACANCY:
@@ -280,3 +511,41 @@ class QmData():
             return self.nonbond_3c_data
         else:
             raise ValueError('NboType ' + str(nbo_type) + ' not recognized.')
+
+    def get_atom_nbo_statistics_by_type(self, nbo_type: NboType) -> AtomNboStatistics:
+
+        """Gets the per-atom statistics of single-center NBOs of the specified type.
+
+        Raises:
+            ValueError: If the NBO type is not a single-center type.
+
+        Returns:
+            AtomNboStatistics: The per-atom NBO statistics.
+        """
+
+        if nbo_type == NboType.LONE_PAIR:
+            return self.lone_pair_statistics
+        elif nbo_type == NboType.LONE_VACANCY:
+            return self.lone_vacancy_statistics
+        else:
+            raise ValueError('No per-atom statistics for NboType ' + str(nbo_type) + '.')
+
+    def get_nbo_data_by_atom_indices(self, atom_indices: list[int], nbo_type: NboType) -> list[NboDataPoint]:
+
+        """Gets the NBO data of the specified type that contains the given atom indices (see NboDataPoint.contains_atom_indices).
+
+        Returns:
+            list[NboDataPoint]: The NBO data in the order of the type list.
+        """
+
+        return self.nbo_atom_indices_lookup[nbo_type].get(tuple(atom_indices), [])
+
+    def get_first_nbo_by_energy(self, energy: float, nbo_type: NboType) -> NboDataPoint:
+
+        """Gets the first NBO of the specified type with the given energy.
+
+        Returns:
+            NboDataPoint: The NBO data point or None if there is no NBO with this energy.
+        """
+
+        return self.nbo_energy_lookup[nbo_type].get(energy)
@@ -0,0 +1,142 @@
+import numpy as np
+
+
+class SopaTable:
+
+    """Class for storing second order perturbation analysis (SOPA) data in columnar form."""
+
+    def __init__(self,
+                 donor_nbo_ids: np.ndarray,
+                 acceptor_nbo_ids: np.ndarray,
+                 energies: np.ndarray,
+                 donor_nbo_indices: np.ndarray = None,
+                 acceptor_nbo_indices: np.ndarray = None):
+
+        """Constructor
+
+        Args:
+            donor_nbo_ids (np.ndarray): The NBO IDs of the donor NBOs.
+            acceptor_nbo_ids (np.ndarray): The NBO IDs of the acceptor NBOs.
+            energies (np.ndarray): M x 3 matrix of stabilisation energies, energy differences and Fock matrix elements.
+            donor_nbo_indices (np.ndarray): The positions of the donor NBOs in the NBO data (-1 if not present).
+            acceptor_nbo_indices (np.ndarray): The positions of the acceptor NBOs in the NBO data (-1 if not present).
+        """
+
+        # check for consistent row counts
+        assert len(donor_nbo_ids) == len(acceptor_nbo_ids) == len(energies)
+        assert (donor_nbo_indices is None) == (acceptor_nbo_indices is None)
+
+        self._donor_nbo_ids = donor_nbo_ids
+        self._acceptor_nbo_ids = acceptor_nbo_ids
+        self._energies = energies
+        self._donor_nbo_indices = donor_nbo_indices
+        self._acceptor_nbo_indices = acceptor_nbo_indices
+
+    @classmethod
+    def from_list(cls, sopa_data: list[list]):
+
+        """Overloaded constructor to initialise from a list of SOPA entries ([[donor ID, acceptor ID], [E2, dE, F]])."""
+
+        return cls(donor_nbo_ids=np.array([x[0][0] for x in sopa_data], dtype=np.int32),
+                   acceptor_nbo_ids=np.array([x[0][1] for x in sopa_data], dtype=np.int32),
+                   energies=np.array([x[1] for x in sopa_data], dtype=np.float64).reshape(len(sopa_data), 3))
+
+    @classmethod
+    def from_arrays(cls, nbo_ids: np.ndarray, energies: np.ndarray):
+
+        """Overloaded constructor to initialise from an M x 2 matrix of donor and acceptor NBO IDs and an M x 3 matrix
+           of energies (no copy)."""
+
+        return cls(donor_nbo_ids=nbo_ids[:, 0],
+                   acceptor_nbo_ids=nbo_ids[:, 1],
+                   energies=energies)
+
+    def __len__(self):
+        return len(self._donor_nbo_ids)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> list[list]:
+
+        """Gets a single row as SOPA entry.
+
+        Returns:
+            list[list]: The SOPA entry ([[donor ID, acceptor ID], [E2, dE, F]]).
+        """
+
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('SopaTable index out of range.')
+
+        return [[int(self._donor_nbo_ids[i]), int(self._acceptor_nbo_ids[i])], self._energies[i].tolist()]
+
+    @property
+    def donor_nbo_ids(self):
+        """Getter for donor_nbo_ids"""
+        return self._donor_nbo_ids
+
+    @property
+    def acceptor_nbo_ids(self):
+        """Getter for acceptor_nbo_ids"""
+        return self._acceptor_nbo_ids
+
+    @property
+    def energies(self):
+        """Getter for energies"""
+        return self._energies
+
+    @property
+    def stabilisation_energies(self):
+        """Getter for the stabilisation energies (E2)"""
+        return self._energies[:, 0]
+
+    @property
+    def donor_nbo_indices(self):
+        """Getter for donor_nbo_indices"""
+        return self._donor_nbo_indices
+
+    @property
+    def acceptor_nbo_indices(self):
+        """Getter for acceptor_nbo_indices"""
+        return self._acceptor_nbo_indices
+
+    @property
+    def has_nbo_indices(self):
+        """Getter for whether the donor and acceptor NBO positions are resolved"""
+        return self._donor_nbo_indices is not None
+
+    def resolve_nbo_indices(self, nbo_index: dict):
+
+        """Resolves the positions of the donor and acceptor NBOs in the NBO data.
+
+        Args:
+            nbo_index (dict): Dict that maps NBO IDs to their position in the NBO data (see QmData.nbo_index).
+
+        Returns:
+            SopaTable: Table with resolved NBO positions that shares the underlying arrays (no copy).
+        """
+
+        # look up all IDs at once in the sorted NBO IDs
+        nbo_ids = np.fromiter(nbo_index.keys(), dtype=np.int64, count=len(nbo_index))
+        nbo_positions = np.fromiter(nbo_index.values(), dtype=np.int32, count=len(nbo_index))
+        order = np.argsort(nbo_ids)
+        nbo_ids = nbo_ids[order]
+        nbo_positions = nbo_positions[order]
+
+        def get_positions(ids: np.ndarray) -> np.ndarray:
+            if len(nbo_ids) == 0:
+                return np.full(len(ids), -1, dtype=np.int32)
+            k = np.minimum(np.searchsorted(nbo_ids, ids), len(nbo_ids) - 1)
+            return np.where(nbo_ids[k] == ids, nbo_positions[k], -1).astype(np.int32)
+
+        donor_nbo_indices = get_positions(self._donor_nbo_ids)
+        acceptor_nbo_indices = get_positions(self._acceptor_nbo_ids)
+
+        return SopaTable(donor_nbo_ids=self._donor_nbo_ids,
+                         acceptor_nbo_ids=self._acceptor_nbo_ids,
+                         energies=self._energies,
+                         donor_nbo_indices=donor_nbo_indices,
+                         acceptor_nbo_indices=acceptor_nbo_indices)
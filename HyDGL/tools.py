@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Tools:
 
     @staticmethod
@@ -126,6 +129,29 @@ class Tools:
         # return sum of square root
         return sum(squares) ** 0.5
 
+    @staticmethod
+    def calculate_distance_array(points: list[list[float]]) -> np.ndarray:
+
+        """Calculates the distance matrix of a list of points as a numpy array.
+
+        Returns:
+            np.ndarray: The distance matrix.
+        """
+
+        # no points --> empty matrix
+        if len(points) == 0:
+            return np.zeros((0, 0), dtype=float)
+
+        # make sure all points have the same dimension
+        assert all(len(point) == len(points[0]) for point in points)
+
+        points = np.asarray(points, dtype=float)
+
+        # get pairwise difference vectors via broadcasting
+        differences = points[:, np.newaxis, :] - points[np.newaxis, :, :]
+
+        return np.sqrt(np.sum(differences ** 2, axis=-1))
+
     @staticmethod
     def calculate_distance_matrix(points: list[list[float]]) -> list[list[float]]:
 
@@ -135,17 +161,7 @@ class Tools:
             list[list[float]]: The distance matrix.
         """
 
-        # setup matrix
-        distance_matrix = [[0 for x in range(len(points))] for y in range(len(points))]
-
-        # iterate over the upper triangle
-        for i in range(len(distance_matrix) - 1):
-            for j in range(i + 1, len(distance_matrix), 1):
-                distance = Tools.calculate_euclidean_distance(points[i], points[j])
-                distance_matrix[i][j] = distance
-                distance_matrix[j][i] = distance
-
-        return distance_matrix
+        return Tools.calculate_distance_array(points).tolist()
 
     @staticmethod
     def min_max_scale(value: float, min_value: float, max_value: float) -> float:
@@ -0,0 +1,87 @@
+import unittest
+from parameterized import parameterized
+
+from HyDGL.nbo_table import NboTable
+from HyDGL.enums.nbo_type import NboType
+from HyDGL.file_handler import FileHandler
+from HyDGL.nbo_data_point import NboDataPoint
+from HyDGL.atom_nbo_statistics import AtomNboStatistics
+from tests.utils import Utils, TEST_FILE_LALMER, TEST_FILE_ZUYHEG
+
+
+class TestAtomNboStatistics(unittest.TestCase):
+
+    @parameterized.expand([
+
+        [
+            [
+                NboDataPoint.from_list([1, 'LP', [0], -0.5, [1], 1.9, [0.2, 0.8, 0.0, 0.0]]),
+                NboDataPoint.from_list([2, 'LP', [2], -0.4, [1], 1.8, [0.1, 0.9, 0.0, 0.0]]),
+                NboDataPoint.from_list([3, 'LP', [0], -0.3, [1], 1.7, [0.4, 0.6, 0.0, 0.0]]),
+            ],
+            3,
+            [2, 0, 1],
+            [-0.5, None, -0.4],
+            [-0.3, None, -0.4],
+            [-0.4, None, -0.4],
+            [1.8, None, 1.8],
+            [[0.3, 0.7, 0.0, 0.0], None, [0.1, 0.9, 0.0, 0.0]],
+            [1, None, 2],
+            [3, None, 2],
+            [0.2, 0.0, 0.0]
+        ],
+
+    ])
+    def test_atom_nbo_statistics(self, nbo_data, n_atoms, expected_counts, expected_min_energies, expected_max_energies,
+                                 expected_average_energies, expected_average_occupations, expected_average_orbital_occupations,
+                                 expected_min_energy_nbo_ids, expected_max_energy_nbo_ids, expected_energy_min_max_differences):
+
+        statistics = AtomNboStatistics(nbo_data, n_atoms)
+
+        self.assertEqual(statistics.counts, expected_counts)
+        Utils.assert_are_almost_equal(statistics.min_energies, expected_min_energies)
+        Utils.assert_are_almost_equal(statistics.max_energies, expected_max_energies)
+        Utils.assert_are_almost_equal(statistics.average_energies, expected_average_energies)
+        Utils.assert_are_almost_equal(statistics.average_occupations, expected_average_occupations)
+        Utils.assert_are_almost_equal(statistics.average_orbital_occupations, expected_average_orbital_occupations)
+        self.assertEqual([x.nbo_id if x is not None else None for x in statistics.min_energy_nbos], expected_min_energy_nbo_ids)
+        self.assertEqual([x.nbo_id if x is not None else None for x in statistics.max_energy_nbos], expected_max_energy_nbo_ids)
+        Utils.assert_are_almost_equal([statistics.get_energy_min_max_difference(i) for i in range(n_atoms)], expected_energy_min_max_differences)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+        ],
+
+    ])
+    def test_atom_nbo_statistics_with_nbo_table(self, file_path):
+
+        qm_data_dict = FileHandler.read_dict_from_json_file(file_path)
+        nbo_data = [NboDataPoint.from_list(x) for x in qm_data_dict['nbo_data']]
+        nbo_table = NboTable.from_list(qm_data_dict['nbo_data'])
+
+        for nbo_type in [NboType.LONE_PAIR, NboType.LONE_VACANCY]:
+
+            view = nbo_table.get_view(nbo_type)
+            expected = AtomNboStatistics([x for x in nbo_data if x.nbo_type == NboTable.nbo_type_identifiers[NboTable.nbo_type_codes[nbo_type]]],
+                                         qm_data_dict['n_atoms'])
+            result = AtomNboStatistics(view, qm_data_dict['n_atoms'])
+
+            self.assertEqual(result.counts, expected.counts)
+            self.assertEqual(result.min_energies, expected.min_energies)
+            self.assertEqual(result.max_energies, expected.max_energies)
+            self.assertEqual(result.average_energies, expected.average_energies)
+            self.assertEqual(result.average_occupations, expected.average_occupations)
+            self.assertEqual(result.average_orbital_occupations, expected.average_orbital_occupations)
+            self.assertEqual([x.nbo_id if x is not None else None for x in result.min_energy_nbos],
+                             [x.nbo_id if x is not None else None for x in expected.min_energy_nbos])
+            self.assertEqual([x.nbo_id if x is not None else None for x in result.max_energy_nbos],
+                             [x.nbo_id if x is not None else None for x in expected.max_energy_nbos])
+
+        # NBO data points are only created for the energy extrema
+        self.assertLess(sum(x is not None for x in nbo_table._row_cache.rows), len(nbo_table))
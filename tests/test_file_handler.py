@@ -3,8 +3,9 @@ import pickle
 import unittest
 from parameterized import parameterized
 
-from HyDGL.file_handler import FileHandler
-from tests.utils import TEST_FILE_LALMER, TEST_FILE_QM_DATA_OREDIA, TEST_FILE_JSON, Utils
+from HyDGL.file_handler import FileHandler, orjson, zstandard
+from HyDGL.qm_data import QmData
+from tests.utils import TEST_FILE_LALMER, TEST_FILE_OREDIA, TEST_FILE_ZUYHEG, TEST_FILE_QM_DATA_OREDIA, TEST_FILE_JSON, Utils
 
 
 class TestFileHandler(unittest.TestCase):
@@ -114,7 +115,8 @@ class TestFileHandler(unittest.TestCase):
         FileHandler.write_binary_file(tmp_file_path, content)
 
         result = FileHandler.read_binary_file(tmp_file_path)
-        Utils.assert_are_almost_equal(content, result)
+        # members calculated on first access are not written
+        Utils.assert_are_almost_equal(content.__getstate__(), result.__getstate__())
 
     @parameterized.expand([
 
@@ -148,6 +150,24 @@ class TestFileHandler(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
+    @parameterized.expand([
+
+        [
+            TEST_FILE_JSON,
+            ['name', 'age', 'not_existing_key'],
+            {
+                'age': 30,
+                'name': 'John'
+            }
+        ]
+
+    ])
+    def test_read_dict_from_json_file_with_keys(self, file_path, keys, expected):
+
+        result = FileHandler.read_dict_from_json_file(file_path, keys=keys)
+
+        self.assertEqual(result, expected)
+
     @parameterized.expand([
 
         [
@@ -181,3 +201,339 @@ class TestFileHandler(unittest.TestCase):
     def test_read_dict_from_json_file_with_invalid_input(self, file_path, expected_error):
 
         self.assertRaises(expected_error, FileHandler.read_dict_from_json_file, file_path)
+
+    @parameterized.expand([
+
+        [
+            [TEST_FILE_LALMER, TEST_FILE_OREDIA, TEST_FILE_ZUYHEG],
+            None,
+            ['LALMER', 'OREDIA', 'ZUYHEG']
+        ],
+
+        [
+            [TEST_FILE_LALMER, TEST_FILE_OREDIA, TEST_FILE_ZUYHEG],
+            ['ZUYHEG', 'LALMER', 'not-existing-id'],
+            ['LALMER', 'ZUYHEG']
+        ],
+
+    ])
+    def test_read_qm_data_from_json_lines_file(self, file_paths, ids, expected_ids):
+
+        tmp_file_path = '/tmp/HyDGL-test-file.jsonl'
+        qm_data_dicts = [FileHandler.read_dict_from_json_file(file_path) for file_path in file_paths]
+        FileHandler.write_dicts_to_json_lines_file(tmp_file_path, qm_data_dicts)
+
+        result = list(FileHandler.read_qm_data_from_json_lines_file(tmp_file_path, ids=ids))
+        os.remove(tmp_file_path)
+
+        self.assertEqual([qm_data.id for qm_data in result], expected_ids)
+        for qm_data in result:
+            expected = QmData.from_dict(qm_data_dicts[[x['id'] for x in qm_data_dicts].index(qm_data.id)])
+            Utils.assert_are_almost_equal(qm_data.geometric_data, expected.geometric_data)
+            Utils.assert_are_almost_equal(qm_data.nbo_data, expected.nbo_data)
+
+    @parameterized.expand([
+
+        [
+            './tests/files/',
+            ['OREDIA', 'ZUYHEG', 'not-existing-id'],
+            ['OREDIA', 'ZUYHEG']
+        ],
+
+    ])
+    def test_read_qm_data_from_json_directory(self, directory, ids, expected_ids):
+
+        result = list(FileHandler.read_qm_data_from_json_directory(directory, ids=ids, fields=['id', 'n_atoms']))
+
+        self.assertEqual([qm_data.id for qm_data in result], expected_ids)
+        self.assertIsNone(result[0].geometric_data)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+            False
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            True
+        ],
+
+    ])
+    def test_write_and_read_qm_data_container(self, file_path, use_nbo_table):
+
+        tmp_file_path = '/tmp/HyDGL-test-file.qmc'
+
+        expected = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+        FileHandler.write_qm_data_container(tmp_file_path, expected)
+        result = FileHandler.read_qm_data_container(tmp_file_path, use_nbo_table=use_nbo_table)
+        os.remove(tmp_file_path)
+
+        self.assertEqual(result.id, expected.id)
+        self.assertEqual(result.atomic_numbers, expected.atomic_numbers)
+        self.assertEqual(result.gibbs_energy, expected.gibbs_energy)
+        Utils.assert_are_almost_equal(result.geometric_data, expected.geometric_data)
+        Utils.assert_are_almost_equal(result.frequencies, expected.frequencies)
+        Utils.assert_are_almost_equal(result.wiberg_bond_order_matrix, expected.wiberg_bond_order_matrix)
+        Utils.assert_are_almost_equal(list(result.sopa_data), expected.sopa_data)
+        self.assertEqual([x.nbo_id for x in result.bond_pair_data], [x.nbo_id for x in expected.bond_pair_data])
+        self.assertEqual([x.energy for x in result.lone_pair_data], [x.energy for x in expected.lone_pair_data])
+        self.assertEqual([x.atom_indices for x in result.bond_3c_data], [x.atom_indices for x in expected.bond_3c_data])
+
+    @parameterized.expand([
+
+        [
+            './tests/files/not-existing-file',
+            FileNotFoundError
+        ],
+
+        [
+            './tests/files/',
+            IsADirectoryError
+        ],
+
+        [
+            TEST_FILE_JSON,
+            ValueError
+        ],
+
+    ])
+    def test_read_qm_data_container_with_invalid_input(self, file_path, expected_error):
+
+        self.assertRaises(expected_error, FileHandler.read_qm_data_container, file_path)
+
+    @parameterized.expand([
+
+        [
+            [TEST_FILE_LALMER, TEST_FILE_OREDIA],
+            [TEST_FILE_ZUYHEG]
+        ],
+
+    ])
+    def test_write_and_read_qm_data_archive(self, file_paths, appended_file_paths):
+
+        tmp_file_path = '/tmp/HyDGL-test-file.archive'
+
+        qm_data_dicts = [FileHandler.read_dict_from_json_file(file_path) for file_path in file_paths]
+        appended_qm_data_dicts = [FileHandler.read_dict_from_json_file(file_path) for file_path in appended_file_paths]
+
+        FileHandler.write_qm_data_archive(tmp_file_path, qm_data_dicts)
+        index = FileHandler.read_qm_data_archive_index(tmp_file_path)
+
+        # appending keeps existing records in place
+        FileHandler.append_to_qm_data_archive(tmp_file_path, appended_qm_data_dicts)
+        appended_index = FileHandler.read_qm_data_archive_index(tmp_file_path)
+        for id in index.keys():
+            self.assertEqual(appended_index[id], index[id])
+
+        expected_ids = [x['id'] for x in qm_data_dicts + appended_qm_data_dicts]
+        self.assertEqual(list(appended_index.keys()), expected_ids)
+
+        # sequential scan
+        result = list(FileHandler.read_qm_data_from_archive(tmp_file_path))
+        self.assertEqual([qm_data.id for qm_data in result], expected_ids)
+        for i, qm_data in enumerate(result):
+            expected = QmData.from_dict((qm_data_dicts + appended_qm_data_dicts)[i])
+            Utils.assert_are_almost_equal(qm_data.geometric_data, expected.geometric_data)
+            Utils.assert_are_almost_equal(qm_data.sopa_data, expected.sopa_data)
+
+        # random access
+        result = list(FileHandler.read_qm_data_from_archive(tmp_file_path, ids=expected_ids[::-1]))
+        self.assertEqual([qm_data.id for qm_data in result], expected_ids[::-1])
+
+        self.assertRaises(KeyError, list, FileHandler.read_qm_data_from_archive(tmp_file_path, ids=['not-existing-id']))
+        os.remove(tmp_file_path)
+
+    @parameterized.expand([
+
+        [
+            [TEST_FILE_LALMER, TEST_FILE_OREDIA],
+            [TEST_FILE_ZUYHEG]
+        ],
+
+    ])
+    def test_append_to_qm_data_archive_interrupted(self, file_paths, appended_file_paths):
+
+        tmp_file_path = '/tmp/HyDGL-test-file.archive'
+
+        qm_data_dicts = [FileHandler.read_dict_from_json_file(file_path) for file_path in file_paths]
+        appended_qm_data_dicts = [FileHandler.read_dict_from_json_file(file_path) for file_path in appended_file_paths]
+
+        FileHandler.write_qm_data_archive(tmp_file_path, qm_data_dicts)
+        index = FileHandler.read_qm_data_archive_index(tmp_file_path)
+
+        # append fails while writing the records
+        self.assertRaises(TypeError, FileHandler.append_to_qm_data_archive, tmp_file_path,
+                          appended_qm_data_dicts + [{'id': 'invalid', 'data': object()}])
+        self.assertEqual(FileHandler.read_qm_data_archive_index(tmp_file_path), index)
+
+        # append interrupted while writing the trailer
+        FileHandler.append_to_qm_data_archive(tmp_file_path, appended_qm_data_dicts)
+        with open(tmp_file_path, 'r+b') as f:
+            f.truncate(os.path.getsize(tmp_file_path) - 4)
+        self.assertEqual(FileHandler.read_qm_data_archive_index(tmp_file_path), index)
+
+        # next append continues behind the last valid trailer
+        FileHandler.append_to_qm_data_archive(tmp_file_path, appended_qm_data_dicts)
+
+        expected_ids = [x['id'] for x in qm_data_dicts + appended_qm_data_dicts]
+        result = list(FileHandler.read_qm_data_from_archive(tmp_file_path))
+        self.assertEqual([qm_data.id for qm_data in result], expected_ids)
+        for i, qm_data in enumerate(result):
+            expected = QmData.from_dict((qm_data_dicts + appended_qm_data_dicts)[i])
+            Utils.assert_are_almost_equal(qm_data.geometric_data, expected.geometric_data)
+
+        os.remove(tmp_file_path)
+
+    @parameterized.expand([
+
+        [
+            './tests/files/not-existing-file',
+            FileNotFoundError
+        ],
+
+        [
+            TEST_FILE_JSON,
+            ValueError
+        ],
+
+    ])
+    def test_read_qm_data_archive_index_with_invalid_input(self, file_path, expected_error):
+
+        self.assertRaises(expected_error, FileHandler.read_qm_data_archive_index, file_path)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_OREDIA
+        ]
+
+    ])
+    def test_json_backends(self, file_path):
+
+        tmp_file_path = '/tmp/HyDGL-test-file.json'
+        json_backends = ['json'] if orjson is None else ['json', 'orjson']
+        default_json_backend = FileHandler.json_backend
+
+        expected = FileHandler.read_dict_from_json_file(file_path)
+
+        for json_backend in json_backends:
+
+            FileHandler.set_json_backend(json_backend)
+
+            result = FileHandler.read_dict_from_json_file(file_path)
+            Utils.assert_are_almost_equal(result, expected)
+
+            FileHandler.write_dict_to_json_file(tmp_file_path, expected, compact=True)
+            result = FileHandler.read_dict_from_json_file(tmp_file_path)
+            Utils.assert_are_almost_equal(result, expected)
+            os.remove(tmp_file_path)
+
+        FileHandler.set_json_backend(default_json_backend)
+
+        self.assertRaises(ValueError, FileHandler.set_json_backend, 'not-existing-backend')
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_ZUYHEG,
+            '.gz'
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            '.bz2'
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            '.xz'
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            '.zst'
+        ],
+
+    ])
+    def test_compressed_files(self, file_path, extension):
+
+        if extension == '.zst' and zstandard is None:
+            self.skipTest('zstandard is not installed.')
+
+        tmp_directory = '/tmp/HyDGL-test-directory'
+        os.makedirs(tmp_directory, exist_ok=True)
+        tmp_file_path = os.path.join(tmp_directory, 'ZUYHEG.json' + extension)
+
+        expected = FileHandler.read_dict_from_json_file(file_path)
+
+        # compression is chosen by extension
+        FileHandler.write_dict_to_json_file(tmp_file_path, expected)
+        with open(tmp_file_path, 'rb') as f:
+            self.assertNotEqual(f.read(1), b'{')
+
+        result = FileHandler.read_dict_from_json_file(tmp_file_path)
+        Utils.assert_are_almost_equal(result, expected)
+
+        # compressed files in directories and JSON lines files
+        result = list(FileHandler.read_qm_data_from_json_directory(tmp_directory))
+        self.assertEqual([qm_data.id for qm_data in result], ['ZUYHEG'])
+        os.remove(tmp_file_path)
+
+        FileHandler.write_dicts_to_json_lines_file(tmp_file_path, [expected])
+        result = list(FileHandler.read_qm_data_from_json_lines_file(tmp_file_path))
+        self.assertEqual([qm_data.id for qm_data in result], ['ZUYHEG'])
+
+        # compression is detected from magic bytes when reading
+        os.rename(tmp_file_path, os.path.join(tmp_directory, 'ZUYHEG'))
+        result = list(FileHandler.read_qm_data_from_json_lines_file(os.path.join(tmp_directory, 'ZUYHEG')))
+        self.assertEqual([qm_data.id for qm_data in result], ['ZUYHEG'])
+
+        os.remove(os.path.join(tmp_directory, 'ZUYHEG'))
+        os.rmdir(tmp_directory)
+
+    @parameterized.expand([
+
+        [
+            [TEST_FILE_LALMER, './tests/files/not-existing-file', TEST_FILE_OREDIA, TEST_FILE_ZUYHEG],
+            2,
+            True
+        ],
+
+        [
+            [TEST_FILE_LALMER, './tests/files/not-existing-file', TEST_FILE_OREDIA, TEST_FILE_ZUYHEG],
+            2,
+            False
+        ],
+
+        [
+            [TEST_FILE_LALMER, './tests/files/not-existing-file', TEST_FILE_OREDIA, TEST_FILE_ZUYHEG],
+            1,
+            True
+        ],
+
+    ])
+    def test_read_qm_data_from_json_files(self, file_paths, n_processes, ordered):
+
+        result = list(FileHandler.read_qm_data_from_json_files(file_paths, n_processes=n_processes, chunk_size=2, ordered=ordered))
+
+        if ordered:
+            self.assertEqual([x[0] for x in result], file_paths)
+        self.assertEqual(sorted([x[0] for x in result]), sorted(file_paths))
+
+        for file_path, qm_data, error in result:
+            if file_path == './tests/files/not-existing-file':
+                self.assertIsNone(qm_data)
+                self.assertEqual(type(error), FileNotFoundError)
+            else:
+                self.assertIsNone(error)
+                expected = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+                self.assertEqual(qm_data.id, expected.id)
+                Utils.assert_are_almost_equal(qm_data.bond_pair_data, expected.bond_pair_data)
+
+    def test_get_json_file_paths(self):
+
+        self.assertEqual(FileHandler.get_json_file_paths('./tests/files/'),
+                         ['./tests/files/LALMER.json', './tests/files/OREDIA.json', './tests/files/ZUYHEG.json', './tests/files/test-file.json'])
+        self.assertEqual(FileHandler.get_json_file_paths('./tests/files/', ids=['OREDIA']), ['./tests/files/OREDIA.json'])
@@ -1,4 +1,5 @@
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from parameterized import parameterized
 from HyDGL.enums.nbo_type import NboType
 from HyDGL.file_handler import FileHandler
@@ -17,8 +18,9 @@ from HyDGL.enums.edge_type import EdgeType
 from HyDGL.graph_generator_settings import GraphGeneratorSettings
 from HyDGL.enums.sopa_edge_feature import SopaEdgeFeature
 from HyDGL.enums.sopa_resolution_mode import SopaResolutionMode
+from HyDGL.enums.sopa_prefilter_mode import SopaPrefilterMode
 from HyDGL.qm_data import QmData
-from tests.utils import Utils, TEST_FILE_LALMER, TEST_FILE_OREDIA, TEST_FILE_ZUYHEG
+from tests.utils import Utils, TEST_FILE_LALMER, TEST_FILE_OREDIA, TEST_FILE_ZUYHEG, TEST_FILE_QM_DATA_OREDIA
 
 
 class TestGraphGenerator(unittest.TestCase):
@@ -3316,3 +3318,488 @@ class TestGraphGenerator(unittest.TestCase):
         result = gg._get_meta_data(qm_data)
 
         Utils.assert_are_almost_equal(result, expected)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+            GraphGeneratorSettings.baseline([QmTarget.TZVP_HOMO_LUMO_GAP])
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            GraphGeneratorSettings.uNatQ([QmTarget.POLARISABILITY])
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            GraphGeneratorSettings.dNatQ([QmTarget.GIBBS_ENERGY_CORRECTION])
+        ],
+
+    ])
+    def test_generate_graph_with_projected_qm_data(self, file_path, settings):
+
+        gg = GraphGenerator(settings)
+
+        # load all fields and only the required fields
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+        projected_qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path, keys=settings.get_required_qm_data_fields()),
+                                             fields=settings.get_required_qm_data_fields(),
+                                             nbo_types=settings.get_required_nbo_types())
+
+        expected = gg.generate_graph(qm_data)
+        result = gg.generate_graph(projected_qm_data)
+
+        Utils.assert_are_almost_equal([node.features for node in result.nodes], [node.features for node in expected.nodes])
+        Utils.assert_are_almost_equal([edge.features for edge in result.edges], [edge.features for edge in expected.edges])
+        Utils.assert_are_almost_equal([edge.node_indices for edge in result.edges], [edge.node_indices for edge in expected.edges])
+        Utils.assert_are_almost_equal([edge.label for edge in result.edges], [edge.label for edge in expected.edges])
+        Utils.assert_are_almost_equal(result.graph_features, expected.graph_features)
+        Utils.assert_are_almost_equal(result.targets, expected.targets)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_QM_DATA_OREDIA,
+            TEST_FILE_OREDIA,
+            GraphGeneratorSettings.dNatQ([QmTarget.POLARISABILITY])
+        ],
+
+    ])
+    def test_generate_graph_from_binary_file(self, binary_file_path, file_path, settings):
+
+        gg = GraphGenerator(settings)
+
+        # binary file written before the NBO index was added
+        expected = gg.generate_graph(QmData.from_dict(FileHandler.read_dict_from_json_file(file_path)))
+        result = gg.generate_graph(FileHandler.read_binary_file(binary_file_path))
+
+        self.assertGreater(len(result.edges), 0)
+        Utils.assert_are_almost_equal([edge.node_indices for edge in result.edges], [edge.node_indices for edge in expected.edges])
+        Utils.assert_are_almost_equal([edge.label for edge in result.edges], [edge.label for edge in expected.edges])
+        Utils.assert_are_almost_equal(result.targets, expected.targets)
+
+    @parameterized.expand([
+
+        [
+            2,
+            True
+        ],
+
+        [
+            2,
+            False
+        ],
+
+        [
+            1,
+            True
+        ],
+
+    ])
+    def test_generate_graphs(self, n_processes, ordered):
+
+        gg = GraphGenerator(GraphGeneratorSettings.baseline([QmTarget.TZVP_HOMO_LUMO_GAP]))
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(TEST_FILE_LALMER))
+        items = [qm_data, TEST_FILE_ZUYHEG, './tests/files/not-existing-file', None, TEST_FILE_OREDIA]
+        identifiers = ['LALMER', TEST_FILE_ZUYHEG, './tests/files/not-existing-file', 'None', TEST_FILE_OREDIA]
+
+        result = list(gg.generate_graphs(items, n_processes=n_processes, chunk_size=2, ordered=ordered))
+
+        if ordered:
+            self.assertEqual([x[0] for x in result], identifiers)
+        self.assertEqual(sorted([x[0] for x in result]), sorted(identifiers))
+
+        for identifier, graph, error in result:
+            if identifier == './tests/files/not-existing-file':
+                self.assertIsNone(graph)
+                self.assertEqual(type(error), FileNotFoundError)
+                continue
+            # invalid items are reported by their representation
+            if identifier == 'None':
+                self.assertIsNone(graph)
+                self.assertEqual(type(error), AttributeError)
+                continue
+
+            self.assertIsNone(error)
+            if identifier == 'LALMER':
+                expected = gg.generate_graph(qm_data)
+            else:
+                expected = gg.generate_graph(QmData.from_dict(FileHandler.read_dict_from_json_file(identifier)))
+            Utils.assert_are_almost_equal([node.features for node in graph.nodes], [node.features for node in expected.nodes])
+            Utils.assert_are_almost_equal([edge.features for edge in graph.edges], [edge.features for edge in expected.edges])
+            Utils.assert_are_almost_equal(graph.targets, expected.targets)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+            GraphGeneratorSettings.uNatQ([])
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            GraphGeneratorSettings.default(node_features=list(NodeFeature),
+                                           edge_features=list(EdgeFeature),
+                                           sopa_edge_features=list(SopaEdgeFeature),
+                                           edge_types=[EdgeType.SOPA],
+                                           sopa_resolution_mode=SopaResolutionMode.MAX,
+                                           sopa_interaction_threshold=0.5)
+        ],
+
+    ])
+    def test_feature_schemas(self, file_path, settings):
+
+        gg = GraphGenerator(settings)
+        graph = gg.generate_graph(QmData.from_dict(FileHandler.read_dict_from_json_file(file_path)))
+
+        for node in graph.nodes:
+            self.assertEqual(list(node.features.keys()), gg.node_feature_schema)
+
+        for edge in graph.edges:
+            if edge.label == 'SOPA':
+                self.assertEqual(list(edge.features.keys()), gg.sopa_edge_feature_schema + gg.edge_feature_schema)
+            else:
+                self.assertEqual(list(edge.features.keys()), gg.edge_feature_schema)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+            GraphGeneratorSettings.baseline([])
+        ],
+
+        [
+            TEST_FILE_OREDIA,
+            GraphGeneratorSettings.uNatQ([])
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            GraphGeneratorSettings.default(node_features=list(NodeFeature),
+                                           edge_types=[EdgeType.BOND_ORDER_METAL, EdgeType.BOND_ORDER_NON_METAL],
+                                           hydrogen_mode=HydrogenMode.OMIT)
+        ],
+
+        [
+            TEST_FILE_LALMER,
+            GraphGeneratorSettings.default(node_features=list(NodeFeature),
+                                           edge_types=[EdgeType.SOPA],
+                                           hydrogen_mode=HydrogenMode.EXPLICIT,
+                                           sopa_resolution_mode=SopaResolutionMode.MAX)
+        ],
+
+    ])
+    def test_get_node_feature_matrix(self, file_path, settings):
+
+        gg = GraphGenerator(settings)
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        node_feature_matrix, schema = gg.get_node_feature_matrix(qm_data)
+        graph = gg.generate_graph(qm_data)
+
+        self.assertEqual(schema, list(graph.nodes[0].features.keys()))
+        self.assertEqual(node_feature_matrix.shape, (len(graph.nodes), len(schema)))
+        Utils.assert_are_almost_equal(node_feature_matrix.tolist(), [[float(x) for x in node.features.values()] for node in graph.nodes])
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+            GraphGeneratorSettings.baseline([])
+        ],
+
+        [
+            TEST_FILE_OREDIA,
+            GraphGeneratorSettings.default(edge_features=list(EdgeFeature),
+                                           edge_types=[EdgeType.NBO_BONDING_ORBITALS],
+                                           hydrogen_mode=HydrogenMode.OMIT)
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            GraphGeneratorSettings.default(edge_features=list(EdgeFeature),
+                                           edge_types=[EdgeType.BOND_ORDER_METAL, EdgeType.BOND_ORDER_NON_METAL])
+        ],
+
+        [
+            TEST_FILE_OREDIA,
+            GraphGeneratorSettings.dNatQ([])
+        ],
+
+    ])
+    def test_get_edge_feature_matrix(self, file_path, settings):
+
+        gg = GraphGenerator(settings)
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        edge_feature_matrix, schema = gg.get_edge_feature_matrix(qm_data)
+        graph = gg.generate_graph(qm_data)
+
+        # SOPA edges are directed and not part of the matrix
+        bond_edges = [edge for edge in graph.edges if not edge.is_directed]
+
+        expected = []
+        for edge in bond_edges:
+            self.assertEqual(schema, list(edge.features.keys()))
+            expected.append([float(GraphGenerator.edge_nbo_type_codes[value]) if key == 'nbo_type' else float(value) for key, value in edge.features.items()])
+
+        self.assertEqual(edge_feature_matrix.shape, (len(bond_edges), len(schema)))
+        Utils.assert_are_almost_equal(edge_feature_matrix.tolist(), expected)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+            HydrogenMode.EXPLICIT,
+            BondOrderType.WIBERG
+        ],
+
+        [
+            TEST_FILE_OREDIA,
+            HydrogenMode.OMIT,
+            BondOrderType.NLMO
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            HydrogenMode.EXPLICIT,
+            BondOrderType.LMO
+        ],
+
+    ])
+    def test_get_bond_order_edge_indices(self, file_path, hydrogen_mode, bond_order_mode):
+
+        gg = GraphGenerator(GraphGeneratorSettings.default(hydrogen_mode=hydrogen_mode, bond_order_mode=bond_order_mode))
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        metal_edge_indices = gg._get_bond_order_edge_indices(qm_data, include_metal=True, include_non_metal=False).tolist()
+        non_metal_edge_indices = gg._get_bond_order_edge_indices(qm_data, include_metal=False, include_non_metal=True).tolist()
+        edge_indices = gg._get_bond_order_edge_indices(qm_data, include_metal=True, include_non_metal=True).tolist()
+
+        self.assertTrue(len(non_metal_edge_indices) > 0)
+        self.assertEqual(edge_indices, sorted(metal_edge_indices + non_metal_edge_indices))
+
+        for i, j in edge_indices:
+            self.assertTrue(i < j)
+            if hydrogen_mode == HydrogenMode.OMIT:
+                self.assertNotEqual(qm_data.atomic_numbers[i], 1)
+                self.assertNotEqual(qm_data.atomic_numbers[j], 1)
+
+    def test_generation_context(self):
+
+        settings = GraphGeneratorSettings.default(node_features=list(NodeFeature),
+                                                  edge_features=list(EdgeFeature),
+                                                  edge_types=[EdgeType.BOND_ORDER_METAL, EdgeType.BOND_ORDER_NON_METAL, EdgeType.SOPA],
+                                                  sopa_resolution_mode=SopaResolutionMode.MAX,
+                                                  hydrogen_mode=HydrogenMode.OMIT)
+
+        gg = GraphGenerator(settings)
+
+        for file_path in [TEST_FILE_LALMER, TEST_FILE_OREDIA, TEST_FILE_ZUYHEG]:
+
+            qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+            graph = gg.generate_graph(qm_data)
+            # context is discarded after the graph is returned
+            self.assertIsNone(gg._context)
+
+            # nothing is shared between molecules
+            expected = GraphGenerator(settings).generate_graph(qm_data)
+            Utils.assert_are_almost_equal([node.features for node in graph.nodes], [node.features for node in expected.nodes])
+            Utils.assert_are_almost_equal([edge.node_indices for edge in graph.edges], [edge.node_indices for edge in expected.edges])
+            Utils.assert_are_almost_equal([edge.features for edge in graph.edges], [edge.features for edge in expected.edges])
+
+
+    def test_generation_context_with_threads(self):
+
+        settings = GraphGeneratorSettings.dNatQ([QmTarget.POLARISABILITY])
+
+        qm_data_list = [QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+                        for file_path in [TEST_FILE_LALMER, TEST_FILE_OREDIA, TEST_FILE_ZUYHEG] * 8]
+        expected = [GraphGenerator(settings).generate_graph(qm_data) for qm_data in qm_data_list]
+
+        # one generator shared by several threads
+        gg = GraphGenerator(settings)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            result = list(executor.map(gg.generate_graph, qm_data_list))
+
+        for graph, expected_graph in zip(result, expected):
+            Utils.assert_are_almost_equal([node.features for node in graph.nodes], [node.features for node in expected_graph.nodes])
+            Utils.assert_are_almost_equal([edge.node_indices for edge in graph.edges], [edge.node_indices for edge in expected_graph.edges])
+            Utils.assert_are_almost_equal([edge.features for edge in graph.edges], [edge.features for edge in expected_graph.edges])
+
+    @parameterized.expand([
+
+        [
+            SopaResolutionMode.MIN_MAX,
+            [[1.1], [1.5, 1.2, 1.9], [], [1.2, 1.2]],
+            [[1.1], [1.2, 1.9], [], [1.2, 1.2]],
+            [[[1, 2]], [[5, 6], [7, 8]], [], [[9, 10], [11, 12]]]
+        ],
+
+        [
+            SopaResolutionMode.MAX,
+            [[1.1], [1.5, 1.2, 1.9], [], [1.2, 1.2]],
+            [[1.1], [1.9], [], [1.2, 1.2]],
+            [[[1, 2]], [[7, 8]], [], [[9, 10], [11, 12]]]
+        ],
+
+        [
+            SopaResolutionMode.MIN,
+            [],
+            [],
+            []
+        ],
+
+    ])
+    def test_resolve_sopa_interactions(self, sopa_resolution_mode, stabilisation_energies, expected_stabilisation_energies, expected_nbo_ids):
+
+        gg = GraphGenerator(GraphGeneratorSettings.default(sopa_resolution_mode=sopa_resolution_mode))
+
+        nbo_ids = [[[1, 2]], [[3, 4], [5, 6], [7, 8]], [], [[9, 10], [11, 12]]][:len(stabilisation_energies)]
+
+        resolved_stabilisation_energies, resolved_nbo_ids = gg._resolve_sopa_interactions(stabilisation_energies, nbo_ids, sopa_resolution_mode)
+
+        Utils.assert_are_almost_equal(resolved_stabilisation_energies, expected_stabilisation_energies)
+        self.assertEqual(resolved_nbo_ids, expected_nbo_ids)
+
+    def test_resolve_sopa_interactions_min_max_order(self):
+
+        gg = GraphGenerator(GraphGeneratorSettings.default(sopa_resolution_mode=SopaResolutionMode.MIN_MAX))
+
+        # minimum at index 9 and maximum at index 1 keep the order of the set of min and max indices
+        stabilisation_energies = [[1.5, 1.9, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.1], [1.2, 1.3]]
+        nbo_ids = [[[i, i] for i in range(10)], [[10, 10], [11, 11]]]
+
+        resolved_stabilisation_energies, resolved_nbo_ids = gg._resolve_sopa_interactions(stabilisation_energies, nbo_ids, SopaResolutionMode.MIN_MAX)
+
+        Utils.assert_are_almost_equal(resolved_stabilisation_energies, [[1.1, 1.9], [1.2, 1.3]])
+        self.assertEqual(resolved_nbo_ids, [[[9, 9], [1, 1]], [[10, 10], [11, 11]]])
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+        ],
+
+    ])
+    def test_sopa_prefilter_threshold(self, file_path):
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        settings = GraphGeneratorSettings.default(edge_features=[EdgeFeature.WIBERG_BOND_ORDER],
+                                                  edge_types=[EdgeType.SOPA],
+                                                  sopa_resolution_mode=SopaResolutionMode.FULL,
+                                                  sopa_interaction_threshold=1)
+        prefilter_settings = GraphGeneratorSettings.default(edge_features=[EdgeFeature.WIBERG_BOND_ORDER],
+                                                            edge_types=[EdgeType.SOPA],
+                                                            sopa_resolution_mode=SopaResolutionMode.FULL,
+                                                            sopa_interaction_threshold=1,
+                                                            sopa_prefilter_mode=SopaPrefilterMode.THRESHOLD)
+
+        graph = GraphGenerator(settings).generate_graph(qm_data)
+        prefiltered_graph = GraphGenerator(prefilter_settings).generate_graph(qm_data)
+
+        # individually resolved interactions are not affected by pruning below the threshold (only their order may change)
+        self.assertEqual(sorted([[edge.node_indices, list(edge.features.items())] for edge in prefiltered_graph.edges]),
+                         sorted([[edge.node_indices, list(edge.features.items())] for edge in graph.edges]))
+
+        self.assertNotIn('n_pruned_sopa_entries', graph.meta_data.keys())
+        self.assertTrue(prefiltered_graph.meta_data['n_pruned_sopa_entries'] > 0)
+
+        # features that aggregate over an atom pair only consider the remaining entries
+        sopa_edge_features = [SopaEdgeFeature.STABILISATION_ENERGY_MAX, SopaEdgeFeature.STABILISATION_ENERGY_AVERAGE]
+        for sopa_resolution_mode in [SopaResolutionMode.FULL, SopaResolutionMode.MAX]:
+
+            settings = GraphGeneratorSettings.default(edge_features=[EdgeFeature.WIBERG_BOND_ORDER],
+                                                      sopa_edge_features=sopa_edge_features,
+                                                      edge_types=[EdgeType.SOPA],
+                                                      sopa_resolution_mode=sopa_resolution_mode,
+                                                      sopa_interaction_threshold=1)
+            prefilter_settings = GraphGeneratorSettings.default(edge_features=[EdgeFeature.WIBERG_BOND_ORDER],
+                                                                sopa_edge_features=sopa_edge_features,
+                                                                edge_types=[EdgeType.SOPA],
+                                                                sopa_resolution_mode=sopa_resolution_mode,
+                                                                sopa_interaction_threshold=1,
+                                                                sopa_prefilter_mode=SopaPrefilterMode.THRESHOLD)
+
+            edges = sorted([[edge.node_indices, edge.label, edge.features] for edge in GraphGenerator(settings).generate_graph(qm_data).edges],
+                           key=lambda x: (x[0], x[1], x[2]['stabilisation_energy_max']))
+            prefiltered_edges = sorted([[edge.node_indices, edge.label, edge.features] for edge in GraphGenerator(prefilter_settings).generate_graph(qm_data).edges],
+                                       key=lambda x: (x[0], x[1], x[2]['stabilisation_energy_max']))
+
+            # same edges with the same maximum stabilisation energies
+            self.assertEqual([x[:2] for x in prefiltered_edges], [x[:2] for x in edges])
+            for prefiltered_edge, edge in zip(prefiltered_edges, edges):
+                self.assertEqual(prefiltered_edge[2]['stabilisation_energy_max'], edge[2]['stabilisation_energy_max'])
+                self.assertGreaterEqual(prefiltered_edge[2]['stabilisation_energy_average'], edge[2]['stabilisation_energy_average'])
+
+            # averages exclude the pruned entries
+            self.assertTrue(any(x[2]['stabilisation_energy_average'] > y[2]['stabilisation_energy_average'] for x, y in zip(prefiltered_edges, edges)))
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+            1
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+            2
+        ],
+
+    ])
+    def test_sopa_prefilter_top_k(self, file_path, top_k):
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        gg = GraphGenerator(GraphGeneratorSettings.default(edge_types=[EdgeType.SOPA], sopa_resolution_mode=SopaResolutionMode.MAX))
+        prefilter_gg = GraphGenerator(GraphGeneratorSettings.default(edge_types=[EdgeType.SOPA],
+                                                                     sopa_resolution_mode=SopaResolutionMode.MAX,
+                                                                     sopa_prefilter_mode=SopaPrefilterMode.TOP_K,
+                                                                     sopa_prefilter_top_k=top_k))
+
+        adjacency_list, stabilisation_energies, nbo_ids = gg._get_sopa_adjacency_list(qm_data)
+        prefilter_adjacency_list, prefilter_stabilisation_energies, prefilter_nbo_ids = prefilter_gg._get_sopa_adjacency_list(qm_data)
+
+        self.assertEqual(prefilter_adjacency_list, adjacency_list)
+
+        for i in range(len(adjacency_list)):
+            # the entries with the highest stabilisation energies are kept in their original order
+            self.assertEqual(len(prefilter_stabilisation_energies[i]), min(top_k, len(stabilisation_energies[i])))
+            self.assertEqual(max(prefilter_stabilisation_energies[i]), max(stabilisation_energies[i]))
+            self.assertEqual(sorted(prefilter_stabilisation_energies[i], reverse=True), sorted(stabilisation_energies[i], reverse=True)[:top_k])
+            self.assertEqual(prefilter_nbo_ids[i], [x for x in nbo_ids[i] if x in prefilter_nbo_ids[i]])
+
+        graph = prefilter_gg.generate_graph(qm_data)
+        self.assertEqual(graph.meta_data['n_pruned_sopa_entries'], sum([len(x) for x in stabilisation_energies]) - sum([len(x) for x in prefilter_stabilisation_energies]))
+
+    def test_get_edge_features_memoized(self):
+
+        gg = GraphGenerator(GraphGeneratorSettings.default(edge_features=list(EdgeFeature),
+                                                           edge_types=[EdgeType.BOND_ORDER_METAL, EdgeType.BOND_ORDER_NON_METAL, EdgeType.SOPA],
+                                                           sopa_resolution_mode=SopaResolutionMode.FULL))
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(TEST_FILE_OREDIA))
+
+        with gg._generation_context(qm_data):
+
+            edge_features = gg._get_edge_features([0, 1], qm_data)
+            # modifying the returned features does not change the cached features
+            edge_features['wiberg_bond_order'] = None
+            self.assertIsNotNone(gg._get_edge_features([0, 1], qm_data)['wiberg_bond_order'])
+            self.assertIn(('edge_features', (0, 1)), gg._context.keys())
+
+            # bond NBOs are looked up by ordered atom indices, so reversed pairs are cached separately
+            self.assertNotEqual(gg._get_edge_features([1, 0], qm_data)['nbo_type'], gg._get_edge_features([0, 1], qm_data)['nbo_type'])
+            Utils.assert_are_almost_equal(gg._get_edge_features([1, 0], qm_data), gg._compute_edge_features([1, 0], qm_data))
+            self.assertIn(('edge_features', (1, 0)), gg._context.keys())
+
+        self.assertIsNone(gg._context)
+        Utils.assert_are_almost_equal(gg._get_edge_features([0, 1], qm_data), gg._compute_edge_features([0, 1], qm_data))
@@ -4,6 +4,8 @@ from parameterized import parameterized
 from HyDGL.enums.hydrogen_mode import HydrogenMode
 from HyDGL.enums.sopa_resolution_mode import SopaResolutionMode
 from HyDGL.enums.bond_order_type import BondOrderType
+from HyDGL.enums.nbo_type import NboType
+from HyDGL.enums.qm_target import QmTarget
 from HyDGL.graph_generator_settings import GraphGeneratorSettings
 
 
@@ -45,3 +47,24 @@ class TestGraphGeneratorSettings(unittest.TestCase):
     ])
     def test_graph_generator_settings_from_file(self, ggs, expected):
         self.assertEqual(ggs, expected)
+
+    @parameterized.expand([
+
+        [
+            GraphGeneratorSettings.baseline([QmTarget.TZVP_HOMO_LUMO_GAP]),
+            ['id', 'stoichiometry', 'n_atoms', 'atomic_numbers', 'geometric_data', 'charge', 'wiberg_bond_order_matrix',
+             'nbo_data', 'molecular_mass', 'tzvp_occupied_orbital_energies', 'tzvp_virtual_orbital_energies'],
+            [NboType.BOND, NboType.THREE_CENTER_BOND]
+        ],
+
+        [
+            GraphGeneratorSettings.default(),
+            ['id', 'stoichiometry', 'n_atoms', 'atomic_numbers', 'geometric_data', 'charge', 'wiberg_bond_order_matrix'],
+            []
+        ],
+
+    ])
+    def test_get_required_qm_data_fields(self, ggs, expected_fields, expected_nbo_types):
+
+        self.assertEqual(ggs.get_required_qm_data_fields(), expected_fields)
+        self.assertEqual(ggs.get_required_nbo_types(), expected_nbo_types)
@@ -0,0 +1,123 @@
+import pickle
+import unittest
+import numpy as np
+from parameterized import parameterized
+
+from HyDGL.qm_data import QmData
+from HyDGL.nbo_table import NboTable
+from HyDGL.enums.nbo_type import NboType
+from HyDGL.file_handler import FileHandler
+from tests.utils import Utils, TEST_FILE_LALMER, TEST_FILE_OREDIA
+
+
+class TestNboTable(unittest.TestCase):
+
+    @parameterized.expand([
+
+        [
+            [
+                [1, 'BD', [0, 1], -0.8, [0.6, 0.4], 1.98, [0.3, 0.7, 0.0, 0.0]],
+                [2, 'LP', [2], -0.3, [1], 1.9, [0.5, 0.5, 0.0, 0.0]],
+                [3, 'BD*', [0, 1], 0.4, [0.4, 0.6], 0.02, [0.3, 0.7, 0.0, 0.0]],
+                [4, 'LP', [0], -0.5, [1], 1.95, [0.1, 0.9, 0.0, 0.0]],
+            ],
+            [1, 2, 3, 4]
+        ],
+
+    ])
+    def test_from_list(self, nbo_data, expected_nbo_ids):
+
+        nbo_table = NboTable.from_list(nbo_data)
+
+        # rows keep the original order
+        self.assertEqual(nbo_table.nbo_ids.tolist(), expected_nbo_ids)
+        self.assertEqual(len(nbo_table), len(nbo_data))
+
+        for nbo_data_point in nbo_table:
+            expected = next(x for x in nbo_data if x[0] == nbo_data_point.nbo_id)
+            self.assertEqual(nbo_data_point.nbo_type, expected[1])
+            self.assertEqual(nbo_data_point.atom_indices, expected[2])
+            self.assertEqual(nbo_data_point.energy, expected[3])
+            self.assertEqual(nbo_data_point.contributions, expected[4])
+            self.assertEqual(nbo_data_point.occupation, expected[5])
+            self.assertEqual(nbo_data_point.orbital_occupations, expected[6])
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_OREDIA,
+        ],
+
+    ])
+    def test_get_view(self, file_path):
+
+        nbo_table = NboTable.from_list(FileHandler.read_dict_from_json_file(file_path)['nbo_data'])
+
+        for nbo_type in NboType:
+
+            view = nbo_table.get_view(nbo_type)
+
+            # all rows are of the requested type
+            self.assertTrue(all(x == NboTable.nbo_type_codes[nbo_type] for x in view.type_codes))
+            # views do not copy data
+            if len(view) > 0:
+                self.assertTrue(np.shares_memory(view.energies, nbo_table.energies))
+                self.assertTrue(np.shares_memory(view.atom_indices, nbo_table.atom_indices))
+
+    def test_get_view_with_mixed_types(self):
+
+        nbo_data = [
+            [1, 'LP', [2], -0.3, [1], 1.9, [0.5, 0.5, 0.0, 0.0]],
+            [2, 'BD', [0, 1], -0.8, [0.6, 0.4], 1.98, [0.3, 0.7, 0.0, 0.0]],
+            [3, 'LP', [0], -0.5, [1], 1.95, [0.1, 0.9, 0.0, 0.0]],
+        ]
+
+        nbo_table = NboTable.from_list(nbo_data)
+
+        # rows of a type that are not contiguous are copied
+        view = nbo_table.get_view(NboType.LONE_PAIR)
+        self.assertEqual(view.nbo_ids.tolist(), [1, 3])
+        self.assertEqual([x.atom_indices for x in view], [[2], [0]])
+        self.assertEqual([x.contributions for x in view], [[1], [1]])
+
+        # rows are the same data points as in the full table
+        self.assertIs(view[1], nbo_table[2])
+        self.assertIs(nbo_table.get_view(NboType.BOND)[0], nbo_table[1])
+
+        # created data points are not pickled
+        unpickled_nbo_table = pickle.loads(pickle.dumps(nbo_table))
+        self.assertEqual(unpickled_nbo_table._row_cache.rows, [None, None, None])
+        self.assertEqual(unpickled_nbo_table[2].nbo_id, 3)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+        [
+            TEST_FILE_OREDIA,
+        ],
+
+    ])
+    def test_qm_data_with_nbo_table(self, file_path):
+
+        qm_data_dict = FileHandler.read_dict_from_json_file(file_path)
+
+        qm_data = QmData.from_dict(qm_data_dict)
+        qm_data_columnar = QmData.from_dict(qm_data_dict, use_nbo_table=True)
+
+        for nbo_type in NboType:
+
+            result = qm_data_columnar.get_nbo_data_by_type(nbo_type)
+            expected = qm_data.get_nbo_data_by_type(nbo_type)
+
+            self.assertEqual(result.nbo_ids.tolist(), [x.nbo_id for x in expected])
+            Utils.assert_are_almost_equal(result.energies.tolist(), [x.energy for x in expected])
+            Utils.assert_are_almost_equal(result.occupations.tolist(), [x.occupation for x in expected])
+            Utils.assert_are_almost_equal(result.orbital_occupations.tolist(), [x.orbital_occupations for x in expected])
+            self.assertEqual([x.atom_indices for x in result], [x.atom_indices for x in expected])
+            self.assertEqual([x.contributions for x in result], [x.contributions for x in expected])
+
+        for nbo_data_point in qm_data.nbo_data:
+            self.assertEqual(qm_data_columnar.get_nbo_by_id(nbo_data_point.nbo_id).nbo_type, nbo_data_point.nbo_type)
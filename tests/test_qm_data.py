@@ -1,10 +1,12 @@
+import pickle
 import unittest
 from parameterized import parameterized
 
 from HyDGL.qm_data import QmData
 from HyDGL.enums.nbo_type import NboType
+from HyDGL.tools import Tools
 from HyDGL.file_handler import FileHandler
-from tests.utils import Utils, TEST_FILE_QM_DATA_OREDIA
+from tests.utils import Utils, TEST_FILE_QM_DATA_OREDIA, TEST_FILE_LALMER, TEST_FILE_ZUYHEG
 
 
 class TestQmData(unittest.TestCase):
@@ -27,3 +29,187 @@ class TestQmData(unittest.TestCase):
         Utils.assert_are_almost_equal(qm_data.get_nbo_data_by_type(NboType.THREE_CENTER_BOND), qm_data.bond_3c_data)
         Utils.assert_are_almost_equal(qm_data.get_nbo_data_by_type(NboType.THREE_CENTER_ANTIBOND), qm_data.antibond_3c_data)
         Utils.assert_are_almost_equal(qm_data.get_nbo_data_by_type(NboType.THREE_CENTER_NONBOND), qm_data.nonbond_3c_data)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+    ])
+    def test_bond_distance_matrix(self, file_path):
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        # distances are only calculated on first access
+        self.assertNotIn('bond_distance_matrix', vars(qm_data))
+
+        Utils.assert_are_almost_equal(qm_data.bond_distance_matrix, Tools.calculate_distance_matrix(qm_data.geometric_data))
+        Utils.assert_are_almost_equal(qm_data.bond_distance_array.tolist(), qm_data.bond_distance_matrix)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+    ])
+    def test_get_nbo_by_id(self, file_path):
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        for nbo_data_point in qm_data.nbo_data:
+            self.assertIs(qm_data.get_nbo_by_id(nbo_data_point.nbo_id), nbo_data_point)
+
+        self.assertIsNone(qm_data.get_nbo_by_id(-1))
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_QM_DATA_OREDIA,
+        ],
+
+    ])
+    def test_get_nbo_by_id_legacy(self, file_path):
+
+        # binary file written before the NBO index was added
+        qm_data: QmData = FileHandler.read_binary_file(file_path)
+        self.assertNotIn('nbo_index', vars(qm_data))
+
+        for nbo_data_point in qm_data.nbo_data:
+            self.assertEqual(qm_data.get_nbo_by_id(nbo_data_point.nbo_id).nbo_id, nbo_data_point.nbo_id)
+
+        self.assertIsNone(qm_data.get_nbo_by_id(-1))
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+        ],
+
+    ])
+    def test_get_nbo_data_by_atom_indices(self, file_path):
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        for nbo_type in NboType:
+
+            nbo_data = qm_data.get_nbo_data_by_type(nbo_type)
+
+            # check against brute force search for all single atoms and atom pairs
+            atom_indices_list = [[i] for i in range(qm_data.n_atoms)] + [[i, j] for i in range(qm_data.n_atoms) for j in range(qm_data.n_atoms)]
+            for atom_indices in atom_indices_list:
+
+                expected = [x for x in nbo_data if x.contains_atom_indices(atom_indices)]
+                self.assertEqual(qm_data.get_nbo_data_by_atom_indices(atom_indices, nbo_type), expected)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+    ])
+    def test_bond_order_totals(self, file_path):
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        Utils.assert_are_almost_equal(qm_data.wiberg_bond_order_totals, [sum(x) for x in qm_data.wiberg_bond_order_matrix])
+        Utils.assert_are_almost_equal(qm_data.lmo_bond_order_totals, [sum(x) for x in qm_data.lmo_bond_order_matrix])
+        Utils.assert_are_almost_equal(qm_data.nlmo_bond_order_totals, [sum(x) for x in qm_data.nlmo_bond_order_matrix])
+
+        # totals are only calculated once
+        self.assertIs(qm_data.wiberg_bond_order_totals, qm_data.wiberg_bond_order_totals)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+    ])
+    def test_lazy_mode(self, file_path):
+
+        qm_data_dict = FileHandler.read_dict_from_json_file(file_path)
+
+        qm_data = QmData.from_dict(qm_data_dict)
+        lazy_qm_data = QmData.from_dict(qm_data_dict, lazy=True)
+
+        # heavy fields are not set up before first access
+        for name in ['nbo_data', 'sopa_data', 'wiberg_bond_order_matrix', 'frequencies', 'lone_pair_data']:
+            self.assertNotIn(name, vars(lazy_qm_data))
+
+        # deferred fields survive pickling
+        lazy_qm_data = pickle.loads(pickle.dumps(lazy_qm_data))
+
+        Utils.assert_are_almost_equal(lazy_qm_data.lone_pair_data, qm_data.lone_pair_data)
+        Utils.assert_are_almost_equal(lazy_qm_data.nbo_data, qm_data.nbo_data)
+        Utils.assert_are_almost_equal(lazy_qm_data.sopa_data, qm_data.sopa_data)
+        Utils.assert_are_almost_equal(lazy_qm_data.wiberg_bond_order_matrix, qm_data.wiberg_bond_order_matrix)
+        Utils.assert_are_almost_equal(lazy_qm_data.svp_homo_lumo_gap, qm_data.svp_homo_lumo_gap)
+        Utils.assert_are_almost_equal(lazy_qm_data.highest_vibrational_frequency, qm_data.highest_vibrational_frequency)
+
+        self.assertRaises(AttributeError, getattr, lazy_qm_data, 'not_existing_field')
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+    ])
+    def test_pickled_state(self, file_path):
+
+        qm_data = QmData.from_dict(FileHandler.read_dict_from_json_file(file_path))
+
+        # members calculated on first access are not pickled
+        bond_distance_matrix = qm_data.bond_distance_matrix
+        lone_pair_statistics = qm_data.lone_pair_statistics
+        for name in ['bond_distance_array', 'bond_distance_matrix', 'lone_pair_statistics', 'nbo_index']:
+            self.assertIn(name, vars(qm_data))
+            self.assertNotIn(name, qm_data.__getstate__())
+
+        # SOPA data is only kept in one form
+        self.assertIsInstance(qm_data.sopa_table.stabilisation_energies.tolist(), list)
+        self.assertNotIn('sopa_table', vars(qm_data))
+
+        unpickled_qm_data = pickle.loads(pickle.dumps(qm_data))
+
+        Utils.assert_are_almost_equal(unpickled_qm_data.bond_distance_matrix, bond_distance_matrix)
+        Utils.assert_are_almost_equal(unpickled_qm_data.lone_pair_statistics.counts, lone_pair_statistics.counts)
+        self.assertEqual(unpickled_qm_data.nbo_index, qm_data.nbo_index)
+        Utils.assert_are_almost_equal(unpickled_qm_data.sopa_data, qm_data.sopa_data)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_ZUYHEG,
+            ['id', 'n_atoms', 'geometric_data', 'nbo_data'],
+            [NboType.BOND, NboType.THREE_CENTER_BOND]
+        ],
+
+    ])
+    def test_field_projection(self, file_path, fields, nbo_types):
+
+        qm_data_dict = FileHandler.read_dict_from_json_file(file_path)
+
+        qm_data = QmData.from_dict(qm_data_dict)
+        projected_qm_data = QmData.from_dict(qm_data_dict, fields=fields, nbo_types=nbo_types)
+
+        # requested fields are kept
+        self.assertEqual(projected_qm_data.id, qm_data.id)
+        Utils.assert_are_almost_equal(projected_qm_data.geometric_data, qm_data.geometric_data)
+        # other fields are not loaded
+        self.assertIsNone(projected_qm_data.charge)
+        self.assertIsNone(projected_qm_data.sopa_data)
+        self.assertIsNone(projected_qm_data.wiberg_bond_order_matrix)
+
+        # only NBOs of the requested types are loaded
+        Utils.assert_are_almost_equal(projected_qm_data.bond_pair_data, qm_data.bond_pair_data)
+        Utils.assert_are_almost_equal(projected_qm_data.bond_3c_data, qm_data.bond_3c_data)
+        self.assertEqual(projected_qm_data.lone_pair_data, [])
+        self.assertEqual(projected_qm_data.antibond_pair_data, [])
@@ -0,0 +1,84 @@
+import pickle
+import unittest
+import numpy as np
+from parameterized import parameterized
+
+from HyDGL.qm_data import QmData
+from HyDGL.sopa_table import SopaTable
+from HyDGL.file_handler import FileHandler
+from tests.utils import Utils, TEST_FILE_LALMER, TEST_FILE_ZUYHEG
+
+
+class TestSopaTable(unittest.TestCase):
+
+    @parameterized.expand([
+
+        [
+            [
+                [[1, 3], [2.5, 0.8, 0.04]],
+                [[2, 3], [0.6, 1.1, 0.02]],
+                [[5, 9], [12.1, 0.4, 0.06]],
+            ],
+            {1: 0, 2: 1, 3: 2, 5: 3},
+            [0, 1, 3],
+            [2, 2, -1]
+        ],
+
+        [
+            [],
+            {},
+            [],
+            []
+        ],
+
+    ])
+    def test_from_list(self, sopa_data, nbo_index, expected_donor_nbo_indices, expected_acceptor_nbo_indices):
+
+        sopa_table = SopaTable.from_list(sopa_data)
+
+        self.assertEqual(len(sopa_table), len(sopa_data))
+        self.assertEqual(list(sopa_table), sopa_data)
+        self.assertEqual(sopa_table.stabilisation_energies.tolist(), [x[1][0] for x in sopa_data])
+        self.assertFalse(sopa_table.has_nbo_indices)
+
+        sopa_table = sopa_table.resolve_nbo_indices(nbo_index)
+
+        self.assertTrue(sopa_table.has_nbo_indices)
+        self.assertEqual(sopa_table.donor_nbo_indices.tolist(), expected_donor_nbo_indices)
+        self.assertEqual(sopa_table.acceptor_nbo_indices.tolist(), expected_acceptor_nbo_indices)
+
+    @parameterized.expand([
+
+        [
+            TEST_FILE_LALMER,
+        ],
+
+        [
+            TEST_FILE_ZUYHEG,
+        ],
+
+    ])
+    def test_qm_data_with_sopa_table(self, file_path):
+
+        qm_data_dict = FileHandler.read_dict_from_json_file(file_path)
+
+        qm_data = QmData.from_dict(qm_data_dict)
+        table_qm_data = QmData.from_dict(qm_data_dict, use_nbo_table=True)
+
+        # SOPA data is stored as typed arrays with NBO positions resolved at load time
+        self.assertEqual(type(table_qm_data.sopa_data), SopaTable)
+        self.assertTrue(table_qm_data.sopa_data.has_nbo_indices)
+        self.assertEqual(table_qm_data.sopa_data.energies.dtype, np.float64)
+        Utils.assert_are_almost_equal(list(table_qm_data.sopa_data), qm_data.sopa_data)
+
+        # both forms resolve to the same NBOs
+        for sopa_table, data in [(qm_data.sopa_table, qm_data), (table_qm_data.sopa_table, table_qm_data)]:
+            for nbo_id, nbo_index in zip(sopa_table.donor_nbo_ids.tolist(), sopa_table.donor_nbo_indices.tolist()):
+                if nbo_index >= 0:
+                    self.assertEqual(data.nbo_data[nbo_index].nbo_id, nbo_id)
+                else:
+                    self.assertIsNone(data.get_nbo_by_id(nbo_id))
+
+        # columnar SOPA data survives pickling
+        pickled_qm_data = pickle.loads(pickle.dumps(table_qm_data))
+        Utils.assert_are_almost_equal(list(pickled_qm_data.sopa_data), qm_data.sopa_data)
@@ -203,17 +203,46 @@ class TestTools(unittest.TestCase):
         [
             [[1, 2], [2, 3], [5, 1]],
             [
-                [0, 1.414214, 4.123106],
-                [1.414214, 0, 3.605551],
-                [4.123106, 3.605551, 0]
+                [0.0, 1.414214, 4.123106],
+                [1.414214, 0.0, 3.605551],
+                [4.123106, 3.605551, 0.0]
             ]
-        ]
+        ],
+
+        [
+            [],
+            []
+        ],
 
     ])
     def test_calculate_distance_matrix(self, points, expected):
 
         Utils.assert_are_almost_equal(Tools.calculate_distance_matrix(points), expected)
 
+    @parameterized.expand([
+
+        [
+            [[1, 2], [2, 3], [5, 1]],
+            [
+                [0.0, 1.414214, 4.123106],
+                [1.414214, 0.0, 3.605551],
+                [4.123106, 3.605551, 0.0]
+            ]
+        ],
+
+        [
+            [],
+            []
+        ],
+
+    ])
+    def test_calculate_distance_array(self, points, expected):
+
+        result = Tools.calculate_distance_array(points)
+
+        self.assertEqual(result.shape, (len(points), len(points)))
+        Utils.assert_are_almost_equal(result.tolist(), expected)
+
     @parameterized.expand([
 
         [